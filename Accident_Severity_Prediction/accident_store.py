@@ -0,0 +1,375 @@
+"""Columnar accident-history store with rollups maintained on append.
+
+Records have the columns of the severity model. Each column is an append-only binary file
+that readers memory-map. Every append also updates small dense rollups (per day, per month
+and per road-surface / weather condition) saved next to the columns, so the dashboard
+statistics cost the same whether the store holds a thousand rows or a hundred million.
+
+    python Accident_Severity_Prediction/accident_store.py ingest accidents.csv [more.csv ...]
+    python Accident_Severity_Prediction/accident_store.py stats
+    python Accident_Severity_Prediction/accident_store.py bench [--rows 5000000]
+
+Dates are accepted as ISO or day-first strings; Day_of_Week is recomputed from Date as
+datetime.weekday(), the encoding build_severity_features uses. Rows without a valid date
+or coordinates are skipped.
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date
+import numpy as np
+
+from settings import ACCIDENT_STORE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within the process
+    fcntl = None
+
+# On-disk type of every column, in the order of SEVERITY_FEATURES
+COLUMNS = {
+    "Day_of_Week": np.uint8,
+    "Date": np.int32,  # proleptic Gregorian ordinal, as date.toordinal()
+    "Latitude": np.float32,
+    "Longitude": np.float32,
+    "Number_of_Casualties": np.uint16,
+    "Number_of_Vehicles": np.uint16,
+    "Road_Surface_Conditions": np.uint8,  # index in the store's labels
+    "Weather_Conditions": np.uint8,
+}
+CATEGORICAL = ("Road_Surface_Conditions", "Weather_Conditions")
+# Fields of the daily and monthly rollups
+ROLLUP_FIELDS = ("accidents", "casualties", "vehicles", "adverse_weather")
+
+# Weather labels counted as adverse conditions: words of the common datasets, and the Foggy (1)
+# and Rainy (2) classes of the weather model when the column holds class numbers
+ADVERSE_WEATHER_WORDS = ("rain", "snow", "fog", "mist", "+ high wind", "storm", "hail", "sleet",
+                         "pluv", "brum", "orag", "neige")
+ADVERSE_WEATHER_CLASSES = ("1", "2")
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def is_adverse_weather(label):
+    label = str(label).strip().lower()
+    return label in ADVERSE_WEATHER_CLASSES or any(word in label for word in ADVERSE_WEATHER_WORDS)
+
+def month_index(ordinals):
+    # Months since year 0 (year * 12 + month - 1) of date ordinals
+    days = np.asarray(ordinals, dtype=np.int64) - EPOCH_ORDINAL
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    return months + 1970 * 12
+
+def month_label(index):
+    return date(int(index) // 12, int(index) % 12 + 1, 1).strftime("%b %Y")
+
+def _empty_rollups():
+    fields = len(ROLLUP_FIELDS)
+    return {
+        "day0": 0, "daily": np.zeros((0, fields), dtype=np.int64),
+        "month0": 0, "monthly": np.zeros((0, fields), dtype=np.int64),
+        **{column: np.zeros(0, dtype=np.int64) for column in CATEGORICAL},
+    }
+
+def _accumulate(origin, table, keys, values):
+    """Add values (n, fields) into the dense table indexed by key - origin, growing it as needed."""
+    if len(keys) == 0:
+        return origin, table
+    low, high = int(keys.min()), int(keys.max())
+    if len(table) == 0:
+        origin = low
+    start = min(origin, low)
+    end = max(origin + len(table), high + 1)
+    if start != origin or end != origin + len(table):
+        grown = np.zeros((end - start, table.shape[1]), dtype=np.int64)
+        grown[origin - start:origin - start + len(table)] = table
+        origin, table = start, grown
+    offsets = keys - origin
+    for field in range(table.shape[1]):
+        table[:, field] += np.bincount(offsets, weights=values[:, field], minlength=len(table)).astype(np.int64)
+    return origin, table
+
+class AccidentStore:
+    """Accident records as memory-mapped columns, plus rollups read in constant time."""
+
+    def __init__(self, path=ACCIDENT_STORE_DIR):
+        self.path = path
+        self._lock = threading.RLock()
+        self._meta_mtime = None
+        self._meta = {"rows": 0, "labels": {column: [] for column in CATEGORICAL}}
+        self._rollups = _empty_rollups()
+
+    # Reading
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _refresh(self):
+        # Reload metadata and rollups when another process (or the ingest CLI) appended
+        try:
+            mtime = os.stat(self._file("meta.json")).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._meta_mtime:
+            return
+        with self._lock:
+            with open(self._file("meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            with np.load(self._file("rollups.npz")) as data:
+                rollups = {name: data[name] for name in data.files}
+            rollups["day0"], rollups["month0"] = int(rollups["day0"]), int(rollups["month0"])
+            self._meta, self._rollups, self._meta_mtime = meta, rollups, mtime
+
+    @property
+    def rows(self):
+        self._refresh()
+        return self._meta["rows"]
+
+    def labels(self, column):
+        self._refresh()
+        return list(self._meta["labels"][column])
+
+    def column(self, name):
+        """Memory-mapped values of one column (categorical columns hold label indices)."""
+        rows = self.rows
+        if rows == 0:
+            return np.zeros(0, dtype=COLUMNS[name])
+        return np.memmap(self._file(f"{name}.bin"), dtype=COLUMNS[name], mode="r", shape=(rows,))
+
+    def monthly(self, months=12):
+        """(month indices, (months, len(ROLLUP_FIELDS)) totals) of the months up to the latest with data."""
+        self._refresh()
+        month0, table = self._rollups["month0"], self._rollups["monthly"]
+        end = month0 + len(table)
+        keys = np.arange(end - months, end)
+        totals = np.zeros((months, len(ROLLUP_FIELDS)), dtype=np.int64)
+        start = max(0, len(table) - months)
+        totals[months - (len(table) - start):] = table[start:]
+        return keys, totals
+
+    def daily(self, days=30):
+        """(date ordinals, (days, len(ROLLUP_FIELDS)) totals) of the days up to the latest with data."""
+        self._refresh()
+        day0, table = self._rollups["day0"], self._rollups["daily"]
+        end = day0 + len(table)
+        totals = np.zeros((days, len(ROLLUP_FIELDS)), dtype=np.int64)
+        start = max(0, len(table) - days)
+        totals[days - (len(table) - start):] = table[start:]
+        return np.arange(end - days, end), totals
+
+    def condition_counts(self, column):
+        """(labels, accident counts) of a categorical column."""
+        self._refresh()
+        return self.labels(column), self._rollups[column].copy()
+
+    # Writing
+
+    def append(self, frame):
+        """Append the rows of a DataFrame holding the COLUMNS; returns (appended, skipped)."""
+        import pandas as pd
+
+        # Vectorized parsers for the usual formats first; per-value parsing only for what is left
+        text = frame["Date"].astype(str).str.strip()
+        dates = pd.to_datetime(text, format="ISO8601", errors="coerce")
+        for date_format in ("%d/%m/%Y", "mixed"):
+            missing = dates.isna().to_numpy()
+            if not missing.any():
+                break
+            dates[missing] = pd.to_datetime(text[missing], format=date_format, dayfirst=True, errors="coerce")
+        lat = pd.to_numeric(frame["Latitude"], errors="coerce")
+        lon = pd.to_numeric(frame["Longitude"], errors="coerce")
+        valid = (dates.notna() & lat.notna() & lon.notna()).to_numpy()
+        skipped = int((~valid).sum())
+        frame, dates, lat, lon = frame[valid], dates[valid], lat[valid], lon[valid]
+        n = len(frame)
+        if n == 0:
+            return 0, skipped
+
+        ordinals = dates.to_numpy().astype("datetime64[D]").astype(np.int64) + EPOCH_ORDINAL
+        columns = {
+            "Day_of_Week": dates.dt.weekday.to_numpy(),
+            "Date": ordinals,
+            "Latitude": lat.to_numpy(),
+            "Longitude": lon.to_numpy(),
+        }
+        for name in ("Number_of_Casualties", "Number_of_Vehicles"):
+            values = pd.to_numeric(frame[name], errors="coerce").fillna(0).to_numpy()
+            columns[name] = np.clip(values, 0, np.iinfo(COLUMNS[name]).max)
+
+        with self._lock, self._file_lock():
+            self._meta_mtime = None
+            self._refresh()
+            meta = json.loads(json.dumps(self._meta))
+            rollups = {name: np.array(value) if isinstance(value, np.ndarray) else value
+                       for name, value in self._rollups.items()}
+            for name in CATEGORICAL:
+                labels = meta["labels"][name]
+                text = frame[name].fillna("Unknown").astype(str).str.strip()
+                uniques, inverse = np.unique(text.to_numpy(), return_inverse=True)
+                codes_of_unique = []
+                for label in uniques:
+                    if label not in labels:
+                        if len(labels) > np.iinfo(COLUMNS[name]).max:
+                            raise ValueError(f"{name}: more than {len(labels)} distinct labels")
+                        labels.append(label)
+                    codes_of_unique.append(labels.index(label))
+                columns[name] = np.asarray(codes_of_unique, dtype=np.int64)[inverse]
+
+            # Rollups first in memory, then every file is written; meta.json goes last and holds
+            # the row count, so columns left longer by an interrupted append are cut back next time
+            adverse = np.array([is_adverse_weather(label) for label in meta["labels"]["Weather_Conditions"]])
+            values = np.column_stack((
+                np.ones(n),
+                columns["Number_of_Casualties"],
+                columns["Number_of_Vehicles"],
+                adverse[columns["Weather_Conditions"]],
+            ))
+            rollups["day0"], rollups["daily"] = _accumulate(rollups["day0"], rollups["daily"], ordinals, values)
+            rollups["month0"], rollups["monthly"] = _accumulate(rollups["month0"], rollups["monthly"],
+                                                                month_index(ordinals), values)
+            for name in CATEGORICAL:
+                counts = np.bincount(columns[name], minlength=len(meta["labels"][name]))
+                counts[:len(rollups[name])] += rollups[name]
+                rollups[name] = counts
+
+            rows = meta["rows"]
+            for name, dtype in COLUMNS.items():
+                path = self._file(f"{name}.bin")
+                with open(path, "ab") as f:
+                    f.truncate(rows * np.dtype(dtype).itemsize)
+                    f.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+            meta["rows"] = rows + n
+            self._write_atomic("rollups.npz", lambda f: np.savez(f, **rollups))
+            self._write_atomic("meta.json", lambda f: f.write(json.dumps(meta, indent=2).encode("utf-8")))
+            self._meta_mtime = None
+        return n, skipped
+
+    def ingest_csv(self, path, chunk_rows=500_000):
+        """Bulk-load a CSV with the COLUMNS (other columns are ignored); returns (appended, skipped)."""
+        import pandas as pd
+
+        appended = skipped = 0
+        for chunk in pd.read_csv(path, usecols=list(COLUMNS), chunksize=chunk_rows, dtype=str):
+            a, s = self.append(chunk)
+            appended, skipped = appended + a, skipped + s
+        return appended, skipped
+
+    def _write_atomic(self, name, write):
+        tmp_path = self._file(f"{name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, self._file(name))
+
+    def _file_lock(self):
+        # Serializes appends across processes (the ingest CLI and a running app)
+        os.makedirs(self.path, exist_ok=True)
+        return _FileLock(self._file("append.lock"))
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self.file = open(self.path, "a")
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+def open_store(path=ACCIDENT_STORE_DIR):
+    return AccidentStore(path)
+
+def synthetic_records(rows, seed=0, start=date(2015, 1, 1), years=10):
+    # Accident records spread over Tunisia, in the format of the CSV bulk loads
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    ordinals = start.toordinal() + rng.integers(0, 365 * years, rows)
+    dates = (ordinals - EPOCH_ORDINAL).astype("datetime64[D]")
+    return pd.DataFrame({
+        "Date": np.datetime_as_string(dates),
+        "Day_of_Week": "",
+        "Latitude": np.round(rng.uniform(33.0, 37.3, rows), 5),
+        "Longitude": np.round(rng.uniform(8.0, 11.5, rows), 5),
+        "Number_of_Casualties": rng.poisson(1.4, rows) + 1,
+        "Number_of_Vehicles": rng.poisson(1.0, rows) + 1,
+        "Road_Surface_Conditions": rng.choice(["Dry", "Wet or damp", "Flood over 3cm. deep", "Frost or ice"],
+                                              rows, p=[0.7, 0.25, 0.03, 0.02]),
+        "Weather_Conditions": rng.choice(["Fine no high winds", "Raining no high winds", "Fog or mist",
+                                          "Fine + high winds", "Other"], rows, p=[0.75, 0.15, 0.03, 0.04, 0.03]),
+    })
+
+def bench(rows=5_000_000, chunk_rows=1_000_000):
+    def best_us(fn, repeat=200):
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - started)
+        return min(times) * 1e6
+
+    tmp = tempfile.mkdtemp(prefix="accident_store_")
+    try:
+        store = AccidentStore(tmp)
+        print(f"{'rows':>10} {'ingest rows/s':>14} {'disk B/row':>11} {'monthly(12) us':>15} "
+              f"{'conditions us':>14} {'column scan ms':>15}")
+        for i in range(0, rows, chunk_rows):
+            frame = synthetic_records(min(chunk_rows, rows - i), seed=i)
+            started = time.perf_counter()
+            store.append(frame)
+            rate = len(frame) / (time.perf_counter() - started)
+            disk = sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp))
+            monthly_us = best_us(lambda: store.monthly(12))
+            conditions_us = best_us(lambda: store.condition_counts("Road_Surface_Conditions"))
+            started = time.perf_counter()
+            store.column("Number_of_Casualties").sum()
+            scan_ms = (time.perf_counter() - started) * 1000
+            print(f"{store.rows:>10} {rate:>14,.0f} {disk / store.rows:>11.1f} {monthly_us:>15.1f} "
+                  f"{conditions_us:>14.1f} {scan_ms:>15.1f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def print_stats(store):
+    print(f"{store.path}: {store.rows} records")
+    if not store.rows:
+        return
+    keys, totals = store.monthly(12)
+    for key, row in zip(keys, totals):
+        print(f"  {month_label(key)}: " + ", ".join(f"{field} {value}" for field, value in zip(ROLLUP_FIELDS, row)))
+    for column in CATEGORICAL:
+        labels, counts = store.condition_counts(column)
+        print(f"  {column}: " + ", ".join(f"{label} {count}" for label, count in zip(labels, counts)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default=ACCIDENT_STORE_DIR, help="store directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = sub.add_parser("ingest", help="append the records of CSV files")
+    ingest_parser.add_argument("csv", nargs="+")
+    ingest_parser.add_argument("--chunk-rows", type=int, default=500_000)
+    sub.add_parser("stats", help="record count and the latest rollups")
+    bench_parser = sub.add_parser("bench", help="ingest rate and rollup read time as the store grows")
+    bench_parser.add_argument("--rows", type=int, default=5_000_000)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        bench(args.rows)
+        return
+    store = AccidentStore(args.path)
+    if args.command == "ingest":
+        for path in args.csv:
+            started = time.perf_counter()
+            appended, skipped = store.ingest_csv(path, args.chunk_rows)
+            print(f"{path}: {appended} records appended, {skipped} skipped, "
+                  f"in {time.perf_counter() - started:.1f} s")
+    print_stats(store)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Every named cache, so hit/miss counters can be reported in one place
+_caches = {}
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire ttl seconds after being stored.
+
+    Instances live at module level, so they are shared by every Streamlit session
+    of the process. ttl=None keeps entries until they are evicted. With maxbytes,
+    least recently used entries are also evicted once the sizes reported by
+    sizeof(key, value) add up to more than maxbytes.
+    """
+
+    def __init__(self, name, maxsize=256, ttl=None, maxbytes=None, sizeof=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        _caches[name] = self
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        size = self.sizeof(key, value) if self.sizeof is not None else 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires, value, size)
+            self.bytes += size
+            while len(self._entries) > self.maxsize or (self.maxbytes is not None and self.bytes > self.maxbytes):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        self.bytes -= self._entries.pop(key)[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+class RefreshingCache:
+    """Process-wide cache of fetch(*args) results with stale-while-revalidate and request coalescing.
+
+    An entry is fresh for ttl seconds. For stale_ttl more seconds it is still served, while a
+    single background fetch replaces it. Misses and older entries are fetched in the caller's
+    thread, and concurrent fetches of one key wait for the same call. Failed fetches and None
+    results are not cached. Fetch latencies of the last LATENCY_WINDOW fetches are reported.
+    """
+    LATENCY_WINDOW = 512
+
+    def __init__(self, name, fetch, ttl, stale_ttl=0.0, maxsize=1024, workers=2):
+        self.name = name
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self.workers = workers
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.fetches = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=self.LATENCY_WINDOW)
+        self._entries = OrderedDict()  # key -> (monotonic time stored, value)
+        self._inflight = {}  # key -> Future of the running fetch
+        self._executor = None
+        self._lock = threading.Lock()
+        _caches[name] = self
+
+    def get(self, key, *args, refresh=False):
+        """Value of key, calling fetch(*args) when needed; refresh=True always fetches (still coalesced)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not refresh:
+                age = time.monotonic() - entry[0]
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    if age < self.ttl:
+                        self.hits += 1
+                    else:
+                        self.stale_hits += 1
+                        self._start_fetch(key, args, background=True)
+                    return entry[1]
+            if not refresh:
+                self.misses += 1
+            future, owner = self._start_fetch(key, args)
+        if owner:
+            self._fetch(key, args, future)
+        return future.result()
+
+    def _start_fetch(self, key, args, background=False):
+        # (future, True) when the caller has to run the fetch itself; called with the lock held
+        future = self._inflight.get(key)
+        if future is not None:
+            if not background:
+                self.coalesced += 1
+            return future, False
+        future = Future()
+        self._inflight[key] = future
+        if background:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{self.name}-refresh")
+            self._executor.submit(self._fetch, key, args, future)
+            return future, False
+        return future, True
+
+    def _fetch(self, key, args, future):
+        started = time.perf_counter()
+        try:
+            value = self.fetch(*args)
+        except Exception as e:
+            error, value = e, None
+        else:
+            error = None
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.fetches += 1
+            self._latencies.append(elapsed)
+            del self._inflight[key]
+            if error is not None:
+                self.errors += 1
+            elif value is not None:
+                self._entries[key] = (time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "bytes": 0,
+            "hits": self.hits + self.stale_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "coalesced": self.coalesced,
+            "fetches": self.fetches,
+            "errors": self.errors,
+            "fetch_ms_p50": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+            "fetch_ms_p95": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+        }
+
+def cache_stats():
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,60 @@
+import importlib
+import threading
+import time
+
+from model_runtime import load_weather_model, load_severity_model
+from severity_raster import load_raster
+from reverse_index import get_reverse_index
+from gazetteer import get_gazetteer
+from accident_store import open_store
+
+class ComponentRegistry:
+    """Models and heavy libraries, loaded on first use and shared by the whole process.
+
+    get(name) runs the registered loader once and records how long it took, so
+    pages only pay for what they actually use. A loader that raises is retried
+    on the next call.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._components = {}
+        self._locks = {}
+        self._registry_lock = threading.Lock()
+        self.load_times = {}
+
+    def register(self, name, loader):
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._locks[name] = threading.Lock()
+
+    def register_module(self, name, module_name=None):
+        self.register(name, lambda: importlib.import_module(module_name or name))
+
+    def get(self, name):
+        if name in self._components:
+            return self._components[name]
+        with self._locks[name]:
+            if name not in self._components:
+                started = time.perf_counter()
+                self._components[name] = self._loaders[name]()
+                self.load_times[name] = time.perf_counter() - started
+        return self._components[name]
+
+    def is_loaded(self, name):
+        return name in self._components
+
+registry = ComponentRegistry()
+
+# Libraries only some pages need
+registry.register_module("folium")
+registry.register_module("gtts")
+registry.register_module("geocoder")
+
+# Models and precomputed indexes
+registry.register("weather_model", load_weather_model)
+registry.register("severity_model", load_severity_model)
+registry.register("severity_raster", load_raster)
+registry.register("reverse_index", get_reverse_index)
+registry.register("gazetteer", get_gazetteer)
+registry.register("accident_store", open_store)
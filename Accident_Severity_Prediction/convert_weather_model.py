@@ -0,0 +1,118 @@
+"""Export the Keras weather CNN to ONNX and check it against the original.
+
+Run from the project root (the same working directory as the app):
+
+    python Accident_Severity_Prediction/convert_weather_model.py convert
+    python Accident_Severity_Prediction/convert_weather_model.py parity --samples path/to/images
+    python Accident_Severity_Prediction/convert_weather_model.py report
+
+`convert` and `parity` need TensorFlow and tf2onnx (requirements-convert.txt);
+the serving image only needs onnxruntime.
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+from PIL import Image
+
+from model_runtime import WEATHER_KERAS_PATH, WEATHER_ONNX_PATH, OnnxWeatherModel
+
+INPUT_SHAPE = (128, 128, 3)
+
+def _use_legacy_keras():
+    # TensorFlow >= 2.16 defaults to Keras 3, whose models tf2onnx cannot convert; tf_keras keeps Keras 2
+    os.environ.setdefault("TF_USE_LEGACY_KERAS", "1")
+
+def convert(keras_path=WEATHER_KERAS_PATH, onnx_path=WEATHER_ONNX_PATH, opset=13):
+    _use_legacy_keras()
+    import tensorflow as tf
+    import tf2onnx
+
+    model = tf.keras.models.load_model(keras_path)
+    signature = [tf.TensorSpec((None,) + INPUT_SHAPE, tf.float32, name="input")]
+    tf2onnx.convert.from_keras(model, input_signature=signature, opset=opset, output_path=onnx_path)
+    print(f"Wrote {onnx_path} ({os.path.getsize(onnx_path) / 1e6:.1f} MB)")
+
+def load_samples(samples_dir=None, count=64):
+    # Real images when a sample directory is given, deterministic noise otherwise
+    if samples_dir:
+        paths = sorted(glob.glob(os.path.join(samples_dir, "*")))
+        images = []
+        for path in paths:
+            try:
+                image = Image.open(path).convert("RGB").resize(INPUT_SHAPE[:2])
+            except Exception:
+                continue
+            images.append(np.asarray(image, dtype=np.float32) / 255.0)
+        if images:
+            return np.stack(images)
+    rng = np.random.default_rng(0)
+    return rng.random((count,) + INPUT_SHAPE, dtype=np.float32)
+
+def parity(samples_dir=None):
+    _use_legacy_keras()
+    from tensorflow.keras.models import load_model
+
+    batch = load_samples(samples_dir)
+    keras_pred = load_model(WEATHER_KERAS_PATH).predict(batch, verbose=0)
+    onnx_pred = OnnxWeatherModel(WEATHER_ONNX_PATH).predict(batch)
+    keras_labels = np.argmax(keras_pred, axis=1)
+    onnx_labels = np.argmax(onnx_pred, axis=1)
+    mismatches = int(np.sum(keras_labels != onnx_labels))
+    print(f"Samples: {len(batch)}")
+    print(f"Label mismatches: {mismatches}")
+    print(f"Max probability difference: {np.max(np.abs(keras_pred - onnx_pred)):.2e}")
+    return mismatches == 0
+
+# Executed in a fresh interpreter so that import cost and memory are measured from a cold start
+_STARTUP_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+from model_runtime import load_weather_model
+model = load_weather_model(sys.argv[1])
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "tensorflow_imported": "tensorflow" in sys.modules,
+}))
+"""
+
+def startup_report(backends=("keras", "onnx")):
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])))
+    results = {}
+    for backend in backends:
+        proc = subprocess.run([sys.executable, "-c", _STARTUP_PROBE, backend],
+                              capture_output=True, text=True, env=env)
+        if proc.returncode != 0:
+            print(f"{backend}: failed\n{proc.stderr.strip()}")
+            continue
+        results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+    print(f"{'backend':<8} {'startup (s)':>12} {'max RSS (MB)':>13} {'tensorflow':>11}")
+    for backend, r in results.items():
+        print(f"{backend:<8} {r['seconds']:>12.2f} {r['max_rss_mb']:>13.0f} {str(r['tensorflow_imported']):>11}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert_parser = sub.add_parser("convert", help="export weather_cnn_model.h5 to ONNX")
+    convert_parser.add_argument("--output", default=WEATHER_ONNX_PATH, help=f"ONNX file (default: {WEATHER_ONNX_PATH})")
+    parity_parser = sub.add_parser("parity", help="compare Keras and ONNX predicted labels")
+    parity_parser.add_argument("--samples", help="directory of sample images (random inputs if omitted)")
+    sub.add_parser("report", help="cold-start time and RSS for each backend")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        convert(onnx_path=args.output)
+    elif args.command == "parity":
+        sys.exit(0 if parity(args.samples) else 1)
+    else:
+        startup_report()
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,10 @@ import pandas as pd
 import numpy as np
 import requests
 import folium
-from streamlit_folium import folium_static
+import folium.plugins
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import json
 import random
 from PIL import Image
@@ -14,6 +14,16 @@ import io
 import base64
 import time
 from datetime import datetime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from component_registry import registry
+from map_cache import map_key, record_map_update, render_template, show_html
+from weather_refresh import WeatherRefresher
+from accident_store import ROLLUP_FIELDS, is_adverse_weather, month_index, month_label
+from caching import RefreshingCache, TTLCache
+from geo_utils import geohash, geohash_center
+from heat_grid import heat_cells, heat_data as heat_grid_data
+from settings import (WEATHER_CACHE_SIZE, WEATHER_CACHE_STALE_TTL, WEATHER_CACHE_TTL, WEATHER_FETCH_WORKERS,
+                      WEATHER_GEOHASH_PRECISION)
 
 # Configuration de la page
 
@@ -184,40 +194,78 @@ def load_css():
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0-beta3/css/all.min.css">
     """, unsafe_allow_html=True)
 
-# Charger les styles CSS
-load_css()
+# Fonction pour interroger le fournisseur météo (simulé) au centre d'une cellule
+def fetch_weather_data(lat, lon):
+    # Simuler une requête API météo
+    weather_conditions = ["Ensoleillé", "Nuageux", "Pluvieux", "Brumeux", "Orageux"]
+    temperatures = range(15, 35)
+    
+    weather = {
+        "condition": random.choice(weather_conditions),
+        "temperature": random.choice(temperatures),
+        "humidity": random.randint(30, 90),
+        "wind_speed": round(random.uniform(0, 30), 1),
+        "timestamp": datetime.now().strftime("%H:%M:%S")
+    }
+    
+    # Associer des emojis aux conditions météo
+    weather_emojis = {
+        "Ensoleillé": "☀️",
+        "Nuageux": "☁️",
+        "Pluvieux": "🌧️",
+        "Brumeux": "🌫️",
+        "Orageux": "⛈️"
+    }
+    
+    weather["emoji"] = weather_emojis.get(weather["condition"], "❓")
+    
+    return weather
 
-# Fonction pour obtenir les données météo
-def get_weather_data(lat, lon):
+# Cache météo du processus, par cellule geohash : une seule requête par cellule, même pour des
+# sessions simultanées, et les données expirées restent servies pendant leur rafraîchissement
+weather_cache = RefreshingCache("weather_cells", fetch_weather_data, ttl=WEATHER_CACHE_TTL,
+                                stale_ttl=WEATHER_CACHE_STALE_TTL, maxsize=WEATHER_CACHE_SIZE,
+                                workers=WEATHER_FETCH_WORKERS)
+
+# Fonction pour obtenir les données météo de la cellule contenant (lat, lon)
+def get_weather_data(lat, lon, refresh=False):
+    cell = geohash(lat, lon, WEATHER_GEOHASH_PRECISION)
     try:
-        # Simuler une requête API météo
-        weather_conditions = ["Ensoleillé", "Nuageux", "Pluvieux", "Brumeux", "Orageux"]
-        temperatures = range(15, 35)
-        
-        weather = {
-            "condition": random.choice(weather_conditions),
-            "temperature": random.choice(temperatures),
-            "humidity": random.randint(30, 90),
-            "wind_speed": round(random.uniform(0, 30), 1),
-            "timestamp": datetime.now().strftime("%H:%M:%S")
-        }
-        
-        # Associer des emojis aux conditions météo
-        weather_emojis = {
-            "Ensoleillé": "☀️",
-            "Nuageux": "☁️",
-            "Pluvieux": "🌧️",
-            "Brumeux": "🌫️",
-            "Orageux": "⛈️"
-        }
-        
-        weather["emoji"] = weather_emojis.get(weather["condition"], "❓")
-        
-        return weather
-    except Exception as e:
-        st.error(f"Erreur lors de la récupération des données météo: {str(e)}")
+        return weather_cache.get(cell, *geohash_center(cell), refresh=refresh)
+    except Exception:
+        # Le widget affiche un avertissement lorsque les données sont indisponibles
         return None
 
+# Météo partagée par toutes les sessions, une requête par cellule et par intervalle de rafraîchissement
+weather_refresher = WeatherRefresher(get_weather_data)
+
+# Graphiques déjà construits, par historique et par jour : un déplacement de la position ne les recalcule pas
+chart_cache = TTLCache("dashboard_charts", maxsize=16)
+
+def cached_chart(name, build):
+    store = registry.get("accident_store")
+    key = (name, store.rows if store is not None else 0, date.today())
+    fig = chart_cache.get(key)
+    if fig is None:
+        fig = build()
+        chart_cache.set(key, fig)
+    return fig
+
+# Fonction pour construire le widget météo
+def weather_widget_html(weather):
+    return f"""
+            <div class='weather-container'>
+                <div class='weather-icon'>{weather['emoji']}</div>
+                <div class='weather-info'>
+                    <div class='weather-temp'>{weather['temperature']}°C</div>
+                    <div class='weather-desc'>{weather['condition']}</div>
+                    <div>Humidity: {weather['humidity']}%</div>
+                    <div>Winds: {weather['wind_speed']} km/h</div>
+                    <div style='font-size: 0.8rem; color: var(--text-secondary);'>update: {weather['timestamp']}</div>
+                </div>
+            </div>
+            """
+
 # Fonction pour générer des données historiques d'accidents
 def generate_accident_history():
     # Générer des données pour les 12 derniers mois
@@ -253,6 +301,56 @@ def generate_road_conditions():
         "percentage": normalized
     })
 
+# Historique mensuel des accidents : agrégats du magasin d'accidents, ou données simulées s'il est vide
+def load_accident_history(months=12):
+    store = registry.get("accident_store")
+    if not store.rows:
+        return generate_accident_history()
+    keys, totals = store.monthly(months)
+    return pd.DataFrame({
+        "date": [month_label(key) for key in keys],
+        "accidents": totals[:, ROLLUP_FIELDS.index("accidents")],
+        "casualties": totals[:, ROLLUP_FIELDS.index("casualties")],
+        "severe_conditions": totals[:, ROLLUP_FIELDS.index("adverse_weather")]
+    })
+
+# Répartition des accidents par état de la chaussée, ou données simulées
+def load_road_conditions():
+    store = registry.get("accident_store")
+    if not store.rows:
+        return generate_road_conditions()
+    labels, counts = store.condition_counts("Road_Surface_Conditions")
+    return pd.DataFrame({
+        "condition": labels,
+        "percentage": np.round(counts * 100 / max(1, counts.sum()), 1)
+    })
+
+# Chiffres des cartes de résumé (dernier mois avec des données), ou valeurs d'exemple
+def load_accident_summary():
+    store = registry.get("accident_store")
+    if not store.rows:
+        return {"period": "this month", "accidents": 157, "casualties": 42, "evolution": -12, "weather_share": 28}
+    keys, totals = store.monthly(2)
+    previous, current = totals[:, ROLLUP_FIELDS.index("accidents")]
+    labels, counts = store.condition_counts("Weather_Conditions")
+    adverse = sum(count for label, count in zip(labels, counts) if is_adverse_weather(label))
+    return {
+        "period": "this month" if keys[-1] == month_index([date.today().toordinal()])[0] else f"in {month_label(keys[-1])}",
+        "accidents": int(current),
+        "casualties": int(totals[-1, ROLLUP_FIELDS.index("casualties")]),
+        "evolution": int(round((current - previous) * 100 / previous)) if previous else 0,
+        "weather_share": int(round(adverse * 100 / max(1, counts.sum())))
+    }
+
+# Classe météo du modèle de gravité (voir weather_labels_mapping) pour chaque condition affichée
+WEATHER_CLASS_BY_CONDITION = {
+    "Ensoleillé": 3,
+    "Nuageux": 0,
+    "Pluvieux": 2,
+    "Brumeux": 1,
+    "Orageux": 2
+}
+
 # Fonction pour créer une carte avec la position actuelle
 def create_location_map(lat, lon):
     m = folium.Map(location=[lat, lon], zoom_start=13, tiles="CartoDB dark_matter")
@@ -276,8 +374,160 @@ def create_location_map(lat, lon):
     
     return m
 
+# Taille et zoom de la carte de chaleur (les cellules agrégées en dépendent)
+HEAT_MAP_ZOOM, HEAT_MAP_WIDTH, HEAT_MAP_HEIGHT = 11, 1000, 500
+
+def heat_map_anchor(lat, lon):
+    # Les points sont calculés autour de la position arrondie à 0.1° : en deçà, seul le marqueur bouge
+    return round(lat, 1), round(lon, 1)
+
+def heat_map_filter(condition):
+    # Par temps défavorable, seuls les accidents survenus dans des conditions similaires sont affichés
+    return "adverse" if condition and is_adverse_weather(condition) else None
+
+# Fonction pour créer la carte de chaleur autour de la position actuelle (données autour de anchor)
+def create_heat_map(lat, lon, condition, anchor=None):
+    anchor_lat, anchor_lon = anchor if anchor is not None else (lat, lon)
+    store = registry.get("accident_store")
+    severity_raster = registry.get("severity_raster")
+    if store is not None and store.rows:
+        # Accidents enregistrés, agrégés côté serveur en cellules de quelques pixels
+        cells = heat_cells(store, anchor_lat, anchor_lon, HEAT_MAP_ZOOM, HEAT_MAP_WIDTH, HEAT_MAP_HEIGHT,
+                           heat_map_filter(condition))
+        heat_data = heat_grid_data(cells)
+    elif severity_raster is not None:
+        # Gravité prédite sur la grille précalculée autour de la position actuelle
+        points = severity_raster.heat_points(
+            WEATHER_CLASS_BY_CONDITION.get(condition, 0),
+            datetime.now().weekday(),
+            (anchor_lat - 0.15, anchor_lon - 0.15,
+             anchor_lat + 0.15, anchor_lon + 0.15),
+            step=2
+        )
+        heat_data = np.asarray(points, dtype=float).reshape(-1, 3).tolist()
+    else:
+        # Générer des points aléatoires autour de la position actuelle
+        num_points = 100
+        np.random.seed(42)  # Pour la reproductibilité
+
+        # Générer des coordonnées aléatoires dans un rayon de ~10km
+        lats = anchor_lat + np.random.normal(0, 0.05, num_points)
+        lons = anchor_lon + np.random.normal(0, 0.05, num_points)
+
+        # Générer des valeurs d'intensité (nombre d'accidents)
+        intensities = np.random.randint(1, 10, num_points)
+
+        heat_data = np.column_stack((lats, lons, intensities)).tolist()
+
+    # Créer la carte de chaleur
+    heat_map = folium.Map(location=[lat, lon], 
+                         zoom_start=HEAT_MAP_ZOOM, 
+                         tiles="CartoDB dark_matter")
+
+    # Ajouter les points de chaleur
+    folium.plugins.HeatMap(heat_data, radius=15, gradient={0.4: 'blue', 0.65: 'lime', 1: 'red'}).add_to(heat_map)
+
+    # Ajouter un marqueur pour la position actuelle
+    folium.Marker(
+        [lat, lon],
+        tooltip="Position actuelle",
+        icon=folium.Icon(color="red", icon="location-dot", prefix="fa")
+    ).add_to(heat_map)
+
+    return heat_map
+
+# Graphique des tendances mensuelles
+def accident_trends_figure():
+    accident_data = load_accident_history()
+    
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scatter(
+        x=accident_data['date'],
+        y=accident_data['accidents'],
+        mode='lines+markers',
+        name='Accidents',
+        line=dict(color='#3a86ff', width=3),
+        marker=dict(size=8)
+    ))
+    
+    fig.add_trace(go.Scatter(
+        x=accident_data['date'],
+        y=accident_data['casualties'],
+        mode='lines+markers',
+        name='Victimes',
+        line=dict(color='#ff006e', width=3),
+        marker=dict(size=8)
+    ))
+    
+    fig.add_trace(go.Scatter(
+        x=accident_data['date'],
+        y=accident_data['severe_conditions'],
+        mode='lines+markers',
+        name='Conditions sévères',
+        line=dict(color='#ffbe0b', width=3),
+        marker=dict(size=8)
+    ))
+    
+    fig.update_layout(
+        title="Trends in road accidents (last 12 months)",
+        xaxis_title="Mois",
+        yaxis_title="Nombre",
+        template="plotly_dark",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+    
+    return fig
+
+# Graphique des conditions routières
+def road_conditions_figure():
+    road_data = load_road_conditions()
+    
+    fig = go.Figure(data=[go.Pie(
+        labels=road_data['condition'],
+        values=road_data['percentage'],
+        hole=.4,
+        marker_colors=['#06d6a0', '#3a86ff', '#ffbe0b', '#ff006e', '#ef476f']
+    )])
+    
+    fig.update_layout(
+        title="Distribution of road conditions",
+        template="plotly_dark",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.2,
+            xanchor="center",
+            x=0.5
+        ),
+        annotations=[dict(text='Road<br>conditions', x=0.5, y=0.5, font_size=15, showarrow=False)]
+    )
+    
+    return fig
+
+# Appelé par les sliders avant l'exécution de la page : la nouvelle position est visible dès cette exécution
+def on_position_change():
+    st.session_state.latitude = st.session_state.latitude_slider
+    st.session_state.longitude = st.session_state.longitude_slider
+    st.session_state.position_changed_at = time.perf_counter()
+
 # Fonction principale du dashboard
 def dashboard():
+    # Styles appliqués à chaque exécution : le module n'est importé qu'une fois
+    load_css()
+    
     st.markdown("<h1 style='text-align: center;'><i class='fas fa-tachometer-alt'></i> Road Safety Dashboard</h1>", unsafe_allow_html=True)
     
     # Initialiser les coordonnées par défaut (Tunis)
@@ -286,17 +536,17 @@ def dashboard():
     if 'longitude' not in st.session_state:
         st.session_state.longitude = 10.1815
     
-    # Initialize weather data and refresh timer
-    current_time = datetime.now()
-    if 'last_weather_refresh' not in st.session_state:
-        st.session_state.last_weather_refresh = current_time
-        st.session_state.weather_data = get_weather_data(st.session_state.latitude, st.session_state.longitude)
-    
-    # Check if 5 seconds have passed since last refresh
-    elif (current_time - st.session_state.last_weather_refresh).total_seconds() > 5:
-        st.session_state.last_weather_refresh = current_time
-        st.session_state.weather_data = get_weather_data(st.session_state.latitude, st.session_state.longitude)
-        st.experimental_rerun()
+    # Météo lue dans le cache partagé, rafraîchi en arrière-plan : la session est réexécutée par le
+    # serveur quand la version de sa cellule change (plus de réexécution toutes les 5 s)
+    lat, lon = st.session_state.latitude, st.session_state.longitude
+    ctx = get_script_run_ctx()
+    weather_version, weather_data = weather_refresher.get(lat, lon, ctx.session_id if ctx else None)
+    weather_key = (weather_refresher.cell(lat, lon), weather_version)
+    # Le widget n'est reconstruit que si la version des données a changé
+    if st.session_state.get('weather_key') != weather_key:
+        st.session_state.weather_key = weather_key
+        st.session_state.weather_data = weather_data
+        st.session_state.weather_html = weather_widget_html(weather_data) if weather_data else None
     
     # Disposition en colonnes
     col1, col2 = st.columns([1, 2])
@@ -306,19 +556,8 @@ def dashboard():
         st.markdown("<div class='widget-container animate'>", unsafe_allow_html=True)
         st.markdown("<div class='widget-title'><i class='fas fa-cloud-sun'></i> Weather Conditions</div>", unsafe_allow_html=True)
         
-        if st.session_state.weather_data:
-            st.markdown(f"""
-            <div class='weather-container'>
-                <div class='weather-icon'>{st.session_state.weather_data['emoji']}</div>
-                <div class='weather-info'>
-                    <div class='weather-temp'>{st.session_state.weather_data['temperature']}°C</div>
-                    <div class='weather-desc'>{st.session_state.weather_data['condition']}</div>
-                    <div>Humidity: {st.session_state.weather_data['humidity']}%</div>
-                    <div>Winds: {st.session_state.weather_data['wind_speed']} km/h</div>
-                    <div style='font-size: 0.8rem; color: var(--text-secondary);'>update: {st.session_state.weather_data['timestamp']}</div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+        if st.session_state.weather_html:
+            st.markdown(st.session_state.weather_html, unsafe_allow_html=True)
         else:
             st.warning("Impossible de récupérer les données météo")
         
@@ -338,14 +577,10 @@ def dashboard():
         
         # Sliders pour ajuster les coordonnées
         st.markdown("<p>Adjust the coordinates:</p>", unsafe_allow_html=True)
-        new_lat = st.slider("Latitude", min_value=30.0, max_value=38.0, value=st.session_state.latitude, step=0.001, format="%.6f")
-        new_lon = st.slider("Longitude", min_value=7.0, max_value=12.0, value=st.session_state.longitude, step=0.001, format="%.6f")
-        
-        # Mettre à jour les coordonnées si elles ont changé
-        if new_lat != st.session_state.latitude or new_lon != st.session_state.longitude:
-            st.session_state.latitude = new_lat
-            st.session_state.longitude = new_lon
-            st.experimental_rerun()
+        st.slider("Latitude", min_value=30.0, max_value=38.0, value=st.session_state.latitude, step=0.001, format="%.6f",
+                  key="latitude_slider", on_change=on_position_change)
+        st.slider("Longitude", min_value=7.0, max_value=12.0, value=st.session_state.longitude, step=0.001, format="%.6f",
+                  key="longitude_slider", on_change=on_position_change)
         
         st.markdown("</div>", unsafe_allow_html=True)
     
@@ -354,8 +589,11 @@ def dashboard():
         st.markdown("<div class='widget-container animate' style='animation-delay: 0.1s;'>", unsafe_allow_html=True)
         st.markdown("<div class='widget-title'><i class='fas fa-map'></i> Location Map</div>", unsafe_allow_html=True)
         
-        location_map = create_location_map(st.session_state.latitude, st.session_state.longitude)
-        folium_static(location_map, width=700, height=400)
+        # Carte rendue une seule fois, seule la position est réécrite dans son HTML
+        lat, lon = st.session_state.latitude, st.session_state.longitude
+        show_html(render_template(map_key("location_map"), create_location_map, lat, lon), width=700, height=400)
+        if 'position_changed_at' in st.session_state:
+            record_map_update(st.session_state.pop('position_changed_at'))
         
         st.markdown("</div>", unsafe_allow_html=True)
     
@@ -367,125 +605,25 @@ def dashboard():
     tab1, tab2, tab3 = st.tabs(["Monthly trends", "Road conditions", "heat map"])
     
     with tab1:
-        # Graphique des tendances mensuelles
-        accident_data = generate_accident_history()
-        
-        fig = go.Figure()
-        
-        fig.add_trace(go.Scatter(
-            x=accident_data['date'],
-            y=accident_data['accidents'],
-            mode='lines+markers',
-            name='Accidents',
-            line=dict(color='#3a86ff', width=3),
-            marker=dict(size=8)
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=accident_data['date'],
-            y=accident_data['casualties'],
-            mode='lines+markers',
-            name='Victimes',
-            line=dict(color='#ff006e', width=3),
-            marker=dict(size=8)
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=accident_data['date'],
-            y=accident_data['severe_conditions'],
-            mode='lines+markers',
-            name='Conditions sévères',
-            line=dict(color='#ffbe0b', width=3),
-            marker=dict(size=8)
-        ))
-        
-        fig.update_layout(
-            title="Trends in road accidents (last 12 months)",
-            xaxis_title="Mois",
-            yaxis_title="Nombre",
-            template="plotly_dark",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='white'),
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            )
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(cached_chart("accident_trends", accident_trends_figure), use_container_width=True)
     
     with tab2:
-        # Graphique des conditions routières
-        road_data = generate_road_conditions()
-        
-        fig = go.Figure(data=[go.Pie(
-            labels=road_data['condition'],
-            values=road_data['percentage'],
-            hole=.4,
-            marker_colors=['#06d6a0', '#3a86ff', '#ffbe0b', '#ff006e', '#ef476f']
-        )])
-        
-        fig.update_layout(
-            title="Distribution of road conditions",
-            template="plotly_dark",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='white'),
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=-0.2,
-                xanchor="center",
-                x=0.5
-            ),
-            annotations=[dict(text='Road<br>conditions', x=0.5, y=0.5, font_size=15, showarrow=False)]
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(cached_chart("road_conditions", road_conditions_figure), use_container_width=True)
     
     with tab3:
         # Carte de chaleur des accidents
         st.markdown("### Carte de chaleur des accidents routiers")
         
-        # Générer des points aléatoires autour de la position actuelle
-        num_points = 100
-        np.random.seed(42)  # Pour la reproductibilité
-        
-        # Générer des coordonnées aléatoires dans un rayon de ~10km
-        lats = st.session_state.latitude + np.random.normal(0, 0.05, num_points)
-        lons = st.session_state.longitude + np.random.normal(0, 0.05, num_points)
-        
-        # Générer des valeurs d'intensité (nombre d'accidents)
-        intensities = np.random.randint(1, 10, num_points)
-        
-        # Créer un DataFrame
-        heatmap_data = pd.DataFrame({
-            'lat': lats,
-            'lon': lons,
-            'intensity': intensities
-        })
-        
-        # Créer la carte de chaleur
-        heat_map = folium.Map(location=[st.session_state.latitude, st.session_state.longitude], 
-                             zoom_start=11, 
-                             tiles="CartoDB dark_matter")
-        
-        # Ajouter les points de chaleur
-        heat_data = [[row['lat'], row['lon'], row['intensity']] for index, row in heatmap_data.iterrows()]
-        folium.plugins.HeatMap(heat_data, radius=15, gradient={0.4: 'blue', 0.65: 'lime', 1: 'red'}).add_to(heat_map)
-        
-        # Ajouter un marqueur pour la position actuelle
-        folium.Marker(
-            [st.session_state.latitude, st.session_state.longitude],
-            tooltip="Position actuelle",
-            icon=folium.Icon(color="red", icon="location-dot", prefix="fa")
-        ).add_to(heat_map)
-        
-        folium_static(heat_map, width=1000, height=500)
+        condition = st.session_state.weather_data['condition'] if st.session_state.weather_data else None
+        lat, lon = st.session_state.latitude, st.session_state.longitude
+        anchor = heat_map_anchor(lat, lon)
+        # Carte reconstruite seulement si la zone, la météo, le jour, le raster ou l'historique changent
+        severity_raster = registry.get("severity_raster")
+        store = registry.get("accident_store")
+        key = map_key("heat_map", anchor, condition, datetime.now().weekday(), severity_raster is not None,
+                      store.rows if store is not None else 0)
+        html = render_template(key, lambda lat, lon: create_heat_map(lat, lon, condition, anchor), lat, lon)
+        show_html(html, width=HEAT_MAP_WIDTH, height=HEAT_MAP_HEIGHT)
     
     st.markdown("</div>", unsafe_allow_html=True)
     
@@ -493,36 +631,37 @@ def dashboard():
     st.markdown("<div class='widget-container animate' style='animation-delay: 0.4s;'>", unsafe_allow_html=True)
     st.markdown("<div class='widget-title'><i class='fas fa-info-circle'></i> Summary of Statistics</div>", unsafe_allow_html=True)
     
+    summary = load_accident_summary()
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.markdown("""
+        st.markdown(f"""
         <div class='stat-card'>
-            <div class='stat-value'>157</div>
-            <div class='stat-label'>Accidents this month</div>
+            <div class='stat-value'>{summary['accidents']}</div>
+            <div class='stat-label'>Accidents {summary['period']}</div>
         </div>
         """, unsafe_allow_html=True)
     
     with col2:
-        st.markdown("""
+        st.markdown(f"""
         <div class='stat-card'>
-            <div class='stat-value'>42</div>
-            <div class='stat-label'>Victims this month</div>
+            <div class='stat-value'>{summary['casualties']}</div>
+            <div class='stat-label'>Victims {summary['period']}</div>
         </div>
         """, unsafe_allow_html=True)
     
     with col3:
-        st.markdown("""
+        st.markdown(f"""
         <div class='stat-card'>
-            <div class='stat-value'>-12%</div>
+            <div class='stat-value'>{summary['evolution']:+d}%</div>
             <div class='stat-label'>Evolution compared to the previous month</div>
         </div>
         """, unsafe_allow_html=True)
     
     with col4:
-        st.markdown("""
+        st.markdown(f"""
         <div class='stat-card'>
-            <div class='stat-value'>28%</div>
+            <div class='stat-value'>{summary['weather_share']}%</div>
             <div class='stat-label'>Accidents related to weather conditions</div>
         </div>
         """, unsafe_allow_html=True)
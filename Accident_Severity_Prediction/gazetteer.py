@@ -0,0 +1,145 @@
+"""Offline gazetteer of Tunisian places with prefix and trigram indexes.
+
+Built from the GeoNames extract shipped with reverse_geocoder (filtered to Tunisia),
+an optional imported CSV (name,lat,lon[,admin1]) and the geocodes already stored by
+persistent_cache, so Nominatim is only needed for places it has never seen.
+"""
+import bisect
+import csv
+import importlib.util
+import os
+import threading
+import unicodedata
+from collections import defaultdict
+
+from persistent_cache import get_store
+from settings import GAZETTEER_EXTRA_PATH
+
+COUNTRY_SUFFIXES = ("tunisia", "tunisie")
+ARTICLES = ("al ", "el ")
+
+def normalize_place(name):
+    # Lowercase, no accents or punctuation, without a trailing country name
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode().lower()
+    text = "".join(c if c.isalnum() else " " for c in text)
+    words = text.split()
+    while words and words[-1] in COUNTRY_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def geonames_places():
+    # rg_cities1000.csv ships inside the reverse_geocoder package; locate it without importing it
+    spec = importlib.util.find_spec("reverse_geocoder")
+    if spec is None or not spec.submodule_search_locations:
+        return
+    path = os.path.join(list(spec.submodule_search_locations)[0], "rg_cities1000.csv")
+    with open(path, encoding="utf-8", newline="") as f:
+        # Only parse the Tunisian rows (cc is the last column) out of the worldwide file
+        lines = [line for line in f if line.rstrip().endswith(",TN")]
+    for lat, lon, name, admin1, _, _ in csv.reader(lines):
+        yield name, float(lat), float(lon), admin1
+
+def imported_places(path=GAZETTEER_EXTRA_PATH):
+    if not path or not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            yield row["name"], float(row["lat"]), float(row["lon"]), row.get("admin1", "")
+
+class Gazetteer:
+    """In-memory place index: exact and prefix lookups by bisection, fuzzy matches by trigrams."""
+
+    def __init__(self):
+        self.places = []           # (display name, lat, lon, admin1)
+        self.keys = []             # sorted (normalized name, place id)
+        self.by_name = {}          # normalized name -> place id
+        self.aliases = []          # normalized names of each place
+        self.by_trigram = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def add(self, name, lat, lon, admin1=""):
+        key = normalize_place(name)
+        if not key:
+            return
+        with self._lock:
+            if key in self.by_name:
+                return
+            place_id = len(self.places)
+            self.places.append((name, lat, lon, admin1))
+            # "Al Hammamat" is also reachable as "hammamat"
+            aliases = [key] + [key[len(a):] for a in ARTICLES if key.startswith(a)]
+            self.aliases.append(aliases)
+            for alias in aliases:
+                if alias in self.by_name:
+                    continue
+                self.by_name[alias] = place_id
+                bisect.insort(self.keys, (alias, place_id))
+                for gram in trigrams(alias):
+                    self.by_trigram[gram].add(place_id)
+
+    def lookup(self, query):
+        # Exact match on the normalized name, as (name, lat, lon, admin1), or None
+        place_id = self.by_name.get(normalize_place(query))
+        return self.places[place_id] if place_id is not None else None
+
+    def prefix(self, query, limit=10):
+        key = normalize_place(query)
+        if not key:
+            return []
+        start = bisect.bisect_left(self.keys, (key, -1))
+        matches, seen = [], set()
+        for alias, place_id in self.keys[start:]:
+            if not alias.startswith(key) or len(matches) >= limit:
+                break
+            if place_id not in seen:
+                seen.add(place_id)
+                matches.append(self.places[place_id])
+        return matches
+
+    def search(self, query, limit=10, min_similarity=0.4):
+        """Autocomplete suggestions: prefix matches first, then the closest names by trigram similarity."""
+        matches = self.prefix(query, limit)
+        if len(matches) >= limit:
+            return matches
+        key = normalize_place(query)
+        query_grams = trigrams(key)
+        shared = set()
+        for gram in query_grams:
+            shared.update(self.by_trigram.get(gram, ()))
+        scored = []
+        for place_id in shared:
+            similarity = max(len(query_grams & trigrams(alias)) / len(query_grams | trigrams(alias))
+                             for alias in self.aliases[place_id])
+            if similarity >= min_similarity:
+                scored.append((similarity, place_id))
+        for _, place_id in sorted(scored, reverse=True):
+            place = self.places[place_id]
+            if place not in matches:
+                matches.append(place)
+            if len(matches) >= limit:
+                break
+        return matches
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+def get_gazetteer():
+    """Process-wide gazetteer, built on first use."""
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            gazetteer = Gazetteer()
+            for place in geonames_places():
+                gazetteer.add(*place)
+            for place in imported_places():
+                gazetteer.add(*place)
+            store = get_store()
+            if store is not None:
+                for query, lat, lon in store.iter_geocodes():
+                    gazetteer.add(query, lat, lon)
+            _gazetteer = gazetteer
+        return _gazetteer
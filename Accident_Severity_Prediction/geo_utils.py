@@ -0,0 +1,138 @@
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    # Great-circle distance in meters, element-wise over numpy arrays
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+def cumulative_distances(coords):
+    # Distance in meters from the first vertex to every vertex of an (n, 2) lat/lon polyline
+    coords = np.asarray(coords, dtype=np.float64)
+    steps = haversine_m(coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1])
+    return np.concatenate(([0.0], np.cumsum(steps)))
+
+def resample_polyline(coords, spacing_m=500.0):
+    """Resample a lat/lon polyline into equal-length pieces of about spacing_m meters.
+
+    Returns the midpoint of every piece as an (m, 2) array and the length of one
+    piece in meters, so that a quantity sampled at the midpoints integrates along
+    the route as values.sum() * piece_length.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    distances = cumulative_distances(coords)
+    total = distances[-1]
+    if total <= 0:
+        return coords[:1].copy(), 0.0
+    pieces = max(1, int(np.ceil(total / spacing_m)))
+    piece_length = total / pieces
+    targets = (np.arange(pieces) + 0.5) * piece_length
+    samples = np.column_stack((
+        np.interp(targets, distances, coords[:, 0]),
+        np.interp(targets, distances, coords[:, 1]),
+    ))
+    return samples, piece_length
+
+def meters_per_pixel(zoom, lat):
+    # Ground resolution of a Web Mercator tile pixel at this zoom level and latitude
+    return 156543.03392 * np.cos(np.radians(lat)) / 2 ** zoom
+
+def _local_meters(coords):
+    # Equirectangular projection around the mean latitude, accurate enough within a country
+    lat0 = np.radians(coords[:, 0].mean())
+    return np.column_stack((coords[:, 0] * EARTH_RADIUS_M * np.pi / 180,
+                            coords[:, 1] * EARTH_RADIUS_M * np.pi / 180 * np.cos(lat0)))
+
+def douglas_peucker_significance(coords, min_tolerance_m=0.0):
+    """Douglas-Peucker significance of every vertex of an (n, 2) lat/lon polyline, in meters.
+
+    Keeping the vertices whose significance exceeds t gives the Douglas-Peucker
+    simplification at tolerance t, so one pass serves every tolerance and point budget.
+    Endpoints are infinite; vertices below min_tolerance_m are not refined further (0).
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    significance = np.zeros(len(coords))
+    if len(coords) == 0:
+        return significance
+    significance[[0, -1]] = np.inf
+    points = _local_meters(coords)
+    stack = [(0, len(coords) - 1, np.inf)]
+    while stack:
+        first, last, parent = stack.pop()
+        if last - first < 2:
+            continue
+        segment = points[last] - points[first]
+        offsets = points[first + 1:last] - points[first]
+        length2 = segment @ segment
+        if length2 > 0:
+            t = np.clip(offsets @ segment / length2, 0.0, 1.0)
+            offsets = offsets - t[:, None] * segment
+        distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        i = int(np.argmax(distances))
+        if distances[i] <= min_tolerance_m:
+            continue
+        # A vertex never outranks the one that split its parent segment
+        value = min(distances[i], parent)
+        split = first + 1 + i
+        significance[split] = value
+        stack.append((first, split, value))
+        stack.append((split, last, value))
+    return significance
+
+def simplify_polylines(polylines, tolerance_m, max_points=None):
+    """Douglas-Peucker simplification of several polylines under one shared point budget.
+
+    Vertices less significant than tolerance_m are dropped; if more than max_points remain
+    over all polylines, the tolerance is raised until they fit (endpoints are always kept).
+    """
+    polylines = [np.asarray(coords, dtype=np.float64).reshape(-1, 2) for coords in polylines]
+    significances = [douglas_peucker_significance(coords, tolerance_m) for coords in polylines]
+    threshold = tolerance_m
+    if max_points is not None and significances:
+        ranked = np.sort(np.concatenate(significances))[::-1]
+        if len(ranked) > max_points and ranked[max_points] >= threshold:
+            threshold = ranked[max_points]
+    return [coords[sig > threshold] for coords, sig in zip(polylines, significances)]
+
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash(lat, lon, precision=5):
+    # Geohash of a point: each character holds 5 bits of alternating longitude/latitude halvings
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = value = 0
+    even = True
+    while len(chars) < precision:
+        bounds, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        mid = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if coordinate >= mid:
+            value |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_BASE32[value])
+            bits = value = 0
+    return "".join(chars)
+
+def geohash_bounds(cell):
+    # (lat_min, lon_min, lat_max, lon_max) of a geohash cell
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in cell:
+        value = GEOHASH_BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bounds = lon_range if even else lat_range
+            mid = (bounds[0] + bounds[1]) / 2
+            bounds[0 if (value >> shift) & 1 else 1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+def geohash_center(cell):
+    lat_min, lon_min, lat_max, lon_max = geohash_bounds(cell)
+    return (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
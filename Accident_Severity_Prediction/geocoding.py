@@ -0,0 +1,57 @@
+import re
+import threading
+
+from caching import TTLCache
+from gazetteer import get_gazetteer
+from persistent_cache import get_store, normalize_query
+
+geocode_cache = TTLCache("geocode", maxsize=1024)
+
+_geolocator = None
+_geolocator_lock = threading.Lock()
+
+def get_geolocator():
+    global _geolocator
+    with _geolocator_lock:
+        if _geolocator is None:
+            # geopy is only imported once a place has to be looked up online
+            from geopy.geocoders import Nominatim
+            _geolocator = Nominatim(user_agent="tunisia_road_safety_app_gtts_v1")
+        return _geolocator
+
+def geocode(query):
+    """(lat, lon, address) for a place name, or None if it cannot be found.
+
+    Looks in the in-memory cache, the offline gazetteer and the persistent store, and only
+    then asks Nominatim; its answers are written back to the store and the gazetteer.
+    """
+    key = normalize_query(query)
+    result = geocode_cache.get(key)
+    if result is not None:
+        return result
+
+    gazetteer = get_gazetteer()
+    place = gazetteer.lookup(query)
+    if place is not None:
+        name, lat, lon, admin1 = place
+        result = (lat, lon, ", ".join(filter(None, [name, admin1, "Tunisia"])))
+        geocode_cache.set(key, result)
+        return result
+
+    store = get_store()
+    result = store.get_geocode(key) if store is not None else None
+    if result is None:
+        location = get_geolocator().geocode(query)
+        if location is None:
+            return None
+        result = (location.latitude, location.longitude, location.address)
+        if store is not None:
+            store.put_geocode(key, *result)
+        gazetteer.add(re.sub(r",\s*(tunisia|tunisie)\s*$", "", query, flags=re.IGNORECASE), result[0], result[1])
+    result = tuple(result)
+    geocode_cache.set(key, result)
+    return result
+
+def suggest_places(prefix, limit=8):
+    # Autocomplete entries for a partially typed destination, from the offline gazetteer only
+    return [name for name, _, _, _ in get_gazetteer().search(prefix, limit)]
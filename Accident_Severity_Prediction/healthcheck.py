@@ -0,0 +1,44 @@
+"""Container health check: the Streamlit server answers and the models are warmed up.
+
+Exits 0 when healthy, 1 otherwise, as expected by Docker's HEALTHCHECK.
+
+    python Accident_Severity_Prediction/healthcheck.py [--port 8501]
+"""
+import argparse
+import json
+import sys
+import urllib.request
+
+from settings import READINESS_PATH
+
+def server_ok(port, timeout):
+    try:
+        with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=timeout) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+def readiness(path=READINESS_PATH):
+    # State written by warmup.py once the warm-up has finished, or None before that
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8501)
+    parser.add_argument("--timeout", type=float, default=3.0)
+    args = parser.parse_args()
+    if not server_ok(args.port, args.timeout):
+        sys.exit("Streamlit server is not answering")
+    state = readiness()
+    if state is None:
+        sys.exit(f"Models are not warmed up yet ({READINESS_PATH} missing)")
+    if not state.get("ready", False):
+        errors = "; ".join(f"{name}: {error}" for name, error in state.get("errors", {}).items())
+        sys.exit(f"Model warm-up failed: {errors or 'unknown error'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Accident heat map cells aggregated on the server.
+
+Instead of one heat point per accident, the points inside the map's bounding box are
+binned into cells of about HEAT_CELL_PIXELS screen pixels at the map's zoom, and only
+the weighted centroid of each non-empty cell is sent to the browser. Cells are aligned
+on a global grid, so aggregates are cached per (bbox, zoom, filter) and reused while the
+store does not change.
+
+    python Accident_Severity_Prediction/heat_grid.py bench [--points 10000000]
+"""
+import argparse
+import time
+import numpy as np
+
+from caching import TTLCache
+from geo_utils import meters_per_pixel
+from settings import HEAT_CELL_PIXELS, HEAT_GRID_CACHE_SIZE
+
+METERS_PER_DEGREE = 111_320.0
+
+# Aggregates of recent viewports: (k, 3) float32 rows of centroid lat, lon and weight
+heat_cells_cache = TTLCache("heat_cells", maxsize=HEAT_GRID_CACHE_SIZE,
+                            sizeof=lambda key, cells: cells.nbytes + 200)
+
+def cell_size(zoom, lat, pixels=HEAT_CELL_PIXELS):
+    # (lat, lon) size in degrees of a square cell of `pixels` screen pixels at this zoom and latitude
+    meters = meters_per_pixel(zoom, lat) * pixels
+    return meters / METERS_PER_DEGREE, meters / (METERS_PER_DEGREE * np.cos(np.radians(lat)))
+
+def viewport_bbox(lat, lon, zoom, width, height, margin=0.5):
+    """(lat_min, lon_min, lat_max, lon_max) of a width x height map centred on (lat, lon), plus
+    margin times its size on every side so that short pans stay covered."""
+    meters = meters_per_pixel(zoom, lat)
+    half_lat = height * (0.5 + margin) * meters / METERS_PER_DEGREE
+    half_lon = width * (0.5 + margin) * meters / (METERS_PER_DEGREE * np.cos(np.radians(lat)))
+    return lat - half_lat, lon - half_lon, lat + half_lat, lon + half_lon
+
+def aggregate(lats, lons, bbox, cell, mask=None):
+    """Bin the points inside bbox into cells of cell=(dlat, dlon) degrees, aligned on multiples of cell.
+
+    Returns an (k, 3) float32 array with the centroid latitude and longitude of the points of
+    every non-empty cell and their count.
+    """
+    dlat, dlon = cell
+    i0, j0 = int(np.floor(bbox[0] / dlat)), int(np.floor(bbox[1] / dlon))
+    i1, j1 = int(np.floor(bbox[2] / dlat)), int(np.floor(bbox[3] / dlon))
+    rows, cols = i1 - i0 + 1, j1 - j0 + 1
+    inside = (lats >= i0 * dlat) & (lats < (i1 + 1) * dlat) & (lons >= j0 * dlon) & (lons < (j1 + 1) * dlon)
+    if mask is not None:
+        inside &= mask
+    lat_in = np.asarray(lats[inside], dtype=np.float64)
+    lon_in = np.asarray(lons[inside], dtype=np.float64)
+    # Clipped: float rounding may put a point on the boundary one cell outside
+    i = np.clip(np.floor(lat_in / dlat).astype(np.int64) - i0, 0, rows - 1)
+    j = np.clip(np.floor(lon_in / dlon).astype(np.int64) - j0, 0, cols - 1)
+    flat = i * cols + j
+    counts = np.bincount(flat, minlength=rows * cols)
+    occupied = np.flatnonzero(counts)
+    weights = counts[occupied].astype(np.float64)
+    cells = np.empty((len(occupied), 3), dtype=np.float32)
+    cells[:, 0] = np.bincount(flat, weights=lat_in, minlength=rows * cols)[occupied] / weights
+    cells[:, 1] = np.bincount(flat, weights=lon_in, minlength=rows * cols)[occupied] / weights
+    cells[:, 2] = weights
+    return cells
+
+def _weather_mask(store, weather_filter):
+    # Rows of the store matching the filter: None (every accident) or "adverse" weather
+    if weather_filter is None:
+        return None
+    if weather_filter != "adverse":
+        raise ValueError(f"Unknown weather filter: {weather_filter}")
+    from accident_store import is_adverse_weather
+
+    adverse = np.array([is_adverse_weather(label) for label in store.labels("Weather_Conditions")], dtype=bool)
+    return adverse[store.column("Weather_Conditions")] if len(adverse) else None
+
+def heat_cells(store, lat, lon, zoom, width, height, weather_filter=None):
+    """Heat map cells of the store's accidents around (lat, lon) for a width x height map at zoom."""
+    cell = cell_size(zoom, lat)
+    bbox = viewport_bbox(lat, lon, zoom, width, height)
+    # Cells are aligned on the global grid: the key only changes when the box covers other cells
+    key = (store.path, store.rows, zoom, weather_filter,
+           tuple(int(np.floor(value / size)) for value, size in zip(bbox, cell * 2)))
+    cells = heat_cells_cache.get(key)
+    if cells is None:
+        cells = aggregate(store.column("Latitude"), store.column("Longitude"), bbox, cell,
+                          _weather_mask(store, weather_filter))
+        heat_cells_cache.set(key, cells)
+    return cells
+
+def heat_data(cells, decimals=5):
+    # [lat, lon, weight] rows for folium's HeatMap, weights scaled to (0, 1] by the busiest cell
+    if len(cells) == 0:
+        return []
+    data = np.column_stack((np.round(cells[:, :2].astype(np.float64), decimals),
+                            np.round(cells[:, 2].astype(np.float64) / cells[:, 2].max(), 3)))
+    return data.tolist()
+
+def _render(points, center, zoom):
+    import folium
+    import folium.plugins
+
+    m = folium.Map(location=center, zoom_start=zoom, tiles="CartoDB dark_matter")
+    folium.plugins.HeatMap(points, radius=15, gradient={0.4: 'blue', 0.65: 'lime', 1: 'red'}).add_to(m)
+    return m.get_root().render()
+
+def bench(points=10_000_000, width=1000, height=500, raw_limit=200_000):
+    from map_bench import browser_load_ms
+
+    rng = np.random.default_rng(0)
+    # Accidents clustered around the main cities, plus a uniform background over the country
+    centers = np.array([(36.81, 10.18), (35.83, 10.64), (34.74, 10.76), (37.27, 9.87), (33.88, 10.10)])
+    which = rng.integers(0, len(centers), points)
+    lats = (centers[which, 0] + rng.normal(0, 0.08, points)).astype(np.float32)
+    lons = (centers[which, 1] + rng.normal(0, 0.08, points)).astype(np.float32)
+    background = rng.random(points) < 0.2
+    lats[background] = rng.uniform(33.0, 37.3, background.sum())
+    lons[background] = rng.uniform(8.0, 11.5, background.sum())
+    center = (36.81, 10.18)
+    print(f"{points:,} points, {width}x{height} map centred on Tunis")
+    print(f"{'zoom':>4} {'points in box':>14} {'cells':>7} {'aggregate ms':>13} {'HTML KB':>8} "
+          f"{'render ms':>10} {'browser ms':>11}")
+    for zoom in (7, 9, 11, 13):
+        bbox = viewport_bbox(*center, zoom, width, height)
+        started = time.perf_counter()
+        cells = aggregate(lats, lons, bbox, cell_size(zoom, center[0]))
+        aggregate_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        html = _render(heat_data(cells), center, zoom)
+        render_ms = (time.perf_counter() - started) * 1000
+        in_box = int(cells[:, 2].sum())
+        load_ms = browser_load_ms(html)
+        load_text = f"{load_ms:>11.0f}" if load_ms is not None else f"{'-':>11}"
+        print(f"{zoom:>4} {in_box:>14,} {len(cells):>7,} {aggregate_ms:>13.1f} {len(html) / 1024:>8.0f} "
+              f"{render_ms:>10.0f} {load_text}")
+    # Raw points for comparison (capped: the full set does not fit in a page)
+    raw = np.column_stack((lats[:raw_limit], lons[:raw_limit], np.ones(raw_limit))).tolist()
+    started = time.perf_counter()
+    html = _render(raw, center, 11)
+    render_ms = (time.perf_counter() - started) * 1000
+    print(f"raw points ({raw_limit:,} of {points:,}): {len(html) / 1024:,.0f} KB HTML, render {render_ms:.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench_parser = sub.add_parser("bench", help="aggregation time, payload size and render time per zoom")
+    bench_parser.add_argument("--points", type=int, default=10_000_000)
+    args = parser.parse_args()
+    bench(args.points)
+
+if __name__ == "__main__":
+    main()
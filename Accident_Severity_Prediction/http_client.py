@@ -0,0 +1,83 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from caching import TTLCache
+from persistent_cache import get_store
+from settings import (HTTP_POOL_SIZE, HTTP_RETRIES, HTTP_TIMEOUT, OSRM_BASE_URL,
+                      OSRM_CACHE_PRECISION, OSRM_CACHE_SIZE, OSRM_CACHE_TTL)
+
+_session = None
+_session_lock = threading.Lock()
+
+osrm_cache = TTLCache("osrm", maxsize=OSRM_CACHE_SIZE, ttl=OSRM_CACHE_TTL)
+
+def get_session():
+    """Process-wide requests session: keep-alive connection pool, gzip and bounded retries."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=HTTP_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET"]),
+                respect_retry_after_header=True,
+            )
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({
+                "Accept-Encoding": "gzip, deflate",
+                "User-Agent": "tunisia_road_safety_app",
+            })
+            _session = session
+        return _session
+
+def get_json(url, params=None, timeout=HTTP_TIMEOUT):
+    """JSON body of a GET; 4xx answers with a JSON body are returned too, other errors raise.
+
+    Services like OSRM explain client errors in the body ({"code": "NoRoute", "message": ...}),
+    which callers show instead of a bare "400 Client Error".
+    """
+    response = get_session().get(url, params=params, timeout=timeout)
+    if 400 <= response.status_code < 500:
+        try:
+            return response.json()
+        except ValueError:
+            pass
+    response.raise_for_status()
+    return response.json()
+
+def osrm_route(start_coords, end_coords, alternatives=True):
+    """OSRM driving route between two (lat, lon) points, cached on rounded coordinates.
+
+    Answers come from the in-memory cache, then the persistent store, then OSRM.
+    Only successful responses (code "Ok") are cached; the coordinates sent to OSRM
+    are the rounded ones, so every query sharing a key gets the same answer.
+    """
+    start = tuple(round(float(c), OSRM_CACHE_PRECISION) for c in start_coords)
+    end = tuple(round(float(c), OSRM_CACHE_PRECISION) for c in end_coords)
+    key = (start, end, bool(alternatives))
+    data = osrm_cache.get(key)
+    if data is not None:
+        return data
+
+    # Persistent store next, so that warm restarts skip the network
+    store = get_store()
+    store_key = f"{start[0]},{start[1]};{end[0]},{end[1]};{int(bool(alternatives))}"
+    data = store.get_route(store_key) if store is not None else None
+    if data is not None:
+        osrm_cache.set(key, data)
+        return data
+
+    alt_param = "true" if alternatives else "false"
+    url = f"{OSRM_BASE_URL}/route/v1/driving/{start[1]},{start[0]};{end[1]},{end[0]}"
+    data = get_json(url, params={"alternatives": alt_param, "overview": "full", "steps": "true"})
+    if data.get("code") == "Ok":
+        osrm_cache.set(key, data)
+        if store is not None:
+            store.put_route(store_key, data)
+    return data
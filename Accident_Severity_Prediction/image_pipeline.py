@@ -0,0 +1,148 @@
+"""Decode uploaded photos straight into the weather CNN input batch.
+
+JPEGs are decoded at a reduced scale by the decoder itself (draft mode: 1/2, 1/4 or
+1/8 of the full resolution), other formats are shrunk with Image.reduce before the
+final resize, and pixels are written directly into a preallocated float32 batch.
+Several uploads are decoded in parallel (Pillow releases the GIL while decoding).
+
+    python Accident_Severity_Prediction/image_pipeline.py bench [--samples path/to/images]
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+from model_runtime import WEATHER_INPUT_SHAPE
+from settings import IMAGE_DECODE_WORKERS
+
+# Decode at no less than twice the model input size, so the final resize still has pixels to average
+DRAFT_FACTOR = 2
+
+_executor = None
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=IMAGE_DECODE_WORKERS, thread_name_prefix="image-decode")
+    return _executor
+
+def decode_into(source, out):
+    """Decode one image file (path or file object) into out, a (height, width, 3) float32 view."""
+    height, width = out.shape[:2]
+    with Image.open(source) as image:
+        # Only JPEG supports draft; it picks the smallest DCT scale still at least this large
+        image.draft("RGB", (width * DRAFT_FACTOR, height * DRAFT_FACTOR))
+        image = image.convert("RGB").resize((width, height), reducing_gap=DRAFT_FACTOR)
+        out[...] = np.asarray(image)
+
+def load_image_batch(uploaded_images, shape=WEATHER_INPUT_SHAPE):
+    """(batch, valid, errors): uploads as one (N, height, width, 3) float32 batch scaled to [0, 1].
+
+    Rows of images that could not be decoded are zero, with valid False and the error
+    message at the same index of errors (None for decoded images).
+    """
+    batch = np.zeros((len(uploaded_images), *shape), dtype=np.float32)
+    errors = [None] * len(uploaded_images)
+
+    def decode(i):
+        try:
+            decode_into(uploaded_images[i], batch[i])
+        except Exception as e:
+            errors[i] = str(e)
+
+    if len(uploaded_images) > 1:
+        list(get_executor().map(decode, range(len(uploaded_images))))
+    elif uploaded_images:
+        decode(0)
+    batch *= np.float32(1 / 255)
+    return batch, np.array([e is None for e in errors], dtype=bool), errors
+
+def load_image_batch_full(uploaded_images, shape=WEATHER_INPUT_SHAPE):
+    # Previous pipeline (full-resolution decode, then resize and a float copy), kept for the benchmark
+    batch = np.zeros((len(uploaded_images), *shape), dtype=np.float32)
+    for i, source in enumerate(uploaded_images):
+        image = Image.open(source).convert("RGB").resize((shape[1], shape[0]))
+        batch[i] = np.asarray(image, dtype=np.float32)
+    batch /= 255.0
+    return batch
+
+def synthetic_photo(width=4000, height=3000, seed=0):
+    # Smooth gradients plus noise: compresses like a phone photo rather than a flat image
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([x / width * 255, y / height * 255, (x + y) / (width + height) * 255], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+# Runs one pipeline in a fresh interpreter so that peak RSS is not shared between the two
+# (peak RSS from /proc: ru_maxrss would inherit the parent's peak across fork/exec on Linux)
+_BENCH_PROBE = """
+import io, json, resource, sys, time, tracemalloc
+import image_pipeline
+def peak_rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+    except (OSError, StopIteration):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+files = [open(path, "rb").read() for path in sys.argv[2:]]
+rss_before = peak_rss_kb()
+tracemalloc.start()
+started = time.perf_counter()
+if sys.argv[1] == "full":
+    batch = image_pipeline.load_image_batch_full([io.BytesIO(f) for f in files])
+else:
+    batch = image_pipeline.load_image_batch([io.BytesIO(f) for f in files])[0]
+elapsed = time.perf_counter() - started
+traced_peak = tracemalloc.get_traced_memory()[1]
+print(json.dumps({
+    "ms_per_image": elapsed * 1000 / len(files),
+    "peak_rss_mb": (peak_rss_kb() - rss_before) / 1024,
+    "traced_peak_mb": traced_peak / 2 ** 20,
+    "checksum": float(batch.mean()),
+}))
+"""
+
+def bench(samples_dir=None, count=8):
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])))
+    with tempfile.TemporaryDirectory() as tmp:
+        if samples_dir:
+            paths = sorted(os.path.join(samples_dir, name) for name in os.listdir(samples_dir))[:count]
+        else:
+            paths = []
+            for i in range(count):
+                paths.append(os.path.join(tmp, f"photo_{i}.jpg"))
+                with open(paths[-1], "wb") as f:
+                    f.write(synthetic_photo(seed=i))
+            print(f"{count} synthetic 12 MP JPEGs")
+        print(f"{'pipeline':<10} {'ms/image':>9} {'peak RSS +MB':>13} {'traced peak MB':>15} {'mean pixel':>11}")
+        for pipeline in ("full", "draft"):
+            proc = subprocess.run([sys.executable, "-c", _BENCH_PROBE, pipeline, *paths],
+                                  capture_output=True, text=True, env=env)
+            if proc.returncode != 0:
+                print(f"{pipeline:<10} failed: {proc.stderr.strip().splitlines()[-1]}")
+                continue
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"{pipeline:<10} {r['ms_per_image']:>9.1f} {r['peak_rss_mb']:>13.1f} "
+                  f"{r['traced_peak_mb']:>15.1f} {r['checksum']:>11.4f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench_parser = sub.add_parser("bench", help="latency and peak memory per upload, full decode vs draft")
+    bench_parser.add_argument("--samples", help="directory of photos (default: synthetic 12 MP JPEGs)")
+    bench_parser.add_argument("--count", type=int, default=8)
+    args = parser.parse_args()
+    bench(args.samples, args.count)
+
+if __name__ == "__main__":
+    main()
@@ -305,6 +305,10 @@ def main():
     
     # Importer et afficher la page appropriée
     if page == "dashboard":
+        # Préchauffage des modèles en arrière-plan, une seule fois par processus (déjà lancé par serve.py
+        # en Docker) : seule l'application de navigation utilise les modèles
+        from warmup import start_warmup
+        start_warmup()
         try:
             # Try to import the original app
             try:
@@ -0,0 +1,144 @@
+"""HTML size and render time of route maps, full geometry vs simplified.
+
+Routes come from OSRM (through the route cache) or, with --synthetic or when OSRM
+cannot be reached, from generated polylines with OSRM's vertex density. Browser load
+time is measured too when playwright and its Chromium are installed. With --position,
+the dashboard's slider-to-map time is measured instead.
+
+    python Accident_Severity_Prediction/map_bench.py [--synthetic] [--position]
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+
+# Typical inter-city trips
+TRIPS = {
+    "Tunis - Bizerte": ((36.8065, 10.1815), (37.2744, 9.8739)),
+    "Tunis - Sousse": ((36.8065, 10.1815), (35.8256, 10.6360)),
+    "Tunis - Sfax": ((36.8065, 10.1815), (34.7406, 10.7603)),
+}
+
+def synthetic_routes(start, end, alternatives=3, spacing_m=15.0, seed=0):
+    # Winding polylines between start and end with one vertex every ~spacing_m meters
+    from geo_utils import haversine_m
+    from route_codec import Route
+
+    rng = np.random.default_rng(seed)
+    length = haversine_m(start[0], start[1], end[0], end[1]) * 1.3
+    n = int(length / spacing_m)
+    t = np.linspace(0, 1, n)
+    routes = []
+    for k in range(alternatives):
+        bend = 0.04 * (k + 1) * np.sin(np.pi * t)
+        lat = start[0] + (end[0] - start[0]) * t + bend + 0.01 * np.sin(t * 60 + k)
+        lon = start[1] + (end[1] - start[1]) * t - bend + 0.01 * np.cos(t * 45 + k)
+        lat += np.cumsum(rng.normal(0, 1e-5, n))
+        lon += np.cumsum(rng.normal(0, 1e-5, n))
+        routes.append(Route.from_latlon(np.column_stack((lat, lon)), length / 1000, length / 1000,
+                                        ["#1E90FF", "#32CD32", "#FFA500"][k % 3], 5))
+    return routes
+
+def osrm_routes(start, end):
+    import tunisia_road_safety_app as app
+    return app.get_routes(start, end)
+
+def browser_load_ms(html):
+    # Time to the load event in headless Chromium, or None without playwright
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        return None
+    with tempfile.NamedTemporaryFile("w", suffix=".html", delete=False, encoding="utf-8") as f:
+        f.write(html)
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch()
+            page = browser.new_page()
+            page.goto(f"file://{f.name}", wait_until="load")
+            ms = page.evaluate("performance.timing.loadEventEnd - performance.timing.navigationStart")
+            browser.close()
+        return ms
+    except Exception:
+        return None
+    finally:
+        os.remove(f.name)
+
+def bench(synthetic=False):
+    import tunisia_road_safety_app as app
+
+    print(f"{'trip':<16} {'geometry':<11} {'vertices':>9} {'HTML (KB)':>10} {'build (ms)':>11} {'browser (ms)':>13}")
+    for trip, (start, end) in TRIPS.items():
+        routes = None
+        if not synthetic:
+            try:
+                routes = osrm_routes(start, end)
+            except Exception:
+                routes = None
+        routes = routes or synthetic_routes(start, end)
+        for label, detail_zoom in (("full", None), ("simplified", app.ROUTE_DETAIL_ZOOM)):
+            started = time.perf_counter()
+            m = app.create_map(start, end, start, routes, ("Rainy", 90.0), "High", detail_zoom=detail_zoom)
+            html = m.get_root().render()
+            build_ms = (time.perf_counter() - started) * 1000
+            shown = html.count("], [") + len(routes)  # vertices of the route lines written into the page
+            load_ms = browser_load_ms(html)
+            load_text = f"{load_ms:>13.0f}" if load_ms is not None else f"{'-':>13}"
+            print(f"{trip:<16} {label:<11} {shown:>9} {len(html) / 1024:>10.0f} "
+                  f"{build_ms:>11.0f} {load_text}")
+
+def position_bench(moves=40, step=0.013):
+    # Dashboard runs after a latitude slider move, under a throwaway script-run context
+    import logging
+    import threading
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import ScriptRunContext, add_script_run_ctx
+    from streamlit.runtime.state import SafeSessionState, SessionState
+    from streamlit.runtime.uploaded_file_manager import UploadedFileManager
+
+    logging.disable(logging.WARNING)
+    ctx = ScriptRunContext(session_id="position_bench", _enqueue=lambda msg: None, query_string="",
+                           session_state=SafeSessionState(SessionState()), uploaded_file_mgr=UploadedFileManager(),
+                           page_script_hash="", user_info={"email": None})
+    add_script_run_ctx(threading.current_thread(), ctx)
+    import dashboard
+    import map_cache
+
+    dashboard.dashboard()  # imports, first-use loading and the map templates are not part of a move
+    print(f"{moves} latitude moves of {step}° from Tunis (the heat map area changes every 0.1°)")
+    print(f"{'':<34} {'slider → map p50':>17} {'p95':>8} {'page run p50':>13}")
+    for label, rebuild in (("rebuild maps and charts (before)", True), ("map templates (after)", False)):
+        st.session_state.latitude, st.session_state.longitude = 36.8065, 10.1815
+        runs = []
+        for i in range(moves):
+            ctx.reset()
+            st.session_state.latitude_slider = round(36.8065 + step * (i + 1), 6)
+            st.session_state.longitude_slider = 10.1815
+            if rebuild:
+                # Previously every move built both maps for the new position and the charts again
+                map_cache.map_html_cache.clear()
+                dashboard.chart_cache.clear()
+            started = time.perf_counter()
+            dashboard.on_position_change()
+            dashboard.dashboard()
+            runs.append(time.perf_counter() - started)
+        with map_cache._update_lock:
+            latencies = sorted(list(map_cache._update_times)[-moves:])
+        runs.sort()
+        # The previous slider handler also ran the page up to the sliders once more (experimental_rerun)
+        print(f"{label:<34} {latencies[moves // 2] * 1000:>14.1f} ms {latencies[int(moves * 0.95)] * 1000:>5.1f} ms "
+              f"{runs[moves // 2] * 1000:>10.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--synthetic", action="store_true", help="skip OSRM and use generated routes")
+    parser.add_argument("--position", action="store_true", help="dashboard slider-to-map time instead")
+    args = parser.parse_args()
+    if args.position:
+        position_bench()
+    else:
+        bench(args.synthetic)
+
+if __name__ == "__main__":
+    main()
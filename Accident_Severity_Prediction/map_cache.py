@@ -0,0 +1,85 @@
+import hashlib
+import threading
+import time
+from collections import deque
+import numpy as np
+import streamlit.components.v1 as components
+
+from caching import TTLCache
+from component_registry import registry
+from settings import MAP_HTML_CACHE_MAX_BYTES, MAP_HTML_CACHE_SIZE
+
+# Rendered folium maps, keyed by a digest of everything they are built from: a rerun that
+# changes nothing on the map reuses the HTML instead of rebuilding and re-serializing it
+map_html_cache = TTLCache("map_html", maxsize=MAP_HTML_CACHE_SIZE, maxbytes=MAP_HTML_CACHE_MAX_BYTES,
+                          sizeof=lambda key, html: len(key) + len(html))
+
+# Coordinates a map template is rendered at, replaced by the real position in its HTML
+# (outside Tunisia and with more digits than any coordinate the maps write)
+TEMPLATE_LAT, TEMPLATE_LON = 12.3456789012345, 98.7654321098765
+
+# Seconds from a position change to the updated map, process-wide
+_update_times = deque(maxlen=1000)
+_update_lock = threading.Lock()
+
+def _update(digest, part):
+    if isinstance(part, np.ndarray):
+        digest.update(str((part.dtype, part.shape)).encode())
+        digest.update(np.ascontiguousarray(part).tobytes())
+    elif isinstance(part, (list, tuple)):
+        digest.update(b"(")
+        for item in part:
+            _update(digest, item)
+        digest.update(b")")
+    elif isinstance(part, dict):
+        _update(digest, sorted(part.items()))
+    else:
+        digest.update(repr(part).encode())
+        digest.update(b"\0")
+
+def map_key(*parts):
+    """Digest of the inputs of a map (numbers, strings, sequences, dicts or numpy arrays)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        _update(digest, part)
+    return digest.hexdigest()
+
+def render_map(key, build):
+    # HTML of the map build() returns, built only when key is not cached
+    html = map_html_cache.get(key)
+    if html is None:
+        folium = registry.get("folium")
+        html = folium.Figure().add_child(build()).render()
+        map_html_cache.set(key, html)
+    return html
+
+def render_template(key, build, lat, lon):
+    """HTML of build(lat, lon) for a map whose HTML only depends on (lat, lon) through its position.
+
+    The map is rendered once per key at (TEMPLATE_LAT, TEMPLATE_LON) and cached like any map;
+    moving it is then a string substitution instead of a folium build and render.
+    """
+    html = render_map(key, lambda: build(TEMPLATE_LAT, TEMPLATE_LON))
+    return html.replace(repr(TEMPLATE_LAT), repr(float(lat))).replace(repr(TEMPLATE_LON), repr(float(lon)))
+
+def show_html(html, width=700, height=500):
+    # Same output as streamlit_folium.folium_static
+    components.html(html, width=width, height=height + 10)
+
+def show_map(key, build, width=700, height=500):
+    """Display a cached map; same output as streamlit_folium.folium_static."""
+    show_html(render_map(key, build), width, height)
+
+def record_map_update(started):
+    # Time since started (time.perf_counter()) at which a position change reached the map
+    with _update_lock:
+        _update_times.append(time.perf_counter() - started)
+
+def map_update_stats():
+    with _update_lock:
+        times = sorted(_update_times)
+    return {
+        "updates": len(times),
+        "ms_p50": times[len(times) // 2] * 1000 if times else 0.0,
+        "ms_p95": times[int(len(times) * 0.95)] * 1000 if times else 0.0,
+    }
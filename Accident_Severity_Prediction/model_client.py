@@ -0,0 +1,117 @@
+import threading
+import time
+from multiprocessing.connection import Client
+import numpy as np
+
+from component_registry import registry
+from settings import (MODEL_SERVER_ADDRESS, MODEL_SERVER_AUTHKEY, MODEL_SERVER_RETRY_INTERVAL,
+                      MODEL_SERVER_TIMEOUT, WEATHER_MAX_BATCH_SIZE)
+
+def parse_address(address):
+    # "unix:/path/to/socket" or "host:port" -> (address, family) for multiprocessing.connection
+    if address.startswith("unix:"):
+        return address[len("unix:"):], "AF_UNIX"
+    host, _, port = address.rpartition(":")
+    return (host or "localhost", int(port)), "AF_INET"
+
+# In-process inference, used by the model server itself and as the fallback of the client
+
+def local_classify_weather(batch):
+    model = registry.get("weather_model")
+    batch = np.asarray(batch, dtype=np.float32)
+    chunks = [model.predict(batch[start:start + WEATHER_MAX_BATCH_SIZE])
+              for start in range(0, len(batch), WEATHER_MAX_BATCH_SIZE)]
+    return np.concatenate(chunks).astype(np.float32)
+
+def local_predict_severity(features):
+    model = registry.get("severity_model")
+    input_name = model.get_inputs()[0].name
+    # First output holds the predicted class of each row
+    return np.asarray(model.run(None, {input_name: np.asarray(features, dtype=np.float32)})[0], dtype=np.int64)
+
+LOCAL_HANDLERS = {"weather": local_classify_weather, "severity": local_predict_severity}
+
+class RemoteError(RuntimeError):
+    """The model server answered with an error (e.g. a model it could not load)."""
+
+class ModelClient:
+    """Sends inference requests to model_server.py, falling back to in-process models.
+
+    Connections are pooled, one request at a time each, so that concurrent sessions
+    reach the server together and get micro-batched. When the server cannot be
+    reached, requests run locally and the server is retried after retry_interval seconds.
+    """
+
+    def __init__(self, address=MODEL_SERVER_ADDRESS, authkey=MODEL_SERVER_AUTHKEY,
+                 timeout=MODEL_SERVER_TIMEOUT, retry_interval=MODEL_SERVER_RETRY_INTERVAL):
+        self.address = address
+        self.authkey = authkey.encode()
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._idle = []
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+        self.stats = {"remote": 0, "local": 0, "failures": 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.address)
+
+    def remote_available(self):
+        return self.enabled and time.monotonic() >= self._down_until
+
+    def _connect(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        address, family = parse_address(self.address)
+        return Client(address, family=family, authkey=self.authkey)
+
+    def request(self, op, inputs=None):
+        conn = self._connect()
+        try:
+            conn.send((op, inputs))
+            if not conn.poll(self.timeout):
+                raise TimeoutError(f"model server did not answer {op} within {self.timeout} s")
+            status, result = conn.recv()
+        except BaseException:
+            conn.close()
+            raise
+        with self._lock:
+            self._idle.append(conn)
+        if status != "ok":
+            raise RemoteError(result)
+        return result
+
+    def _count(self, name):
+        # Sessions run in several threads
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def run(self, op, inputs):
+        if self.remote_available():
+            try:
+                result = self.request(op, inputs)
+                self._count("remote")
+                return result
+            except (OSError, EOFError, TimeoutError, RemoteError):
+                # Server down, restarting or unable to run the model: serve locally for a while
+                # before trying again
+                self._count("failures")
+                self._down_until = time.monotonic() + self.retry_interval
+        self._count("local")
+        return LOCAL_HANDLERS[op](inputs)
+
+_client = ModelClient()
+
+def get_client():
+    return _client
+
+def classify_weather(batch):
+    """Weather class probabilities, (n, 5), for a float32 batch of (n, 128, 128, 3) images."""
+    return _client.run("weather", np.ascontiguousarray(batch, dtype=np.float32))
+
+def predict_severity(features):
+    """Severity class of every row of an (n, 8) feature matrix."""
+    return _client.run("severity", np.ascontiguousarray(features, dtype=np.float32))
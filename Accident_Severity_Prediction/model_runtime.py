@@ -0,0 +1,205 @@
+import functools
+import hashlib
+import importlib.util
+import os
+import platform
+from datetime import datetime
+import numpy as np
+from settings import (MODEL_DIR, WEATHER_MODEL_BACKEND, WEATHER_MODEL_PRECISION,
+                      ORT_INTRA_OP_THREADS, ORT_INTER_OP_THREADS, ORT_EXECUTION_MODE, ORT_GRAPH_OPTIMIZATION,
+                      ORT_ENABLE_MEM_ARENA, ORT_ENABLE_MEM_PATTERN, ORT_SAVE_OPTIMIZED, ORT_OPTIMIZED_DIR)
+
+WEATHER_KERAS_PATH = os.path.join(MODEL_DIR, "weather_cnn_model.h5")
+WEATHER_ONNX_PATH = os.path.join(MODEL_DIR, "weather_cnn_model.onnx")
+SEVERITY_ONNX_PATH = os.path.join(MODEL_DIR, "accident_severity_model.onnx")
+
+PRECISIONS = ("fp32", "int8")
+
+# Shape of one weather CNN input image (height, width, channels), scaled to [0, 1]
+WEATHER_INPUT_SHAPE = (128, 128, 3)
+
+# Input columns of the severity model, in the order it was trained on
+SEVERITY_FEATURES = [
+    "Day_of_Week", "Date", "Latitude", "Longitude", "Number_of_Casualties",
+    "Number_of_Vehicles", "Road_Surface_Conditions", "Weather_Conditions"
+]
+# Fixed values for the features that are not observed at prediction time
+SEVERITY_DEFAULTS = {"Number_of_Casualties": 3, "Number_of_Vehicles": 100, "Road_Surface_Conditions": 2}
+
+def variant_path(path, precision):
+    # fp32 is the original file, other precisions sit next to it: model.int8.onnx
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown model precision: {precision}")
+    if precision == "fp32":
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{precision}{ext}"
+
+EXECUTION_MODES = ("sequential", "parallel")
+GRAPH_OPTIMIZATION_LEVELS = ("disable", "basic", "extended", "all")
+
+def session_config(**overrides):
+    # Session settings from the environment, with per-call overrides (e.g. intra_op_threads=1)
+    config = {
+        "intra_op_threads": ORT_INTRA_OP_THREADS,
+        "inter_op_threads": ORT_INTER_OP_THREADS,
+        "execution_mode": ORT_EXECUTION_MODE,
+        "graph_optimization": ORT_GRAPH_OPTIMIZATION,
+        "enable_mem_arena": ORT_ENABLE_MEM_ARENA,
+        "enable_mem_pattern": ORT_ENABLE_MEM_PATTERN,
+        "save_optimized": ORT_SAVE_OPTIMIZED,
+    }
+    unknown = set(overrides) - set(config)
+    if unknown:
+        raise TypeError(f"Unknown session settings: {', '.join(sorted(unknown))}")
+    config.update(overrides)
+    if config["execution_mode"] not in EXECUTION_MODES:
+        raise ValueError(f"Unknown execution mode: {config['execution_mode']}")
+    if config["graph_optimization"] not in GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(f"Unknown graph optimization level: {config['graph_optimization']}")
+    return config
+
+@functools.lru_cache(maxsize=None)
+def cpu_fingerprint():
+    # Machine type, CPU model and instruction-set flags of the first processor listed
+    parts = [platform.machine(), platform.processor()]
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    break
+                if line.split(":", 1)[0].strip() in ("vendor_id", "model name", "flags", "Features", "CPU part"):
+                    parts.append(line.strip())
+    except OSError:
+        pass
+    return "\n".join(parts)
+
+def optimized_path(path, level, directory=ORT_OPTIMIZED_DIR):
+    """Where the graph of path optimized at level is saved: model.opt-all.<key>.onnx in directory.
+
+    The key hashes the model's absolute path, the onnxruntime version and cpu_fingerprint(), so a
+    graph optimized by another release or on other hardware (e.g. a shared cache volume) is never loaded.
+    """
+    import onnxruntime as ort
+
+    root, ext = os.path.splitext(os.path.basename(path))
+    key = hashlib.sha256("\n".join((os.path.abspath(path), ort.__version__, cpu_fingerprint())).encode())
+    return os.path.join(directory, f"{root}.opt-{level}.{key.hexdigest()[:16]}{ext}")
+
+def create_onnx_session(path, **overrides):
+    """onnxruntime session for path, configured by the ORT_* settings (see session_config).
+
+    With save_optimized, the first session writes its optimized graph to ORT_OPTIMIZED_DIR
+    and later ones load that file with optimizations off, skipping the rewrite. The saved
+    graph is rebuilt whenever the model file is newer. Graphs optimized at the "extended"
+    or "all" level may use CPU-specific kernels, so the file name is keyed on the
+    onnxruntime version and the CPU (see optimized_path).
+    """
+    import onnxruntime as ort
+
+    config = session_config(**overrides)
+    levels = {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = config["intra_op_threads"]
+    options.inter_op_num_threads = config["inter_op_threads"]
+    options.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if config["execution_mode"] == "parallel"
+                              else ort.ExecutionMode.ORT_SEQUENTIAL)
+    options.enable_cpu_mem_arena = config["enable_mem_arena"]
+    options.enable_mem_pattern = config["enable_mem_pattern"]
+    providers = ["CPUExecutionProvider"]
+
+    level = config["graph_optimization"]
+    if config["save_optimized"] and level != "disable":
+        cached = optimized_path(path, level)
+        if os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(path):
+            options.graph_optimization_level = levels["disable"]
+            try:
+                return ort.InferenceSession(cached, options, providers=providers)
+            except Exception:
+                pass  # unreadable file: optimize the original again below
+        options.graph_optimization_level = levels[level]
+        # Written under a temporary name, so that other workers never load a partial file
+        tmp_path = f"{cached}.{os.getpid()}.tmp"
+        options.optimized_model_filepath = tmp_path
+        try:
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            session = ort.InferenceSession(path, options, providers=providers)
+            os.replace(tmp_path, cached)
+            return session
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            options.optimized_model_filepath = ""  # e.g. read-only cache directory
+
+    options.graph_optimization_level = levels[level]
+    return ort.InferenceSession(path, options, providers=providers)
+
+class OnnxWeatherModel:
+    """Weather CNN exported to ONNX, exposing the same predict() call as the Keras model."""
+
+    def __init__(self, path):
+        self.session = create_onnx_session(path)
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+def resolve_weather_backend(backend=WEATHER_MODEL_BACKEND, precision=WEATHER_MODEL_PRECISION):
+    if precision != "fp32":
+        return "onnx"
+    if backend == "auto":
+        return "onnx" if os.path.exists(WEATHER_ONNX_PATH) else "keras"
+    return backend
+
+def weather_backend_error(backend=WEATHER_MODEL_BACKEND, precision=WEATHER_MODEL_PRECISION):
+    """Why the weather model cannot be loaded in this environment, or None if it can."""
+    backend = resolve_weather_backend(backend, precision)
+    if backend == "onnx":
+        path = variant_path(WEATHER_ONNX_PATH, precision)
+        if not os.path.exists(path):
+            return f"Weather model {path} is missing (build it with convert_weather_model.py / quantize_models.py)"
+        return None
+    if backend == "keras":
+        if not os.path.exists(WEATHER_KERAS_PATH):
+            return f"Neither {WEATHER_ONNX_PATH} nor {WEATHER_KERAS_PATH} exists"
+        if importlib.util.find_spec("tensorflow") is None:
+            return (f"{WEATHER_ONNX_PATH} is missing and TensorFlow is not installed for the Keras fallback: "
+                    f"export the model with convert_weather_model.py convert")
+        return None
+    return f"Unknown weather model backend: {backend}"
+
+def load_weather_model(backend=WEATHER_MODEL_BACKEND, precision=WEATHER_MODEL_PRECISION):
+    error = weather_backend_error(backend, precision)
+    if error:
+        raise RuntimeError(error)
+    backend = resolve_weather_backend(backend, precision)
+    if backend == "onnx":
+        return OnnxWeatherModel(variant_path(WEATHER_ONNX_PATH, precision))
+    if backend == "keras":
+        # TensorFlow is only imported when the Keras backend is explicitly needed
+        from tensorflow.keras.models import load_model
+        return load_model(WEATHER_KERAS_PATH)
+    raise ValueError(f"Unknown weather model backend: {backend}")
+
+def load_severity_model():
+    # Always fp32: the tree ensemble has no weights that int8 quantization would shrink or speed up
+    return create_onnx_session(SEVERITY_ONNX_PATH)
+
+def build_severity_features(weather_classes, coords, when=None):
+    # Assemble the model input directly in numpy, one row per (weather_class, coordinate) pair
+    when = when or datetime.now()
+    coords = np.asarray(coords, dtype=np.float32).reshape(-1, 2)
+    features = np.empty((len(coords), len(SEVERITY_FEATURES)), dtype=np.float32)
+    features[:, 0] = when.weekday()
+    features[:, 1] = when.toordinal()
+    features[:, 2:4] = coords
+    for column, value in SEVERITY_DEFAULTS.items():
+        features[:, SEVERITY_FEATURES.index(column)] = value
+    features[:, 7] = weather_classes
+    return features
@@ -0,0 +1,257 @@
+"""Shared model server: one copy of each model for every Streamlit session and replica.
+
+Clients (model_client.py) send weather and severity requests over a Unix socket or
+localhost TCP. Requests that arrive within a short window are concatenated and run
+as one batch, then split back per client.
+
+    python Accident_Severity_Prediction/model_server.py serve --bind unix:/tmp/road_safety_models.sock
+    python Accident_Severity_Prediction/model_server.py ping
+    python Accident_Severity_Prediction/model_server.py bench --clients 8
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import AuthenticationError, Listener
+import numpy as np
+
+from model_client import LOCAL_HANDLERS, ModelClient, parse_address
+from settings import (DEFAULT_MODEL_SERVER_AUTHKEY, MODEL_SERVER_ADDRESS, MODEL_SERVER_AUTHKEY,
+                      MODEL_SERVER_BATCH_WINDOW_MS, MODEL_SERVER_MAX_ROWS, MODEL_SERVER_WORKERS,
+                      WEATHER_MAX_BATCH_SIZE)
+
+class MicroBatcher:
+    """Runs fn over the concatenation of the requests submitted within window seconds.
+
+    A batch closes when the window after its first request expires or max_rows is
+    reached; a single larger request still runs on its own. If a batch fails, its
+    requests are retried one by one, so only the faulty one gets the error. workers
+    threads drain the queue, so several batches can be in flight (onnxruntime releases the GIL).
+    """
+
+    def __init__(self, name, fn, max_rows, window, workers=1):
+        self.name = name
+        self.fn = fn
+        self.max_rows = max_rows
+        self.window = window
+        self._queue = queue.Queue()
+        self.stats = {"requests": 0, "batches": 0, "rows": 0, "split_batches": 0}
+        self._stats_lock = threading.Lock()
+        for i in range(workers):
+            threading.Thread(target=self._loop, name=f"{name}-batcher-{i}", daemon=True).start()
+
+    def submit(self, inputs):
+        future = Future()
+        self._queue.put((np.asarray(inputs), future))
+        return future
+
+    def _collect(self):
+        items = [self._queue.get()]
+        rows = len(items[0][0])
+        deadline = time.monotonic() + self.window
+        while rows < self.max_rows:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            items.append(item)
+            rows += len(item[0])
+        return items, rows
+
+    def _run(self, items):
+        outputs = self.fn(np.concatenate([inputs for inputs, _ in items]))
+        bounds = np.cumsum([len(inputs) for inputs, _ in items])[:-1]
+        for (_, future), output in zip(items, np.split(outputs, bounds)):
+            future.set_result(output)
+
+    def _loop(self):
+        while True:
+            items, rows = self._collect()
+            try:
+                self._run(items)
+            except Exception as e:
+                if len(items) == 1:
+                    items[0][1].set_exception(e)
+                else:
+                    # One malformed request (shape, dtype) must not fail the others: run each on its own
+                    for item in items:
+                        try:
+                            self._run([item])
+                        except Exception as item_error:
+                            item[1].set_exception(item_error)
+                    with self._stats_lock:
+                        self.stats["split_batches"] += 1
+            with self._stats_lock:
+                self.stats["requests"] += len(items)
+                self.stats["batches"] += 1
+                self.stats["rows"] += rows
+
+class ModelServer:
+    def __init__(self, address, authkey=MODEL_SERVER_AUTHKEY, window_ms=MODEL_SERVER_BATCH_WINDOW_MS,
+                 max_rows=MODEL_SERVER_MAX_ROWS, workers=MODEL_SERVER_WORKERS):
+        if parse_address(address)[1] != "AF_UNIX" and authkey in ("", DEFAULT_MODEL_SERVER_AUTHKEY):
+            # Requests are unpickled: with a known key, anyone reaching the port could run code here
+            raise ValueError(f"Refusing to serve on {address} with the built-in key: set MODEL_SERVER_AUTHKEY "
+                             f"to a secret shared with the clients, or bind a unix: socket")
+        self.address = address
+        self.authkey = authkey.encode()
+        window = window_ms / 1000
+        self.batchers = {
+            "weather": MicroBatcher("weather", LOCAL_HANDLERS["weather"], min(max_rows, WEATHER_MAX_BATCH_SIZE),
+                                    window, workers),
+            "severity": MicroBatcher("severity", LOCAL_HANDLERS["severity"], max_rows, window, workers),
+        }
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "batchers": {name: dict(b.stats) for name, b in self.batchers.items()},
+        }
+
+    def handle(self, conn):
+        # One thread per connection; a client sends one request at a time on it
+        with conn:
+            while True:
+                try:
+                    op, inputs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if op == "ping":
+                        reply = ("ok", "pong")
+                    elif op == "stats":
+                        reply = ("ok", self.stats())
+                    else:
+                        reply = ("ok", self.batchers[op].submit(inputs).result())
+                except Exception as e:
+                    reply = ("error", f"{type(e).__name__}: {e}")
+                try:
+                    conn.send(reply)
+                except OSError:
+                    return
+
+    def serve_forever(self):
+        address, family = parse_address(self.address)
+        if family == "AF_UNIX" and os.path.exists(address):
+            os.remove(address)  # left behind by a previous run
+        # Owner-only socket file: the built-in key is accepted there
+        umask = os.umask(0o177) if family == "AF_UNIX" else None
+        try:
+            listener = Listener(address, family=family, authkey=self.authkey)
+        finally:
+            if umask is not None:
+                os.umask(umask)
+        with listener:
+            print(f"Model server listening on {self.address}", flush=True)
+            while True:
+                try:
+                    conn = listener.accept()
+                except (OSError, AuthenticationError):
+                    continue
+                threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+def serve(address):
+    # Models are loaded and warmed before listening: clients fall back to local models until then
+    from model_runtime import weather_backend_error
+    from warmup import run_warmup
+
+    try:
+        server = ModelServer(address)
+    except ValueError as e:
+        sys.exit(str(e))
+    error = weather_backend_error()
+    if error:
+        sys.exit(error)
+    timings = run_warmup(local=True)
+    print(f"Warm-up timings (ms): {timings}", flush=True)
+    server.serve_forever()
+
+def ping(address):
+    try:
+        ModelClient(address).request("ping")
+    except Exception as e:
+        sys.exit(f"Model server at {address} is not answering: {e}")
+    print(f"Model server at {address} is up")
+
+def _bench_worker(args):
+    # One simulated Streamlit worker: a stream of route-sized severity requests
+    address, requests, rows = args
+    features = np.random.default_rng(os.getpid()).random((rows, 8), dtype=np.float32) * 40
+    client = ModelClient(address) if address else None
+    started = time.perf_counter()
+    for _ in range(requests):
+        if client:
+            client.request("severity", features)
+        else:
+            LOCAL_HANDLERS["severity"](features)
+    return time.perf_counter() - started, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _run_clients(address, clients, requests, rows):
+    ctx = multiprocessing.get_context("spawn")
+    started = time.perf_counter()
+    with ctx.Pool(clients) as pool:
+        results = pool.map(_bench_worker, [(address, requests, rows)] * clients)
+    elapsed = time.perf_counter() - started
+    return clients * requests / elapsed, sum(rss for _, rss in results)
+
+def bench(clients, requests, rows):
+    print(f"{clients} clients x {requests} severity requests of {rows} rows")
+    throughput, rss = _run_clients("", clients, requests, rows)
+    print(f"{'in-process':<12} {throughput:>9.0f} req/s   client RSS total {rss:>7.0f} MB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        address = f"unix:{os.path.join(tmp, 'models.sock')}"
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve", "--bind", address],
+                                  stdout=subprocess.DEVNULL)
+        try:
+            client = ModelClient(address)
+            for _ in range(300):
+                try:
+                    client.request("ping")
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            throughput, rss = _run_clients(address, clients, requests, rows)
+            stats = client.request("stats")
+        finally:
+            server.terminate()
+            server.wait()
+    severity = stats["batchers"]["severity"]
+    mean_rows = severity["rows"] / max(1, severity["batches"])
+    print(f"{'server':<12} {throughput:>9.0f} req/s   client RSS total {rss:>7.0f} MB, "
+          f"server {stats['max_rss_mb']:.0f} MB, {severity['batches']} batches of {mean_rows:.0f} rows on average")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    default_address = MODEL_SERVER_ADDRESS or "unix:" + os.path.join(tempfile.gettempdir(), "road_safety_models.sock")
+    serve_parser = sub.add_parser("serve", help="load the models and serve them")
+    serve_parser.add_argument("--bind", default=default_address, help=f"listen address (default {default_address})")
+    ping_parser = sub.add_parser("ping", help="exit 0 if the server answers (container health check)")
+    ping_parser.add_argument("--address", default=default_address)
+    bench_parser = sub.add_parser("bench", help="throughput and memory, in-process models vs the server")
+    bench_parser.add_argument("--clients", type=int, default=os.cpu_count() or 1)
+    bench_parser.add_argument("--requests", type=int, default=200)
+    bench_parser.add_argument("--rows", type=int, default=200, help="rows per request (route samples)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.bind)
+    elif args.command == "ping":
+        ping(args.address)
+    else:
+        bench(args.clients, args.requests, args.rows)
+
+if __name__ == "__main__":
+    main()
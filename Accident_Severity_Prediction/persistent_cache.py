@@ -0,0 +1,128 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+
+# Geometry is stored with route_codec's packed format: int32 deltas of coordinates scaled by
+# COORD_SCALE (the precision of OSRM polylines), zlib-compressed
+from route_codec import decode_polyline, encode_polyline, pack_coords, unpack_coords
+from settings import CACHE_DB_PATH, CACHE_MAX_BYTES
+
+def normalize_query(query):
+    return " ".join(str(query).lower().split())
+
+class PersistentStore:
+    """SQLite store for geocode results and OSRM route payloads that survives restarts.
+
+    Entries are evicted least-recently-used first once their total size exceeds max_bytes.
+    One connection is shared by the threads of the process; SQLite's own locking
+    covers several replicas using the same file.
+    """
+
+    def __init__(self, path=CACHE_DB_PATH, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocode (
+                query TEXT PRIMARY KEY, lat REAL, lon REAL, address TEXT,
+                size INTEGER NOT NULL, last_used REAL NOT NULL)""")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS routes (
+                key TEXT PRIMARY KEY, meta TEXT NOT NULL, geometry BLOB NOT NULL, lengths BLOB NOT NULL,
+                size INTEGER NOT NULL, last_used REAL NOT NULL)""")
+
+    def get_geocode(self, query):
+        query = normalize_query(query)
+        with self._lock:
+            row = self._conn.execute("SELECT lat, lon, address FROM geocode WHERE query = ?", (query,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE geocode SET last_used = ? WHERE query = ?", (time.time(), query))
+        return row
+
+    def put_geocode(self, query, lat, lon, address=""):
+        query = normalize_query(query)
+        size = len(query) + len(address or "") + 16
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?, ?)",
+                               (query, lat, lon, address, size, time.time()))
+            self._evict()
+
+    def iter_geocodes(self):
+        # Every stored (query, lat, lon), e.g. to seed the offline gazetteer
+        with self._lock:
+            rows = self._conn.execute("SELECT query, lat, lon FROM geocode").fetchall()
+        return rows
+
+    def get_route(self, key):
+        """OSRM payload for key, with every route geometry re-encoded as a polyline string."""
+        with self._lock:
+            row = self._conn.execute("SELECT meta, geometry, lengths FROM routes WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE routes SET last_used = ? WHERE key = ?", (time.time(), key))
+        meta, geometry, lengths = row
+        payload = json.loads(meta)
+        coords = unpack_coords(geometry)
+        bounds = np.cumsum(np.frombuffer(lengths, dtype=np.int32))
+        for route, route_coords in zip(payload["routes"], np.split(coords, bounds[:-1])):
+            route["geometry"] = encode_polyline(route_coords, scaled=True)
+        return payload
+
+    def put_route(self, key, payload):
+        # Route geometries go into one delta-encoded int32 blob; step geometries are not used by the app
+        payload = json.loads(json.dumps(payload))
+        route_coords = []
+        for route in payload.get("routes", []):
+            route_coords.append(decode_polyline(route.pop("geometry"), scaled=True))
+            for leg in route.get("legs", []):
+                for step in leg.get("steps", []):
+                    step.pop("geometry", None)
+        meta = json.dumps(payload, separators=(",", ":"))
+        geometry = pack_coords(np.concatenate(route_coords) if route_coords else np.empty((0, 2), dtype=np.int32))
+        lengths = np.array([len(c) for c in route_coords], dtype=np.int32).tobytes()
+        size = len(meta) + len(geometry) + len(lengths) + len(key)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO routes VALUES (?, ?, ?, ?, ?, ?)",
+                               (key, meta, geometry, lengths, size, time.time()))
+            self._evict()
+
+    def total_bytes(self):
+        return sum(self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+                   for table in ("geocode", "routes"))
+
+    def _evict(self):
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        rows = self._conn.execute("""
+            SELECT 'geocode', query, size, last_used FROM geocode
+            UNION ALL SELECT 'routes', key, size, last_used FROM routes
+            ORDER BY last_used""").fetchall()
+        for table, key, size, _ in rows:
+            column = "query" if table == "geocode" else "key"
+            self._conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (key,))
+            excess -= size
+            if excess <= 0:
+                break
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    # Opened on first use; None if the cache directory is not writable
+    global _store
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = PersistentStore()
+            except (OSError, sqlite3.Error):
+                return None
+        return _store
@@ -0,0 +1,122 @@
+"""Build the INT8 variant of the weather CNN and compare it with fp32.
+
+Run from the project root after convert_weather_model.py has produced the ONNX weather model:
+
+    python Accident_Severity_Prediction/quantize_models.py build --calibration path/to/images
+    python Accident_Severity_Prediction/quantize_models.py report
+
+With a calibration directory the weather CNN is quantized statically (activations
+calibrated on those images); without one it falls back to dynamic quantization.
+The served variant is then chosen with WEATHER_MODEL_PRECISION.
+
+The severity model is not quantized: it is a tree ensemble, and dynamic quantization
+only rewrites MatMul/Gemm-style nodes, so an "int8" copy would be the fp32 model.
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+import numpy as np
+import onnxruntime as ort
+
+from model_runtime import WEATHER_ONNX_PATH, create_onnx_session, variant_path
+from convert_weather_model import load_samples
+
+def severity_samples(count=2048, seed=0):
+    # Feature rows in the model's column order, spread over the Tunisian bounding box
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    features = np.empty((count, 8), dtype=np.float32)
+    features[:, 0] = rng.integers(0, 7, count)            # Day_of_Week
+    features[:, 1] = now.toordinal()                      # Date
+    features[:, 2] = rng.uniform(30, 38, count)           # Latitude
+    features[:, 3] = rng.uniform(7, 12, count)            # Longitude
+    features[:, 4] = 3                                    # Number_of_Casualties
+    features[:, 5] = 100                                  # Number_of_Vehicles
+    features[:, 6] = 2                                    # Road_Surface_Conditions
+    features[:, 7] = rng.integers(0, 5, count)            # Weather_Conditions
+    return features
+
+class ImageCalibrationReader:
+    """Feeds calibration images to onnxruntime's static quantizer one at a time."""
+
+    def __init__(self, input_name, batch):
+        self.input_name = input_name
+        self.batch = batch
+        self.index = 0
+
+    def get_next(self):
+        if self.index >= len(self.batch):
+            return None
+        item = {self.input_name: self.batch[self.index:self.index + 1]}
+        self.index += 1
+        return item
+
+    def rewind(self):
+        self.index = 0
+
+def quantize_weather(calibration_dir=None):
+    from onnxruntime.quantization import QuantType, quantize_dynamic, quantize_static
+
+    output_path = variant_path(WEATHER_ONNX_PATH, "int8")
+    if calibration_dir:
+        input_name = ort.InferenceSession(WEATHER_ONNX_PATH).get_inputs()[0].name
+        reader = ImageCalibrationReader(input_name, load_samples(calibration_dir))
+        quantize_static(WEATHER_ONNX_PATH, output_path, reader,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    else:
+        quantize_dynamic(WEATHER_ONNX_PATH, output_path, weight_type=QuantType.QInt8)
+    print(f"Wrote {output_path}")
+
+def measure(path, inputs, batch_size, label_fn, repeats=50):
+    session = create_onnx_session(path)
+    input_name = session.get_inputs()[0].name
+    labels = label_fn(session.run(None, {input_name: inputs}))
+    chunk = inputs[:batch_size]
+    session.run(None, {input_name: chunk})  # first call pays kernel initialization
+    latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        session.run(None, {input_name: chunk})
+        latencies.append((time.perf_counter() - started) * 1000)
+    return labels, np.percentile(latencies, 50), np.percentile(latencies, 99), os.path.getsize(path)
+
+def report(calibration_dir=None, batch_sizes=(1, 16)):
+    models = [
+        ("weather", WEATHER_ONNX_PATH, load_samples(calibration_dir), lambda out: np.argmax(out[0], axis=1)),
+    ]
+    print(f"{'model':<9} {'variant':<8} {'batch':>5} {'top-1 agree':>12} {'p50 (ms)':>9} {'p99 (ms)':>9} {'size (MB)':>10}")
+    for name, fp32_path, inputs, label_fn in models:
+        int8_path = variant_path(fp32_path, "int8")
+        if not os.path.exists(fp32_path) or not os.path.exists(int8_path):
+            print(f"{name:<9} skipped: missing {fp32_path if not os.path.exists(fp32_path) else int8_path}")
+            continue
+        for batch_size in batch_sizes:
+            reference = None
+            for variant, path in (("fp32", fp32_path), ("int8", int8_path)):
+                labels, p50, p99, size = measure(path, inputs, batch_size, label_fn)
+                if reference is None:
+                    reference = labels
+                agreement = float(np.mean(labels == reference)) * 100
+                print(f"{name:<9} {variant:<8} {batch_size:>5} {agreement:>11.1f}% {p50:>9.2f} {p99:>9.2f} {size / 1e6:>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="write *.int8.onnx next to the fp32 models")
+    build_parser.add_argument("--calibration", help="directory of images for static weather quantization")
+    report_parser = sub.add_parser("report", help="top-1 agreement, latency and size, fp32 vs int8")
+    report_parser.add_argument("--samples", help="directory of images used to compare weather predictions")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if os.path.exists(WEATHER_ONNX_PATH):
+            quantize_weather(args.calibration)
+        else:
+            print(f"Skipping weather model: {WEATHER_ONNX_PATH} not found (run convert_weather_model.py first)")
+        print("Severity model left in fp32: tree ensembles have nothing for int8 quantization to rewrite")
+    else:
+        report(args.samples)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Reverse geocoding over a prebuilt, Tunisia-clipped place index.
+
+reverse_geocoder loads the worldwide GeoNames extract into a KD-tree on first use.
+This index keeps only the places inside the app's bounding box (all countries, so
+border areas resolve as they do with reverse_geocoder) in one structured .npy
+file that is memory-mapped at startup.
+
+    python Accident_Severity_Prediction/reverse_index.py build
+    python Accident_Severity_Prediction/reverse_index.py bench
+"""
+import argparse
+import csv
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import threading
+import numpy as np
+
+from settings import REVERSE_INDEX_PATH
+
+LAT_RANGE = (30.0, 38.0)
+LON_RANGE = (7.0, 12.0)
+# Places slightly outside the box are kept so points near its edge still find their true nearest place
+MARGIN_DEG = 0.5
+
+PLACE_DTYPE = np.dtype([("lat", "f8"), ("lon", "f8"), ("name", "U48"), ("admin1", "U48"), ("cc", "U2")])
+
+def source_places():
+    spec = importlib.util.find_spec("reverse_geocoder")
+    if spec is None or not spec.submodule_search_locations:
+        raise FileNotFoundError("reverse_geocoder is not installed")
+    path = os.path.join(list(spec.submodule_search_locations)[0], "rg_cities1000.csv")
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for lat, lon, name, admin1, _, cc in reader:
+            lat, lon = float(lat), float(lon)
+            if (LAT_RANGE[0] - MARGIN_DEG <= lat <= LAT_RANGE[1] + MARGIN_DEG
+                    and LON_RANGE[0] - MARGIN_DEG <= lon <= LON_RANGE[1] + MARGIN_DEG):
+                yield lat, lon, name, admin1, cc.strip()
+
+def build_index(path=REVERSE_INDEX_PATH):
+    places = np.array(list(source_places()), dtype=PLACE_DTYPE)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, places)
+    return places
+
+def to_unit_sphere(lat, lon):
+    # Chord distance on the unit sphere ranks neighbours like great-circle distance (as reverse_geocoder does)
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+class ReverseIndex:
+    """Nearest named place for one or many (lat, lon) points."""
+
+    def __init__(self, places):
+        self.places = places
+        self._points = to_unit_sphere(places["lat"], places["lon"])
+
+    def nearest(self, coords, chunk_size=1024):
+        # Index of the nearest place for every row of an (n, 2) lat/lon array
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        query = to_unit_sphere(coords[:, 0], coords[:, 1])
+        result = np.empty(len(query), dtype=np.intp)
+        for start in range(0, len(query), chunk_size):
+            block = query[start:start + chunk_size]
+            d2 = ((block[:, None, :] - self._points[None, :, :]) ** 2).sum(axis=2)
+            result[start:start + len(block)] = np.argmin(d2, axis=1)
+        return result
+
+    def search(self, coords):
+        """Same records as reverse_geocoder.search: a list of dicts with name, admin1, cc, lat, lon."""
+        places = self.places[self.nearest(coords)]
+        return [{"name": str(p["name"]), "admin1": str(p["admin1"]), "cc": str(p["cc"]),
+                 "lat": str(p["lat"]), "lon": str(p["lon"])} for p in places]
+
+    def names(self, coords):
+        # Place name only, as a numpy array, e.g. to label every sample along a route
+        return self.places["name"][self.nearest(coords)]
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_reverse_index(path=REVERSE_INDEX_PATH):
+    """Memory-map the prebuilt index, building it first if the file is missing."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            try:
+                places = np.load(path, mmap_mode="r")
+            except (OSError, ValueError):
+                try:
+                    places = build_index(path)
+                except OSError:
+                    places = np.array(list(source_places()), dtype=PLACE_DTYPE)
+            _index = ReverseIndex(places)
+        return _index
+
+# Executed in a fresh interpreter so that cold-start time and memory are measured from scratch
+_BENCH_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+point = (36.8065, 10.1815)
+if sys.argv[1] == "reverse_geocoder":
+    import reverse_geocoder as rg
+    name = rg.search(point)[0]["name"]
+else:
+    from reverse_index import get_reverse_index
+    name = get_reverse_index().search(point)[0]["name"]
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "name": name,
+}))
+"""
+
+def bench():
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])))
+    print(f"{'backend':<17} {'cold start (s)':>15} {'max RSS (MB)':>13}  result")
+    for backend in ("reverse_geocoder", "reverse_index"):
+        proc = subprocess.run([sys.executable, "-c", _BENCH_PROBE, backend], capture_output=True, text=True, env=env)
+        if proc.returncode != 0:
+            print(f"{backend:<17} failed: {proc.stderr.strip().splitlines()[-1]}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"{backend:<17} {r['seconds']:>15.2f} {r['max_rss_mb']:>13.0f}  {r['name']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="write the clipped index next to the models")
+    sub.add_parser("bench", help="cold-start time and RSS against reverse_geocoder")
+    args = parser.parse_args()
+    if args.command == "build":
+        places = build_index()
+        print(f"Wrote {REVERSE_INDEX_PATH}: {len(places)} places")
+    else:
+        bench()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Compact routes: a numpy polyline codec and the Route record kept in session state.
+
+OSRM geometries are Google encoded polylines (precision 5). They are decoded in a few
+vectorized passes straight into an (n, 2) array, and a Route keeps its vertices as int32
+coordinates scaled by 1e5 (8 bytes per vertex) instead of a list of float tuples.
+
+    python Accident_Severity_Prediction/route_codec.py bench [--km 300]
+"""
+import argparse
+import sys
+import time
+import zlib
+import numpy as np
+
+# OSRM polylines carry 5 decimals (about 1 m)
+PRECISION = 5
+COORD_SCALE = 10 ** PRECISION
+
+# Maneuver types and modifiers of OSRM steps, stored as indices in the steps table
+MANEUVER_TYPES = ("depart", "arrive", "turn", "new name", "continue", "merge", "on ramp", "off ramp", "fork",
+                  "end of road", "use lane", "roundabout", "rotary", "roundabout turn", "exit roundabout",
+                  "exit rotary", "notification", "other")
+MANEUVER_MODIFIERS = ("", "uturn", "sharp right", "right", "slight right", "straight", "slight left", "left",
+                      "sharp left")
+STEP_DTYPE = np.dtype([
+    ("lat", np.int32), ("lon", np.int32),  # maneuver location, scaled like the geometry
+    ("distance", np.float32),  # meters
+    ("duration", np.float32),  # seconds
+    ("type", np.uint8), ("modifier", np.uint8),
+    ("name", np.uint16),  # index in Route.names
+])
+
+def decode_polyline(encoded, precision=PRECISION, scaled=False):
+    """(n, 2) lat/lon array of an encoded polyline: float64 degrees, or int32 scaled by 10**precision."""
+    chars = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    if chars.size == 0:
+        return np.empty((0, 2), dtype=np.int32 if scaled else np.float64)
+    if chars.min() < 0 or chars[-1] >= 0x20:
+        raise ValueError("malformed encoded polyline")
+    # Every value is a run of 5-bit chunks, least significant first; the last chunk has no 0x20 flag
+    last = chars < 0x20
+    starts = np.flatnonzero(np.concatenate(([True], last[:-1])))
+    shift = 5 * (np.arange(chars.size) - np.repeat(starts, np.diff(np.append(starts, chars.size))))
+    values = np.add.reduceat((chars & 0x1F) << shift, starts)
+    if values.size % 2:
+        raise ValueError("malformed encoded polyline")
+    # Zigzag sign, then the running sum of the deltas
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1).reshape(-1, 2)
+    coords = np.cumsum(deltas, axis=0)
+    if scaled:
+        return coords.astype(np.int32)
+    return coords / float(10 ** precision)
+
+def encode_polyline(coords, precision=PRECISION, scaled=False):
+    """Encoded polyline of an (n, 2) lat/lon array (degrees, or integers already scaled when scaled)."""
+    coords = np.asarray(coords).reshape(-1, 2)
+    if not scaled:
+        coords = np.rint(coords.astype(np.float64) * 10 ** precision)
+    coords = coords.astype(np.int64)
+    deltas = np.diff(coords, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    values = (deltas << 1) ^ (deltas >> 63)
+    # Up to 7 chunks of 5 bits per value; chunk j is written when the value has bits at or above 5 * j
+    chunks = (values[:, None] >> (5 * np.arange(7))) & 0x1F
+    count = 1 + (values[:, None] >> (5 * np.arange(1, 7)) > 0).sum(axis=1)
+    used = np.arange(7) < count[:, None]
+    chunks[np.arange(7) < (count - 1)[:, None]] |= 0x20
+    return (chunks[used] + 63).astype(np.uint8).tobytes().decode("ascii")
+
+def pack_coords(coords):
+    """Compact bytes of (n, 2) int32 scaled coordinates: first point then deltas, int32, zlib-compressed.
+
+    Consecutive deltas are small, so they compress well; this is the storage format of
+    persistent_cache.py.
+    """
+    coords = np.asarray(coords, dtype=np.int64).reshape(-1, 2)
+    deltas = np.diff(coords, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    return zlib.compress(deltas.astype(np.int32).tobytes())
+
+def unpack_coords(blob):
+    # Inverse of pack_coords: (n, 2) int32 scaled coordinates
+    deltas = np.frombuffer(zlib.decompress(blob), dtype=np.int32).reshape(-1, 2)
+    return np.cumsum(deltas, axis=0, dtype=np.int64).astype(np.int32)
+
+class Route:
+    """One OSRM route: int32 geometry, distance (km), duration (min), display style and steps table."""
+    __slots__ = ("coords", "distance", "duration", "color", "weight", "steps", "names")
+
+    def __init__(self, coords, distance, duration, color="#1E90FF", weight=5, steps=None, names=()):
+        self.coords = coords  # (n, 2) int32, degrees * COORD_SCALE
+        self.distance = distance
+        self.duration = duration
+        self.color = color
+        self.weight = weight
+        self.steps = steps if steps is not None else np.zeros(0, dtype=STEP_DTYPE)
+        self.names = names
+
+    @classmethod
+    def from_osrm(cls, route_item, color="#1E90FF", weight=5):
+        steps, names = steps_table(route_item)
+        return cls(decode_polyline(route_item["geometry"], scaled=True), route_item["distance"] / 1000,
+                   route_item["duration"] / 60, color, weight, steps, names)
+
+    @classmethod
+    def from_latlon(cls, latlon, distance, duration, color="#1E90FF", weight=5):
+        coords = np.rint(np.asarray(latlon, dtype=np.float64).reshape(-1, 2) * COORD_SCALE).astype(np.int32)
+        return cls(coords, distance, duration, color, weight)
+
+    def latlon(self):
+        # Vertices in degrees, as an (n, 2) float64 array
+        return self.coords / float(COORD_SCALE)
+
+    def start(self):
+        return tuple(self.coords[0] / float(COORD_SCALE))
+
+    def nbytes(self):
+        # Approximate memory held by the record
+        return (sys.getsizeof(self) + self.coords.nbytes + self.steps.nbytes
+                + sum(sys.getsizeof(name) for name in self.names))
+
+def steps_table(route_item):
+    """Steps of every leg of an OSRM route as a STEP_DTYPE array, plus the tuple of road names."""
+    raw = [step for leg in route_item.get("legs", []) for step in leg.get("steps", [])]
+    steps = np.zeros(len(raw), dtype=STEP_DTYPE)
+    names = {}
+    for i, step in enumerate(raw):
+        maneuver = step.get("maneuver", {})
+        lon, lat = maneuver.get("location", (0.0, 0.0))
+        maneuver_type = maneuver.get("type", "other")
+        modifier = maneuver.get("modifier", "")
+        steps[i] = (
+            round(lat * COORD_SCALE), round(lon * COORD_SCALE),
+            step.get("distance", 0.0), step.get("duration", 0.0),
+            MANEUVER_TYPES.index(maneuver_type) if maneuver_type in MANEUVER_TYPES else len(MANEUVER_TYPES) - 1,
+            MANEUVER_MODIFIERS.index(modifier) if modifier in MANEUVER_MODIFIERS else 0,
+            names.setdefault(step.get("name", ""), len(names)),
+        )
+    return steps, tuple(names)
+
+def deep_sizeof(obj, seen=None):
+    # Bytes reachable from obj (containers, strings, numbers and numpy buffers)
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, np.ndarray):
+        return max(size, obj.nbytes)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_sizeof(getattr(obj, name), seen) for name in obj.__slots__ if hasattr(obj, name))
+    return size
+
+def synthetic_osrm_route(km=300.0, spacing_m=15.0, step_every_km=1.5, seed=0):
+    # OSRM-like route payload from Tunis heading south, one vertex every ~spacing_m meters
+    from geo_utils import cumulative_distances
+
+    rng = np.random.default_rng(seed)
+    n = int(km * 1000 / spacing_m)
+    heading = np.cumsum(rng.normal(0, 0.05, n))
+    lat = 36.8065 + np.cumsum(-np.abs(np.cos(heading * 0.1)) * spacing_m / 111_000)
+    lon = 10.1815 + np.cumsum(np.sin(heading) * spacing_m / 90_000)
+    coords = np.column_stack((lat, lon))
+    distances = cumulative_distances(coords)
+    steps = []
+    for i in np.linspace(0, n - 1, max(2, int(km / step_every_km))).astype(int):
+        steps.append({"distance": 1500.0, "duration": 60.0, "name": f"Route {i % 40}", "mode": "driving",
+                      "driving_side": "right", "weight": 60.0, "intersections": [],
+                      "maneuver": {"type": "turn", "modifier": "right", "bearing_before": 0,
+                                   "bearing_after": 90, "location": [lon[i], lat[i]]}})
+    return {"geometry": encode_polyline(coords), "distance": float(distances[-1]), "duration": 10_800.0,
+            "weight": 10_800.0, "legs": [{"steps": steps, "distance": float(distances[-1]), "duration": 10_800.0}]}
+
+def bench(km=300.0, repeat=20):
+    route_item = synthetic_osrm_route(km)
+    encoded = route_item["geometry"]
+    coords = decode_polyline(encoded)
+    print(f"{km:.0f} km route: {len(coords)} vertices, {len(encoded) / 1024:.0f} KB encoded, "
+          f"{len(route_item['legs'][0]['steps'])} steps")
+
+    def best_ms(fn):
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - started)
+        return min(times) * 1000
+
+    print(f"{'decoder':<22} {'ms':>8} {'Mvertices/s':>12}")
+    rows = []
+    try:
+        import polyline
+        rows.append(("polyline.decode", lambda: polyline.decode(encoded)))
+    except ImportError:
+        polyline = None
+    rows.append(("decode_polyline", lambda: decode_polyline(encoded)))
+    rows.append(("decode_polyline int32", lambda: decode_polyline(encoded, scaled=True)))
+    for label, fn in rows:
+        ms = best_ms(fn)
+        print(f"{label:<22} {ms:>8.2f} {len(coords) / ms / 1000:>12.2f}")
+    if polyline is not None:
+        error = np.abs(np.asarray(polyline.decode(encoded)) - coords).max()
+        print(f"max difference from polyline.decode: {error:.1e} degrees")
+
+    # What one route costs in st.session_state, before and after
+    previous = {"coords": [tuple(c) for c in coords.tolist()], "geometry": encoded,
+                "distance": route_item["distance"] / 1000, "duration": route_item["duration"] / 60,
+                "color": "#1E90FF", "weight": 5, "steps": route_item["legs"][0]["steps"]}
+    route = Route.from_osrm(route_item)
+    before, after = deep_sizeof(previous), deep_sizeof(route)
+    print(f"{'session state':<22} {'KB/route':>8}")
+    print(f"{'dict of tuples':<22} {before / 1024:>8.0f}")
+    print(f"{'Route':<22} {after / 1024:>8.0f}   ({before / after:.0f}x smaller)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench_parser = sub.add_parser("bench", help="decode throughput and session bytes of one long route")
+    bench_parser.add_argument("--km", type=float, default=300.0)
+    bench_parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    bench(args.km, args.repeat)
+
+if __name__ == "__main__":
+    main()
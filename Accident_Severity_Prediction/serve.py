@@ -0,0 +1,25 @@
+"""Entry point of the container: starts the model warm-up, then the Streamlit server.
+
+Streamlit only executes main.py once a browser connects, so warming up from the
+script alone would leave a fresh replica unready until its first user. Both run in
+this process, so the page sees the models warmed here.
+
+    python Accident_Severity_Prediction/serve.py [streamlit options]
+"""
+import os
+import sys
+
+from streamlit.web import cli as stcli
+
+from model_runtime import weather_backend_error
+from warmup import start_warmup
+
+if __name__ == "__main__":
+    # An image without a usable weather model must not start, rather than fail on the first photo
+    error = weather_backend_error()
+    if error:
+        sys.exit(error)
+    start_warmup()
+    main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    sys.argv = ["streamlit", "run", main_script, *sys.argv[1:]]
+    sys.exit(stcli.main())
@@ -0,0 +1,166 @@
+import os
+import tempfile
+
+# Runtime configuration, overridable through environment variables (see docker-compose.yml)
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+def _env_ints(name, default):
+    # Comma-separated list of positive integers, e.g. "1,16"
+    try:
+        values = [int(v) for v in os.environ.get(name, default).split(",") if v.strip()]
+    except ValueError:
+        values = [int(v) for v in default.split(",")]
+    return tuple(v for v in values if v > 0)
+
+# Maximum number of images sent to the weather CNN in a single forward pass
+WEATHER_MAX_BATCH_SIZE = max(1, _env_int("WEATHER_MAX_BATCH_SIZE", 16))
+
+# Directory holding the model files, relative to the working directory (/app in Docker)
+MODEL_DIR = os.environ.get("MODEL_DIR", "Accident_Severity_Prediction")
+
+# Weather CNN runtime: "onnx" (onnxruntime, no TensorFlow import), "keras",
+# or "auto" to use the ONNX export when it exists and fall back to Keras otherwise
+WEATHER_MODEL_BACKEND = os.environ.get("WEATHER_MODEL_BACKEND", "auto").lower()
+
+# Numeric precision of the served weather CNN: "fp32" or "int8" (built by quantize_models.py).
+# The int8 model requires the ONNX backend. The severity model (a tree ensemble) is always fp32.
+WEATHER_MODEL_PRECISION = os.environ.get("WEATHER_MODEL_PRECISION", "fp32").lower()
+
+# onnxruntime session options shared by every model (see model_runtime.create_onnx_session).
+# Thread counts of 0 let onnxruntime use every core; with several Streamlit workers on one
+# node, set ORT_INTRA_OP_THREADS to about cores / workers to avoid oversubscription.
+ORT_INTRA_OP_THREADS = max(0, _env_int("ORT_INTRA_OP_THREADS", 0))
+ORT_INTER_OP_THREADS = max(0, _env_int("ORT_INTER_OP_THREADS", 0))
+# "sequential", or "parallel" to also run independent graph branches concurrently
+ORT_EXECUTION_MODE = os.environ.get("ORT_EXECUTION_MODE", "sequential").lower()
+# Graph optimization level: "disable", "basic", "extended" or "all"
+ORT_GRAPH_OPTIMIZATION = os.environ.get("ORT_GRAPH_OPTIMIZATION", "all").lower()
+# CPU memory arena and memory pattern planning; turning them off lowers resident memory at some speed cost
+ORT_ENABLE_MEM_ARENA = _env_int("ORT_ENABLE_MEM_ARENA", 1) != 0
+ORT_ENABLE_MEM_PATTERN = _env_int("ORT_ENABLE_MEM_PATTERN", 1) != 0
+# Save the optimized graph (in ORT_OPTIMIZED_DIR, below) and load it directly on later startups
+ORT_SAVE_OPTIMIZED = _env_int("ORT_SAVE_OPTIMIZED", 1) != 0
+
+# Threads decoding uploaded images in parallel (image_pipeline.py)
+IMAGE_DECODE_WORKERS = max(1, _env_int("IMAGE_DECODE_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Weather results of uploaded images, keyed by a hash of their bytes: entries and memory cap
+WEATHER_RESULT_CACHE_SIZE = max(1, _env_int("WEATHER_RESULT_CACHE_SIZE", 4096))
+WEATHER_RESULT_CACHE_MAX_BYTES = max(1 << 16, _env_int("WEATHER_RESULT_CACHE_MAX_BYTES", 4 << 20))
+
+# Spacing in meters between the points where accident severity is scored along a route
+ROUTE_SAMPLE_SPACING_M = max(50, _env_int("ROUTE_SAMPLE_SPACING_M", 500))
+
+# Precomputed severity raster (built by severity_raster.py): file path and grid step in degrees
+SEVERITY_RASTER_PATH = os.environ.get("SEVERITY_RASTER_PATH", os.path.join(MODEL_DIR, "severity_raster.npy"))
+SEVERITY_RASTER_RESOLUTION_DEG = _env_float("SEVERITY_RASTER_RESOLUTION_DEG", 0.01)
+
+# OSRM routing server; point it at a local stub or self-hosted instance to avoid the public demo
+OSRM_BASE_URL = os.environ.get("OSRM_BASE_URL", "http://router.project-osrm.org").rstrip("/")
+# Shared HTTP client: timeout in seconds, retries on connection errors and 429/5xx, pooled connections per host
+HTTP_TIMEOUT = _env_float("HTTP_TIMEOUT", 30)
+HTTP_RETRIES = max(0, _env_int("HTTP_RETRIES", 3))
+HTTP_POOL_SIZE = max(1, _env_int("HTTP_POOL_SIZE", 10))
+# OSRM response cache: entries, lifetime in seconds, and decimals kept when rounding coordinates into the key
+OSRM_CACHE_SIZE = max(1, _env_int("OSRM_CACHE_SIZE", 512))
+OSRM_CACHE_TTL = _env_float("OSRM_CACHE_TTL", 6 * 3600)
+OSRM_CACHE_PRECISION = _env_int("OSRM_CACHE_PRECISION", 4)
+
+# Persistent geocode/route store (SQLite). docker-compose points CACHE_DIR at its mounted
+# data directory, so the store survives container restarts.
+CACHE_DIR = os.environ.get("CACHE_DIR", os.path.join(MODEL_DIR, "cache"))
+CACHE_DB_PATH = os.environ.get("CACHE_DB_PATH", os.path.join(CACHE_DIR, "road_safety_cache.sqlite3"))
+CACHE_MAX_BYTES = max(1 << 20, _env_int("CACHE_MAX_BYTES", 64 << 20))
+
+# Optimized onnxruntime graphs saved with ORT_SAVE_OPTIMIZED, one file per model, level,
+# onnxruntime version and CPU, since a graph optimized on one machine may not suit another
+ORT_OPTIMIZED_DIR = os.environ.get("ORT_OPTIMIZED_DIR", os.path.join(CACHE_DIR, "onnx"))
+
+# Optional CSV of extra places (name,lat,lon[,admin1]) merged into the offline gazetteer
+GAZETTEER_EXTRA_PATH = os.environ.get("GAZETTEER_EXTRA_PATH", os.path.join(MODEL_DIR, "tunisia_places.csv"))
+
+# Prebuilt reverse-geocoding index clipped to Tunisia (reverse_index.py build; built on first use if missing)
+REVERSE_INDEX_PATH = os.environ.get("REVERSE_INDEX_PATH", os.path.join(MODEL_DIR, "tn_reverse_index.npy"))
+
+# Warm-up at process start: dummy inputs are pushed through both models at these batch sizes
+# before the readiness file (polled by healthcheck.py) is written. MODEL_WARMUP=0 skips it.
+MODEL_WARMUP = _env_int("MODEL_WARMUP", 1) != 0
+WARMUP_WEATHER_BATCH_SIZES = _env_ints("WARMUP_WEATHER_BATCH_SIZES", f"1,{WEATHER_MAX_BATCH_SIZE}")
+WARMUP_SEVERITY_BATCH_SIZES = _env_ints("WARMUP_SEVERITY_BATCH_SIZES", "1,64,512")
+# Outside the mounted cache directory, so that a restarted container starts unready
+READINESS_PATH = os.environ.get("READINESS_PATH", os.path.join(tempfile.gettempdir(), "road_safety_ready.json"))
+
+# Shared model server (model_server.py): "unix:/path/to/socket" or "host:port". Empty runs the
+# models inside every Streamlit process. Clients fall back to in-process models while the server
+# is unreachable, retrying it after MODEL_SERVER_RETRY_INTERVAL seconds.
+MODEL_SERVER_ADDRESS = os.environ.get("MODEL_SERVER_ADDRESS", "").strip()
+# Shared secret of client and server connections. Requests are pickled, so whoever holds the key
+# can run code in the server: the built-in key is only accepted on Unix sockets (owner-only file),
+# and a TCP server refuses to start unless MODEL_SERVER_AUTHKEY is set to another value.
+DEFAULT_MODEL_SERVER_AUTHKEY = "road-safety-models"
+MODEL_SERVER_AUTHKEY = os.environ.get("MODEL_SERVER_AUTHKEY", "") or DEFAULT_MODEL_SERVER_AUTHKEY
+MODEL_SERVER_TIMEOUT = _env_float("MODEL_SERVER_TIMEOUT", 30)
+MODEL_SERVER_RETRY_INTERVAL = _env_float("MODEL_SERVER_RETRY_INTERVAL", 5)
+# Micro-batching: requests arriving within this window (ms) are run as one batch of at most
+# MODEL_SERVER_MAX_ROWS rows; MODEL_SERVER_WORKERS batches of each model can run at once
+MODEL_SERVER_BATCH_WINDOW_MS = _env_float("MODEL_SERVER_BATCH_WINDOW_MS", 5)
+MODEL_SERVER_MAX_ROWS = max(1, _env_int("MODEL_SERVER_MAX_ROWS", 1024))
+MODEL_SERVER_WORKERS = max(1, _env_int("MODEL_SERVER_WORKERS", 1))
+
+# Voice alerts (voice_alerts.py): synthesized MP3s cached in memory and on disk, keyed by (text, lang)
+VOICE_CACHE_SIZE = max(1, _env_int("VOICE_CACHE_SIZE", 256))
+VOICE_CACHE_MAX_BYTES = max(1 << 20, _env_int("VOICE_CACHE_MAX_BYTES", 16 << 20))
+VOICE_CACHE_DIR = os.environ.get("VOICE_CACHE_DIR", os.path.join(CACHE_DIR, "voice"))
+VOICE_DISK_MAX_BYTES = max(1 << 20, _env_int("VOICE_DISK_MAX_BYTES", 64 << 20))
+# Background synthesis threads, and how long the end of a page run waits for pending alerts
+VOICE_SYNTHESIS_WORKERS = max(1, _env_int("VOICE_SYNTHESIS_WORKERS", 2))
+VOICE_ALERT_TIMEOUT = _env_float("VOICE_ALERT_TIMEOUT", 15)
+
+# Route rendering: geometry is simplified to about one pixel at ROUTE_DETAIL_ZOOM, and the routes of one
+# map share a budget of MAP_ROUTE_POINT_BUDGET vertices (about 22 bytes of HTML each)
+ROUTE_DETAIL_ZOOM = _env_int("ROUTE_DETAIL_ZOOM", 14)
+MAP_ROUTE_POINT_BUDGET = max(100, _env_int("MAP_ROUTE_POINT_BUDGET", 6000))
+# Number of moves of the animated marker along the recommended route
+ROUTE_ANIMATION_STEPS = max(10, _env_int("ROUTE_ANIMATION_STEPS", 200))
+
+# Rendered map HTML (map_cache.py), shared by every session: entries and memory cap
+MAP_HTML_CACHE_SIZE = max(1, _env_int("MAP_HTML_CACHE_SIZE", 128))
+MAP_HTML_CACHE_MAX_BYTES = max(1 << 20, _env_int("MAP_HTML_CACHE_MAX_BYTES", 64 << 20))
+
+# Dashboard weather (weather_refresh.py): one background thread refreshes every location cell
+# (geohash of WEATHER_GEOHASH_PRECISION characters, ~5 km at 5) read by a session in the last
+# WEATHER_CELL_IDLE_TIMEOUT seconds
+WEATHER_REFRESH_INTERVAL = max(1.0, _env_float("WEATHER_REFRESH_INTERVAL", 60))
+WEATHER_GEOHASH_PRECISION = min(12, max(1, _env_int("WEATHER_GEOHASH_PRECISION", 5)))
+WEATHER_CELL_IDLE_TIMEOUT = _env_float("WEATHER_CELL_IDLE_TIMEOUT", 600)
+# Weather provider cache, per cell: fresh for WEATHER_CACHE_TTL seconds, then served for up to
+# WEATHER_CACHE_STALE_TTL more seconds while WEATHER_FETCH_WORKERS threads revalidate it
+WEATHER_CACHE_TTL = max(1.0, _env_float("WEATHER_CACHE_TTL", 60))
+WEATHER_CACHE_STALE_TTL = max(0.0, _env_float("WEATHER_CACHE_STALE_TTL", 600))
+WEATHER_CACHE_SIZE = max(1, _env_int("WEATHER_CACHE_SIZE", 4096))
+WEATHER_FETCH_WORKERS = max(1, _env_int("WEATHER_FETCH_WORKERS", 2))
+
+# Accident history (accident_store.py): memory-mapped columns and rollups, filled by CSV bulk loads
+ACCIDENT_STORE_DIR = os.environ.get("ACCIDENT_STORE_DIR", os.path.join(CACHE_DIR, "accidents"))
+
+# Accident heat map (heat_grid.py): points are binned into cells of about HEAT_CELL_PIXELS screen
+# pixels at the map's zoom; aggregates of the last HEAT_GRID_CACHE_SIZE viewports are kept
+HEAT_CELL_PIXELS = max(2, _env_int("HEAT_CELL_PIXELS", 12))
+HEAT_GRID_CACHE_SIZE = max(1, _env_int("HEAT_GRID_CACHE_SIZE", 256))
+
+# Cold-start checks of startup_bench.py: seconds each page of main.py may take to render in a fresh
+# process (overridden with --budget), and libraries no page may import before the models are needed
+STARTUP_BUDGETS = {"home": _env_float("STARTUP_BUDGET_HOME", 4), "dashboard": _env_float("STARTUP_BUDGET_DASHBOARD", 4)}
+STARTUP_FORBIDDEN_IMPORTS = tuple(m.strip() for m in os.environ.get("STARTUP_FORBIDDEN_IMPORTS",
+                                                                    "tensorflow,onnxruntime").split(",") if m.strip())
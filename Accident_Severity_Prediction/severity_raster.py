@@ -0,0 +1,162 @@
+"""Precomputed accident-severity raster over Tunisia.
+
+The offline job evaluates the severity model on a regular lat/lon grid over the
+app's bounding box (lat 30-38, lon 7-12), for every weather class and day of week,
+and stores the predicted class as a uint8 array of shape
+(weather_class, day_of_week, lat, lon). At runtime the array is memory-mapped,
+so the severity of a point or a whole polyline is an array lookup.
+
+    python Accident_Severity_Prediction/severity_raster.py build [--workers N] [--force]
+
+The build is skipped when the raster already matches the model file hash and grid.
+The Date feature is taken at build time, for the next occurrence of each day of week.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from multiprocessing import Pool
+import numpy as np
+
+from settings import SEVERITY_RASTER_PATH, SEVERITY_RASTER_RESOLUTION_DEG
+from model_runtime import SEVERITY_ONNX_PATH, build_severity_features, create_onnx_session
+
+LAT_RANGE = (30.0, 38.0)
+LON_RANGE = (7.0, 12.0)
+WEATHER_CLASSES = 5
+DAYS_OF_WEEK = 7
+
+def metadata_path(raster_path):
+    return os.path.splitext(raster_path)[0] + ".json"
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def grid_axes(resolution=SEVERITY_RASTER_RESOLUTION_DEG):
+    lats = np.arange(int(round((LAT_RANGE[1] - LAT_RANGE[0]) / resolution)) + 1) * resolution + LAT_RANGE[0]
+    lons = np.arange(int(round((LON_RANGE[1] - LON_RANGE[0]) / resolution)) + 1) * resolution + LON_RANGE[0]
+    return lats, lons
+
+class SeverityRaster:
+    """Memory-mapped severity classes with vectorized point lookups."""
+
+    def __init__(self, classes, resolution):
+        self.classes = classes
+        self.resolution = resolution
+        self.lats, self.lons = grid_axes(resolution)
+
+    def covers(self, lat, lon):
+        lat, lon = np.asarray(lat), np.asarray(lon)
+        return (lat >= LAT_RANGE[0]) & (lat <= LAT_RANGE[1]) & (lon >= LON_RANGE[0]) & (lon <= LON_RANGE[1])
+
+    def cell_index(self, lat, lon):
+        i = np.clip(np.rint((np.asarray(lat) - LAT_RANGE[0]) / self.resolution).astype(np.intp), 0, len(self.lats) - 1)
+        j = np.clip(np.rint((np.asarray(lon) - LON_RANGE[0]) / self.resolution).astype(np.intp), 0, len(self.lons) - 1)
+        return i, j
+
+    def lookup(self, lat, lon, weather_class, day_of_week):
+        # Severity class of the nearest grid node for every (lat, lon); points outside the box are clamped
+        i, j = self.cell_index(lat, lon)
+        return self.classes[int(weather_class), int(day_of_week)][i, j]
+
+    def lookup_coords(self, coords, weather_class, day_of_week):
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        return self.lookup(coords[:, 0], coords[:, 1], weather_class, day_of_week)
+
+    def heat_points(self, weather_class, day_of_week, bbox, step=1):
+        """Grid nodes inside bbox=(lat_min, lon_min, lat_max, lon_max) as [lat, lon, weight] rows.
+
+        The weight is the severity class plus one, so every node contributes to a heat map.
+        step keeps one node out of `step` in each direction.
+        """
+        i0, j0 = self.cell_index(bbox[0], bbox[1])
+        i1, j1 = self.cell_index(bbox[2], bbox[3])
+        block = np.asarray(self.classes[int(weather_class), int(day_of_week)][i0:i1 + 1:step, j0:j1 + 1:step])
+        lat_grid, lon_grid = np.meshgrid(self.lats[i0:i1 + 1:step], self.lons[j0:j1 + 1:step], indexing="ij")
+        return np.column_stack((lat_grid.ravel(), lon_grid.ravel(), block.ravel().astype(np.float64) + 1))
+
+def load_raster(raster_path=SEVERITY_RASTER_PATH, model_path=SEVERITY_ONNX_PATH):
+    """Memory-map the raster, or return None if it is missing or was built from another model."""
+    try:
+        with open(metadata_path(raster_path)) as f:
+            metadata = json.load(f)
+        if metadata["model_sha256"] != file_sha256(model_path):
+            return None
+        return SeverityRaster(np.load(raster_path, mmap_mode="r"), metadata["resolution"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+# Worker state: one onnxruntime session per process, single-threaded since the pool provides the parallelism
+_worker_session = None
+
+def _init_worker(model_path):
+    global _worker_session
+    _worker_session = create_onnx_session(model_path, intra_op_threads=1, inter_op_threads=1,
+                                          execution_mode="sequential")
+
+def _compute_slice(task):
+    weather_class, day_of_week, resolution, today_ordinal = task
+    lats, lons = grid_axes(resolution)
+    lat_grid, lon_grid = np.meshgrid(lats, lons, indexing="ij")
+    today = datetime.fromordinal(today_ordinal)
+    when = today + timedelta(days=(day_of_week - today.weekday()) % 7)
+    features = build_severity_features(weather_class, np.column_stack((lat_grid.ravel(), lon_grid.ravel())), when)
+    input_name = _worker_session.get_inputs()[0].name
+    labels = np.asarray(_worker_session.run(None, {input_name: features})[0])
+    return weather_class, day_of_week, labels.astype(np.uint8).reshape(lat_grid.shape)
+
+def build_raster(raster_path=SEVERITY_RASTER_PATH, model_path=SEVERITY_ONNX_PATH,
+                 resolution=SEVERITY_RASTER_RESOLUTION_DEG, workers=None, force=False):
+    model_hash = file_sha256(model_path)
+    try:
+        with open(metadata_path(raster_path)) as f:
+            metadata = json.load(f)
+        up_to_date = metadata.get("model_sha256") == model_hash and metadata.get("resolution") == resolution
+    except (OSError, ValueError):
+        up_to_date = False
+    if up_to_date and os.path.exists(raster_path) and not force:
+        print(f"{raster_path} is up to date (model {model_hash[:12]})")
+        return False
+
+    lats, lons = grid_axes(resolution)
+    tmp_path = raster_path + ".tmp.npy"
+    classes = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8,
+                                        shape=(WEATHER_CLASSES, DAYS_OF_WEEK, len(lats), len(lons)))
+    today_ordinal = datetime.now().toordinal()
+    tasks = [(w, d, resolution, today_ordinal) for w in range(WEATHER_CLASSES) for d in range(DAYS_OF_WEEK)]
+    started = time.perf_counter()
+    with Pool(workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+        for weather_class, day_of_week, block in pool.imap_unordered(_compute_slice, tasks):
+            classes[weather_class, day_of_week] = block
+    classes.flush()
+    del classes
+    os.replace(tmp_path, raster_path)
+    with open(metadata_path(raster_path), "w") as f:
+        json.dump({
+            "model_sha256": model_hash,
+            "resolution": resolution,
+            "lat_range": LAT_RANGE,
+            "lon_range": LON_RANGE,
+            "date_ordinal": today_ordinal,
+        }, f, indent=2)
+    print(f"Wrote {raster_path}: {len(tasks)} slices of {len(lats)}x{len(lons)} "
+          f"({os.path.getsize(raster_path) / 1e6:.1f} MB) in {time.perf_counter() - started:.1f} s")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="evaluate the severity model over the Tunisian grid")
+    build_parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    build_parser.add_argument("--force", action="store_true", help="rebuild even if the model hash is unchanged")
+    args = parser.parse_args()
+    build_raster(workers=args.workers, force=args.force)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Cold-start time of each page, measured in a fresh interpreter.
+
+Every page of main.py is rendered once without a Streamlit server,
+then the probe reports the wall time, the components loaded through the registry
+and which heavy libraries ended up imported. The command fails when a page is slower
+than its budget (STARTUP_BUDGETS, or --budget) or imports one of STARTUP_FORBIDDEN_IMPORTS.
+
+    python Accident_Severity_Prediction/startup_bench.py
+    python Accident_Severity_Prediction/startup_bench.py --budget home=3 --budget dashboard=5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from settings import STARTUP_BUDGETS, STARTUP_FORBIDDEN_IMPORTS
+
+PAGES = ("home", "dashboard")
+HEAVY_MODULES = ("tensorflow", "onnxruntime", "folium", "gtts", "geopy", "plotly")
+
+# Runs main.py once under a throwaway script-run context, so that session state
+# (and with it main.py's page routing) behaves as it does behind the server
+_PROBE = """
+import json, logging, runpy, sys, threading, time
+logging.disable(logging.WARNING)
+started = time.perf_counter()
+import streamlit as st
+from streamlit.runtime.scriptrunner import ScriptRunContext, add_script_run_ctx
+from streamlit.runtime.state import SafeSessionState, SessionState
+from streamlit.runtime.uploaded_file_manager import UploadedFileManager
+ctx = ScriptRunContext(session_id="startup_bench", _enqueue=lambda msg: None, query_string="",
+                       session_state=SafeSessionState(SessionState()), uploaded_file_mgr=UploadedFileManager(),
+                       page_script_hash="", user_info={"email": None})
+add_script_run_ctx(threading.current_thread(), ctx)
+st.session_state.page = sys.argv[2]
+runpy.run_path(sys.argv[1], run_name="__main__")
+elapsed = time.perf_counter() - started
+from component_registry import registry
+print(json.dumps({
+    "seconds": elapsed,
+    "components": registry.load_times,
+    "modules": [m for m in sys.argv[3:] if m in sys.modules],
+}))
+"""
+
+def probe(page):
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])))
+    # Measure what the page itself loads, not the background model warm-up (warmup.py)
+    env["MODEL_WARMUP"] = "0"
+    # Same working directory as the app (model paths are relative to the repository root)
+    proc = subprocess.run([sys.executable, "-c", _PROBE, os.path.join(here, "main.py"), page, *HEAVY_MODULES],
+                          capture_output=True, text=True, cwd=os.path.dirname(here), env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{page}: {proc.stderr.strip().splitlines()[-1]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def parse_budget(value):
+    page, _, seconds = value.partition("=")
+    if page not in PAGES or not seconds:
+        raise argparse.ArgumentTypeError(f"expected PAGE=SECONDS with PAGE in {', '.join(PAGES)}")
+    return page, float(seconds)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=parse_budget, action="append", default=[],
+                        help="cold-start budget of a page in seconds, e.g. home=3 (default from settings)")
+    args = parser.parse_args()
+    budgets = dict(STARTUP_BUDGETS, **dict(args.budget))
+
+    failures = []
+    print(f"budgets: {', '.join(f'{page} {seconds:.1f} s' for page, seconds in budgets.items())}; "
+          f"forbidden imports: {', '.join(STARTUP_FORBIDDEN_IMPORTS) or '-'}")
+    for page in PAGES:
+        result = probe(page)
+        components = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in result["components"].items())
+        print(f"{page:<10} {result['seconds']:>6.2f} s  imports: {', '.join(result['modules']) or '-'}")
+        print(f"{'':<10} components: {components or '-'}")
+        if page in budgets and result["seconds"] > budgets[page]:
+            failures.append(f"{page} took {result['seconds']:.2f} s (budget {budgets[page]:.2f} s)")
+        for module in STARTUP_FORBIDDEN_IMPORTS:
+            if module in result["modules"]:
+                failures.append(f"{page} imported {module}")
+    if failures:
+        sys.exit("Startup budget exceeded: " + "; ".join(failures))
+
+if __name__ == "__main__":
+    main()
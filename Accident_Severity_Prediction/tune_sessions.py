@@ -0,0 +1,95 @@
+"""Sweep onnxruntime session settings for the served models and batch sizes.
+
+Every combination of thread count, execution mode, graph optimization level and
+memory arena is timed: session creation (cold, then from the saved optimized graph)
+and p50/p99 inference latency. The fastest setting per model and batch size is
+printed as ORT_* environment variables.
+
+    python Accident_Severity_Prediction/tune_sessions.py
+    python Accident_Severity_Prediction/tune_sessions.py --threads 1 2 4 --repeats 100
+"""
+import argparse
+import itertools
+import os
+import tempfile
+import shutil
+import time
+import numpy as np
+
+from model_runtime import (EXECUTION_MODES, GRAPH_OPTIMIZATION_LEVELS, SEVERITY_ONNX_PATH, WEATHER_INPUT_SHAPE,
+                           WEATHER_ONNX_PATH, create_onnx_session, optimized_path)
+from quantize_models import severity_samples
+from settings import WARMUP_SEVERITY_BATCH_SIZES, WARMUP_WEATHER_BATCH_SIZES
+
+def weather_inputs(batch_size):
+    return np.random.default_rng(0).random((batch_size, *WEATHER_INPUT_SHAPE), dtype=np.float32)
+
+def severity_inputs(batch_size):
+    samples = severity_samples()
+    return samples[np.arange(batch_size) % len(samples)]
+
+def time_session(model_path, config, inputs, repeats):
+    # Timed on a private copy of the model, so the saved optimized graph of the run is the only one
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, os.path.basename(model_path))
+        shutil.copyfile(model_path, path)
+        saved = optimized_path(path, config["graph_optimization"])
+        started = time.perf_counter()
+        session = create_onnx_session(path, **config)
+        cold = time.perf_counter() - started
+        cached = None
+        if config["save_optimized"] and os.path.exists(saved):
+            started = time.perf_counter()
+            session = create_onnx_session(path, **config)
+            cached = time.perf_counter() - started
+            os.remove(saved)  # keyed on the private copy, never loaded again
+        input_name = session.get_inputs()[0].name
+        session.run(None, {input_name: inputs})  # first call pays kernel initialization
+        latencies = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            session.run(None, {input_name: inputs})
+            latencies.append((time.perf_counter() - started) * 1000)
+    return cold, cached, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+def sweep(threads, repeats):
+    models = [
+        ("weather", WEATHER_ONNX_PATH, weather_inputs, WARMUP_WEATHER_BATCH_SIZES),
+        ("severity", SEVERITY_ONNX_PATH, severity_inputs, WARMUP_SEVERITY_BATCH_SIZES),
+    ]
+    print(f"{'model':<9} {'batch':>5} {'threads':>7} {'mode':<10} {'graph':<9} {'arena':<5} "
+          f"{'load (ms)':>9} {'cached (ms)':>11} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for name, path, make_inputs, batch_sizes in models:
+        if not os.path.exists(path):
+            print(f"{name:<9} skipped: {path} not found")
+            continue
+        for batch_size in batch_sizes:
+            inputs = make_inputs(batch_size)
+            results = []
+            for intra, mode, level, arena in itertools.product(threads, EXECUTION_MODES, GRAPH_OPTIMIZATION_LEVELS,
+                                                               (True, False)):
+                config = {"intra_op_threads": intra, "inter_op_threads": intra if mode == "parallel" else 1,
+                          "execution_mode": mode, "graph_optimization": level,
+                          "enable_mem_arena": arena, "save_optimized": True}
+                cold, cached, p50, p99 = time_session(path, config, inputs, repeats)
+                results.append((p50, config))
+                cached_text = f"{cached * 1000:>11.1f}" if cached is not None else f"{'-':>11}"
+                print(f"{name:<9} {batch_size:>5} {intra:>7} {mode:<10} {level:<9} {'on' if arena else 'off':<5} "
+                      f"{cold * 1000:>9.1f} {cached_text} {p50:>9.3f} {p99:>9.3f}")
+            p50, best = min(results, key=lambda r: r[0])
+            print(f"-> {name} batch {batch_size}: ORT_INTRA_OP_THREADS={best['intra_op_threads']} "
+                  f"ORT_INTER_OP_THREADS={best['inter_op_threads']} ORT_EXECUTION_MODE={best['execution_mode']} "
+                  f"ORT_GRAPH_OPTIMIZATION={best['graph_optimization']} "
+                  f"ORT_ENABLE_MEM_ARENA={int(best['enable_mem_arena'])} (p50 {p50:.3f} ms)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    default_threads = sorted({1, 2, os.cpu_count() or 1})
+    parser.add_argument("--threads", type=int, nargs="+", default=default_threads,
+                        help=f"intra-op thread counts to try (default: {' '.join(map(str, default_threads))})")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    sweep(args.threads, args.repeats)
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,24 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import requests
-import folium
-from streamlit_folium import folium_static
-import polyline
-import reverse_geocoder as rg
-import geocoder
-from geopy.geocoders import Nominatim
 from datetime import datetime
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.image import load_img, img_to_array
-from PIL import Image
-from statistics import mode
-import onnxruntime as ort
 import os
-import tempfile
-from gtts import gTTS
-import base64
-import uuid
 import time
+import hashlib
+from settings import (WEATHER_MAX_BATCH_SIZE, ROUTE_SAMPLE_SPACING_M, WEATHER_MODEL_PRECISION,
+                      WEATHER_RESULT_CACHE_SIZE, WEATHER_RESULT_CACHE_MAX_BYTES, VOICE_ALERT_TIMEOUT,
+                      ROUTE_DETAIL_ZOOM, MAP_ROUTE_POINT_BUDGET, ROUTE_ANIMATION_STEPS)
+from model_runtime import build_severity_features, resolve_weather_backend
+from geo_utils import meters_per_pixel, resample_polyline, simplify_polylines
+from route_codec import COORD_SCALE, Route
+from http_client import osrm_route
+from geocoding import geocode, suggest_places
+from caching import TTLCache, cache_stats
+from component_registry import registry
+from warmup import warmup_state
+from model_client import classify_weather, get_client, predict_severity
+from image_pipeline import load_image_batch as decode_image_batch
+from voice_alerts import cached_audio, request_audio
+from map_cache import map_key, map_update_stats, show_map
 
 # Set page configuration only if the script is executed directly (not imported)
 if __name__ == "__main__":
@@ -31,207 +30,213 @@ if __name__ == "__main__":
     )
 
 # Apply custom styling
-st.markdown("""
-<style>
-    /* Futuristic color palette */
-    :root {
-        --primary: #3a86ff;
-        --secondary: #8338ec;
-        --accent: #ff006e;
-        --background: #111111;
-        --card-bg: #1a1a1a;
-        --text: #ffffff;
-        --text-secondary: #aaaaaa;
-        --success: #06d6a0;
-        --warning: #ffbe0b;
-        --danger: #ef476f;
-    }
-    
-    /* General styles */
-    .main {
-        background-color: var(--background);
-        color: var(--text);
-    }
-    
-    h1, h2, h3 {
-        color: var(--text);
-        font-family: 'Orbitron', sans-serif;
-        letter-spacing: 1px;
-    }
-    
-    .main-header {
-        font-size: 2.5rem;
-        color: var(--primary);
-        text-align: center;
-        margin-bottom: 1rem;
-        font-family: 'Orbitron', sans-serif;
-    }
-    
-    .sub-header {
-        font-size: 1.5rem;
-        color: var(--primary);
-        margin-top: 2rem;
-        margin-bottom: 1rem;
-        font-family: 'Orbitron', sans-serif;
-    }
-    
-    .info-box {
-        background: linear-gradient(145deg, var(--card-bg), #222222);
-        border-radius: 15px;
-        padding: 20px;
-        box-shadow: 0 8px 32px 0 rgba(0, 0, 0, 0.37);
-        margin-bottom: 30px;
-        border: 1px solid rgba(255, 255, 255, 0.05);
-        backdrop-filter: blur(4px);
-        -webkit-backdrop-filter: blur(4px);
-    }
-    
-    .high-risk {
-        color: var(--danger);
-        font-weight: bold;
-    }
-    
-    .medium-risk {
-        color: var(--warning);
-        font-weight: bold;
-    }
-    
-    .low-risk {
-        color: var(--success);
-        font-weight: bold;
-    }
-    
-    .audio-container {
-        margin-top: 10px;
-        margin-bottom: 10px;
-    }
-    
-    .recommended-route {
-        border: 3px solid var(--accent);
-        border-radius: 15px;
-        padding: 15px;
-        background-color: rgba(255, 0, 110, 0.1);
-        box-shadow: 0 4px 20px 0 rgba(255, 0, 110, 0.2);
-    }
-    
-    .icon-weather {
-        color: var(--primary);
-        font-weight: bold;
-    }
-    
-    .icon-location {
-        color: var(--secondary);
-        font-weight: bold;
-    }
-    
-    .icon-risk {
-        color: var(--danger);
-        font-weight: bold;
-    }
-    
-    .icon-warning {
-        color: var(--warning);
-        font-weight: bold;
-    }
-    
-    .icon-road {
-        color: var(--primary);
-        font-weight: bold;
-    }
-    
-    .icon-time {
-        color: var(--success);
-        font-weight: bold;
-    }
-    
-    .icon-check {
-        color: var(--success);
-        font-weight: bold;
-    }
-    
-    .icon-brain {
-        color: var(--secondary);
-        font-weight: bold;
-    }
-    
-    /* Streamlit elements customization */
-    .stButton{
-        margin-bottom: 30px;
-    }
-    .stButton button {
-        background: linear-gradient(90deg, var(--primary), var(--secondary));
-        color: white;
-        border: none;
-        border-radius: 25px;
-        padding: 10px 25px;
-        font-weight: bold;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton button:hover {
-        transform: scale(1.05);
-        box-shadow: 0 0 15px rgba(58, 134, 255, 0.5);
-    }
-    
-    .stSlider div[data-baseweb="slider"] {
-        background-color: rgba(255, 255, 255, 0.1);
-    }
-    
-    .stSlider div[data-baseweb="slider"] div[role="progressbar"] {
-        background-color: var(--primary);
-    }
-    
-    .stSlider div[data-baseweb="slider"] div[role="slider"] {
-        background-color: var(--accent);
-        border: 2px solid white;
-    }
-    
-    /* Animation for elements */
-    @keyframes fadeIn {
-        from { opacity: 0; transform: translateY(20px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
-    
-    .animate {
-        animation: fadeIn 0.5s ease-out forwards;
-    }
-    
-    /* Add Orbitron font for futuristic style */
-    @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;500;700&display=swap');
-</style>
-
-<!-- Add Font Awesome for icons -->
-<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0-beta3/css/all.min.css">
+def apply_styles():
+    st.markdown("""
+    <style>
+        /* Futuristic color palette */
+        :root {
+            --primary: #3a86ff;
+            --secondary: #8338ec;
+            --accent: #ff006e;
+            --background: #111111;
+            --card-bg: #1a1a1a;
+            --text: #ffffff;
+            --text-secondary: #aaaaaa;
+            --success: #06d6a0;
+            --warning: #ffbe0b;
+            --danger: #ef476f;
+        }
+    
+        /* General styles */
+        .main {
+            background-color: var(--background);
+            color: var(--text);
+        }
+    
+        h1, h2, h3 {
+            color: var(--text);
+            font-family: 'Orbitron', sans-serif;
+            letter-spacing: 1px;
+        }
+    
+        .main-header {
+            font-size: 2.5rem;
+            color: var(--primary);
+            text-align: center;
+            margin-bottom: 1rem;
+            font-family: 'Orbitron', sans-serif;
+        }
+    
+        .sub-header {
+            font-size: 1.5rem;
+            color: var(--primary);
+            margin-top: 2rem;
+            margin-bottom: 1rem;
+            font-family: 'Orbitron', sans-serif;
+        }
+    
+        .info-box {
+            background: linear-gradient(145deg, var(--card-bg), #222222);
+            border-radius: 15px;
+            padding: 20px;
+            box-shadow: 0 8px 32px 0 rgba(0, 0, 0, 0.37);
+            margin-bottom: 30px;
+            border: 1px solid rgba(255, 255, 255, 0.05);
+            backdrop-filter: blur(4px);
+            -webkit-backdrop-filter: blur(4px);
+        }
+    
+        .high-risk {
+            color: var(--danger);
+            font-weight: bold;
+        }
+    
+        .medium-risk {
+            color: var(--warning);
+            font-weight: bold;
+        }
+    
+        .low-risk {
+            color: var(--success);
+            font-weight: bold;
+        }
+    
+        .audio-container {
+            margin-top: 10px;
+            margin-bottom: 10px;
+        }
+    
+        .recommended-route {
+            border: 3px solid var(--accent);
+            border-radius: 15px;
+            padding: 15px;
+            background-color: rgba(255, 0, 110, 0.1);
+            box-shadow: 0 4px 20px 0 rgba(255, 0, 110, 0.2);
+        }
+    
+        .icon-weather {
+            color: var(--primary);
+            font-weight: bold;
+        }
+    
+        .icon-location {
+            color: var(--secondary);
+            font-weight: bold;
+        }
+    
+        .icon-risk {
+            color: var(--danger);
+            font-weight: bold;
+        }
+    
+        .icon-warning {
+            color: var(--warning);
+            font-weight: bold;
+        }
+    
+        .icon-road {
+            color: var(--primary);
+            font-weight: bold;
+        }
+    
+        .icon-time {
+            color: var(--success);
+            font-weight: bold;
+        }
+    
+        .icon-check {
+            color: var(--success);
+            font-weight: bold;
+        }
+    
+        .icon-brain {
+            color: var(--secondary);
+            font-weight: bold;
+        }
+    
+        /* Streamlit elements customization */
+        .stButton{
+            margin-bottom: 30px;
+        }
+        .stButton button {
+            background: linear-gradient(90deg, var(--primary), var(--secondary));
+            color: white;
+            border: none;
+            border-radius: 25px;
+            padding: 10px 25px;
+            font-weight: bold;
+            transition: all 0.3s ease;
+        }
+    
+        .stButton button:hover {
+            transform: scale(1.05);
+            box-shadow: 0 0 15px rgba(58, 134, 255, 0.5);
+        }
+    
+        .stSlider div[data-baseweb="slider"] {
+            background-color: rgba(255, 255, 255, 0.1);
+        }
+    
+        .stSlider div[data-baseweb="slider"] div[role="progressbar"] {
+            background-color: var(--primary);
+        }
+    
+        .stSlider div[data-baseweb="slider"] div[role="slider"] {
+            background-color: var(--accent);
+            border: 2px solid white;
+        }
+    
+        /* Animation for elements */
+        @keyframes fadeIn {
+            from { opacity: 0; transform: translateY(20px); }
+            to { opacity: 1; transform: translateY(0); }
+        }
+    
+        .animate {
+            animation: fadeIn 0.5s ease-out forwards;
+        }
+    
+        /* Add Orbitron font for futuristic style */
+        @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;500;700&display=swap');
+    </style>
+
+    <!-- Add Font Awesome for icons -->
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0-beta3/css/all.min.css">
 """, unsafe_allow_html=True)
 
 # App title
-st.markdown("<h1 class=\"main-header\">Tunisia Road Safety Navigator</h1>", unsafe_allow_html=True)
-st.markdown("<p class='animate' style='text-align: center; color: var(--text-secondary);'>Analyze road conditions, predict accident risks, and navigate safely across Tunisia. Now with voice alerts!</p>", unsafe_allow_html=True)
+def show_title():
+    st.markdown("<h1 class=\"main-header\">Tunisia Road Safety Navigator</h1>", unsafe_allow_html=True)
+    st.markdown("<p class='animate' style='text-align: center; color: var(--text-secondary);'>Analyze road conditions, predict accident risks, and navigate safely across Tunisia. Now with voice alerts!</p>", unsafe_allow_html=True)
 
 # Sidebar
-with st.sidebar:
-    st.image("https://upload.wikimedia.org/wikipedia/commons/c/ce/Flag_of_Tunisia.svg", width=150)
-    st.markdown("<h2 style='color: var(--primary); font-family: Orbitron, sans-serif;'>Navigation Settings</h2>", unsafe_allow_html=True)
-    app_mode = st.radio(
-        "Choose Mode:",
-        ["Single Route Analysis", "Multiple Routes Comparison"]
-    )
-    tts_enabled = st.checkbox("Enable Voice Alerts", value=True)
+def show_sidebar():
+    with st.sidebar:
+        st.image("https://upload.wikimedia.org/wikipedia/commons/c/ce/Flag_of_Tunisia.svg", width=150)
+        st.markdown("<h2 style='color: var(--primary); font-family: Orbitron, sans-serif;'>Navigation Settings</h2>", unsafe_allow_html=True)
+        app_mode = st.radio(
+            "Choose Mode:",
+            ["Single Route Analysis", "Multiple Routes Comparison"]
+        )
+        tts_enabled = st.checkbox("Enable Voice Alerts", value=True)
+    return app_mode, tts_enabled
 
-@st.cache_resource
-def load_models():
-    try:
-        weather_model = load_model("Accident_Severity_Prediction/weather_cnn_model.h5")
-        accident_model = ort.InferenceSession("Accident_Severity_Prediction/accident_severity_model.onnx")
-        return weather_model, accident_model
-    except Exception as e:
-        st.error(f"Error loading models: {str(e)}")
-        return None, None
-
-weather_model, accident_model = load_models()
+def show_route_map(start_coords, end_coords, current_ip_location_coords, routes=None, weather_info=None,
+                   severity=None):
+    # Rebuilt only when one of the inputs of create_map changes (routes by their geometry). The
+    # recommendation depends on the day's risk profiles, so it and the day are part of the key.
+    route_ids = [route.coords for route in routes or []]
+    best_route_index = evaluate_routes(routes, weather_info, severity) if routes else None
+    key = map_key("route_map", start_coords, end_coords, current_ip_location_coords, route_ids,
+                  weather_info, severity, best_route_index, datetime.now().toordinal(),
+                  ROUTE_DETAIL_ZOOM, MAP_ROUTE_POINT_BUDGET)
+    show_map(key, lambda: create_map(start_coords, end_coords, current_ip_location_coords, routes,
+                                     weather_info, severity, best_route_index=best_route_index),
+             width=1200, height=600)
 
 weather_labels_mapping = {0: 'Cloudy', 1: 'Foggy', 2: 'Rainy', 3: 'Shine', 4: 'Sunrise'}
 severity_mapping = {0: 'Medium', 1: 'High', 2: 'Critical'}
+severity_labels = np.array([severity_mapping[i] for i in range(len(severity_mapping))])
 risk_color_mapping = {
     'Medium': 'medium-risk',
     'High': 'high-risk',
@@ -255,76 +260,76 @@ severity_risk_weights = {
     'Critical': 4.0,  # Critical risk
     'Unknown': 2.0    # Unknown - default medium-high risk
 }
+# Same weights indexed by severity class, for vectorized lookups
+severity_class_weights = np.array([severity_risk_weights[label] for label in severity_labels])
+weather_classes_by_label = {label: cls for cls, label in weather_labels_mapping.items()}
 
 @st.cache_data(ttl=300)
 def get_current_location_cached():
     try:
         tunis_coords = (36.8065, 10.1815)
         location_name = "Tunis (Default)"
-        g = geocoder.ip('me')
+        g = registry.get("geocoder").ip('me')
         if g.latlng and 30 < g.latlng[0] < 38 and 7 < g.latlng[1] < 12:
-            loc_info = rg.search(g.latlng)[0]
+            loc_info = registry.get("reverse_index").search(g.latlng)[0]
             return g.latlng[0], g.latlng[1], loc_info.get('name', 'Current Location (Tunisia)')
         return tunis_coords[0], tunis_coords[1], location_name
     except Exception as e:
         return 36.8065, 10.1815, "Tunis (Default)"
 
+def load_image_batch(uploaded_images):
+    # Decoded at reduced scale, in parallel, into one (N, 128, 128, 3) float32 tensor (see image_pipeline)
+    batch, valid, errors = decode_image_batch(uploaded_images)
+    for error in errors:
+        if error is not None:
+            st.error(f"Error analyzing image: {error}")
+    return batch, valid
+
+def classify_weather_batch(batch, max_batch_size=WEATHER_MAX_BATCH_SIZE):
+    # Run the weather CNN over the batch in chunks of at most max_batch_size images
+    predictions = np.zeros((len(batch), len(weather_labels_mapping)), dtype=np.float32)
+    batch_timings = []
+    for start in range(0, len(batch), max_batch_size):
+        chunk = batch[start:start + max_batch_size]
+        started = time.perf_counter()
+        predictions[start:start + len(chunk)] = classify_weather(chunk)
+        batch_timings.append((len(chunk), (time.perf_counter() - started) * 1000))
+    return predictions, batch_timings
+
 def analyze_image(uploaded_image):
-    try:
-        image = Image.open(uploaded_image).resize((128, 128))
-        img_array = img_to_array(image) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
-        weather_pred = weather_model.predict(img_array)
-        weather_class = np.argmax(weather_pred)
-        weather_label = weather_labels_mapping.get(weather_class, "Unknown")
-        weather_confidence = np.max(weather_pred) * 100
-        return weather_label, weather_class, weather_confidence
-    except Exception as e:
-        st.error(f"Error analyzing image: {str(e)}")
-        return "Unknown", 0, 0
+    return analyze_multiple_images([uploaded_image])
+
+def predict_severity_classes(features):
+    # Served by the shared model server when configured, in-process otherwise
+    return predict_severity(features)
+
+def predict_accident_severity_batch(weather_classes, coords, when=None):
+    """Predict severity labels for many locations with a single ONNX call.
+
+    weather_classes is a single class or one class per coordinate, coords an
+    (n, 2) sequence of (latitude, longitude) and when the prediction time (now by default).
+    """
+    features = build_severity_features(weather_classes, coords, when)
+    return severity_labels[predict_severity_classes(features)]
 
 def predict_accident_severity(weather_class, location_coords):
     try:
-        current_date = datetime.now().toordinal()
-        current_day_of_week = datetime.now().weekday()
-        input_dict = {
-            'Day_of_Week': [current_day_of_week], 'Date': [current_date],
-            'Latitude': [location_coords[0]], 'Longitude': [location_coords[1]],
-            'Number_of_Casualties': [3], 'Number_of_Vehicles': [100],
-            'Road_Surface_Conditions': [2], 'Weather_Conditions': [weather_class]
-        }
-        input_df = pd.DataFrame(input_dict)
-        input_np = input_df.to_numpy().astype(np.float32)
-        input_name = accident_model.get_inputs()[0].name
-        output = accident_model.run(None, {input_name: input_np})[0]
-        severity_pred = int(np.argmax(output))
-        severity_label = severity_mapping.get(severity_pred, 'Unknown')
-        return severity_label
+        return str(predict_accident_severity_batch(weather_class, [location_coords])[0])
     except Exception as e:
         st.error(f"Error predicting accident severity: {str(e)}")
         return "Unknown"
 
 def get_routes(start_coords, end_coords, alternatives=True):
     try:
-        alt_param = "alternatives=true" if alternatives else "alternatives=false"
-        url = f"http://router.project-osrm.org/route/v1/driving/{start_coords[1]},{start_coords[0]};{end_coords[1]},{end_coords[0]}?{alt_param}&overview=full&steps=true"
-        response = requests.get(url, timeout=30)
-        data = response.json()
+        data = osrm_route(start_coords, end_coords, alternatives)
         if data.get('code') == 'Ok':
             routes_data = []
             colors = ['#1E90FF', '#32CD32', '#9932CC']
             weights = [5, 4, 3]
             for i, route_item in enumerate(data['routes']):
-                route_coords = polyline.decode(route_item['geometry'])
-                if route_coords:
-                    routes_data.append({
-                        'coords': route_coords,
-                        'distance': route_item['distance']/1000,
-                        'duration': route_item['duration']/60,
-                        'color': colors[i % len(colors)],
-                        'weight': weights[i % len(weights)],
-                        'steps': route_item.get('steps', [])
-                    })
+                route = Route.from_osrm(route_item, colors[i % len(colors)], weights[i % len(weights)])
+                if len(route.coords):
+                    routes_data.append(route)
             return routes_data if routes_data else None
         else:
             st.warning(f"Could not find routes from OSRM. Response: {data.get('message', data.get('code'))}")
@@ -333,6 +338,33 @@ def get_routes(start_coords, end_coords, alternatives=True):
         st.error(f"Routing error: {str(e)}")
         return None
 
+@st.cache_data(max_entries=256)
+def sample_route(coords, spacing_m=ROUTE_SAMPLE_SPACING_M):
+    # Resample a route geometry (int32, scaled by COORD_SCALE) at a fixed spacing (cached per geometry)
+    return resample_polyline(coords / float(COORD_SCALE), spacing_m)
+
+@st.cache_data(max_entries=256)
+def route_risk_profile(coords, weather_class, day_ordinal, spacing_m=ROUTE_SAMPLE_SPACING_M):
+    """Severity class at every sample along a route.
+
+    Read from the precomputed raster when available, otherwise scored in one batched ONNX call.
+    day_ordinal keys the cache, so that profiles are recomputed when the date changes.
+    Returns the sample coordinates, their severity classes and the length of route each
+    sample stands for, in km.
+    """
+    samples, piece_length_m = sample_route(coords, spacing_m)
+    raster = registry.get("severity_raster")
+    if raster is not None and raster.covers(samples[:, 0], samples[:, 1]).all():
+        classes = raster.lookup_coords(samples, weather_class, datetime.fromordinal(day_ordinal).weekday())
+    else:
+        classes = predict_severity_classes(build_severity_features(weather_class, samples))
+    return samples, classes, piece_length_m / 1000
+
+def route_mean_risk(route, weather_class):
+    # Average severity risk weight along the route; samples stand for equal lengths of road
+    _, classes, _ = route_risk_profile(route.coords, weather_class, datetime.now().toordinal())
+    return float(severity_class_weights[classes].mean())
+
 def evaluate_routes(routes, weather_info, severity):
     if not routes or not weather_info or not severity:
         return 0  # Default to first route if insufficient data
@@ -340,20 +372,26 @@ def evaluate_routes(routes, weather_info, severity):
     weather_label, weather_confidence = weather_info
     weather_risk = weather_risk_weights.get(weather_label, weather_risk_weights['Unknown'])
     severity_risk = severity_risk_weights.get(severity, severity_risk_weights['Unknown'])
+    weather_class = weather_classes_by_label.get(weather_label, 0)
     
     # Calculate a score for each route (lower score is better)
     route_scores = []
     for i, route in enumerate(routes):
         # Base factors: distance and duration
-        distance_factor = route['distance'] / 10  # Normalize distance (in km)
-        duration_factor = route['duration'] / 60  # Normalize duration (in minutes)
+        distance_factor = route.distance / 10  # Normalize distance (in km)
+        duration_factor = route.duration / 60  # Normalize duration (in minutes)
         
-        # Risk factor based on weather and accident severity
-        risk_factor = weather_risk * severity_risk
+        # Severity risk integrated along the route (weight x km); falls back to the
+        # risk predicted at the current location if the route cannot be scored
+        try:
+            mean_risk = route_mean_risk(route, weather_class)
+        except Exception:
+            mean_risk = severity_risk
+        integrated_risk = mean_risk * route.distance
         
         # Final score (weighted combination of factors)
-        # Higher risk penalizes longer routes more
-        score = (distance_factor * 0.3 + duration_factor * 0.2) * risk_factor
+        # With a uniform severity this reduces to (distance*0.3 + duration*0.2) * weather * severity
+        score = (integrated_risk / 10 * 0.3 + duration_factor * 0.2 * mean_risk) * weather_risk
         
         route_scores.append((i, score))
     
@@ -363,7 +401,11 @@ def evaluate_routes(routes, weather_info, severity):
     # Return index of best route
     return route_scores[0][0]
 
-def create_map(start_coords, end_coords, current_ip_location_coords, routes=None, weather_info=None, severity=None):
+def create_map(start_coords, end_coords, current_ip_location_coords, routes=None, weather_info=None, severity=None,
+               detail_zoom=ROUTE_DETAIL_ZOOM, point_budget=MAP_ROUTE_POINT_BUDGET, best_route_index=None):
+    folium = registry.get("folium")
+    from branca.element import MacroElement
+    from jinja2 import Template
     if start_coords and end_coords:
         center_lat = (start_coords[0] + end_coords[0]) / 2
         center_lon = (start_coords[1] + end_coords[1]) / 2
@@ -400,25 +442,35 @@ def create_map(start_coords, end_coords, current_ip_location_coords, routes=None
         folium.Marker(end_coords, tooltip="Route Destination", popup=f"Route Destination: {end_coords[0]:.4f}, {end_coords[1]:.4f}", icon=folium.Icon(color='red', icon='stop')).add_to(m)
 
     if routes:
-        # Evaluate routes and get index of best route
-        best_route_index = evaluate_routes(routes, weather_info, severity)
+        # Evaluate routes and get index of best route (unless the caller already did)
+        if best_route_index is None:
+            best_route_index = evaluate_routes(routes, weather_info, severity)
+        
+        # Drop vertices that would not show at detail_zoom, within one point budget for all routes;
+        # 5 decimals (about 1 m) is the precision of OSRM geometries
+        if detail_zoom is not None:
+            tolerance = meters_per_pixel(detail_zoom, center_lat)
+            display_coords = simplify_polylines([r.latlon() for r in routes], tolerance, point_budget)
+        else:
+            display_coords = [r.latlon() for r in routes]
+        display_coords = [np.round(coords, 5).tolist() for coords in display_coords]
         
         for i, route_item in enumerate(routes):
             is_best_route = (i == best_route_index)
             
             # Modify appearance of recommended route
-            route_color = '#FF006E' if is_best_route else route_item['color']
-            route_weight = 7 if is_best_route else route_item['weight']
+            route_color = '#FF006E' if is_best_route else route_item.color
+            route_weight = 7 if is_best_route else route_item.weight
             route_opacity = 1.0 if is_best_route else 0.8
             
             # Create more informative tooltip
-            tooltip = f"{'RECOMMENDED ROUTE: ' if is_best_route else 'Option: '}{route_item['distance']:.1f} km, {route_item['duration']:.1f} min"
+            tooltip = f"{'RECOMMENDED ROUTE: ' if is_best_route else 'Option: '}{route_item.distance:.1f} km, {route_item.duration:.1f} min"
             if is_best_route and weather_info and severity:
                 tooltip += f"\nConditions: {weather_info[0]}, Risk: {severity}"
             
             # Add route to map
             route_line = folium.PolyLine(
-                route_item['coords'], 
+                display_coords[i], 
                 color=route_color, 
                 weight=route_weight, 
                 opacity=route_opacity, 
@@ -431,40 +483,43 @@ def create_map(start_coords, end_coords, current_ip_location_coords, routes=None
                 # Add marker at start of route that will be moved
                 route_marker_id = f"route_marker_{i}"
                 folium.Marker(
-                    route_item['coords'][0],
+                    route_item.start(),
                     tooltip="Your position on the route",
                     icon=folium.Icon(color='blue', icon='car', prefix='fa'),
                     popup="Automatically moving along recommended route"
                 ).add_to(m)
                 
-                # Add script to move marker along route
-                route_coords_js = [[lat, lng] for lat, lng in route_item['coords']]
+                # Move the marker along the vertices of the route line itself (no second copy of
+                # the coordinates in the page), in at most ROUTE_ANIMATION_STEPS moves
                 js_code = f"""
-                <script>
-                // Function to move marker along route
-                var routeCoords = {route_coords_js};
-                var currentIdx = 0;
-                var movingMarker = L.marker(routeCoords[0], {{
-                    icon: L.divIcon({{
-                        html: '<i class="fa fa-car" style="color:#3a86ff;font-size:24px;"></i>',
-                        iconSize: [24, 24],
-                        className: 'moving-marker'
-                    }})
-                }}).addTo(map);
-                
-                function moveMarker() {{
-                    if (currentIdx < routeCoords.length - 1) {{
-                        currentIdx++;
-                        movingMarker.setLatLng(routeCoords[currentIdx]);
-                        setTimeout(moveMarker, 300);  // Movement speed
+                (function() {{
+                    var routeCoords = {route_line.get_name()}.getLatLngs();
+                    var stride = Math.max(1, Math.ceil(routeCoords.length / {ROUTE_ANIMATION_STEPS}));
+                    var currentIdx = 0;
+                    var movingMarker = L.marker(routeCoords[0], {{
+                        icon: L.divIcon({{
+                            html: '<i class="fa fa-car" style="color:#3a86ff;font-size:24px;"></i>',
+                            iconSize: [24, 24],
+                            className: 'moving-marker'
+                        }})
+                    }}).addTo({m.get_name()});
+                    
+                    function moveMarker() {{
+                        if (currentIdx < routeCoords.length - 1) {{
+                            currentIdx = Math.min(currentIdx + stride, routeCoords.length - 1);
+                            movingMarker.setLatLng(routeCoords[currentIdx]);
+                            setTimeout(moveMarker, 300);  // Movement speed
+                        }}
                     }}
-                }}
-                
-                // Start movement after 2 seconds
-                setTimeout(moveMarker, 2000);
-                </script>
+                    
+                    // Start movement after 2 seconds
+                    setTimeout(moveMarker, 2000);
+                }})();
                 """
-                m.get_root().html.add_child(folium.Element(js_code))
+                # Rendered as a map child so that it runs after the route line is defined
+                animation = MacroElement()
+                animation._template = Template("{% macro script(this, kwargs) %}" + js_code + "{% endmacro %}")
+                animation.add_to(m)
     elif start_coords and end_coords:
         folium.PolyLine([start_coords, end_coords], color='gray', weight=3, opacity=0.8, dash_array='5, 5', tooltip="Direct line (no OSRM route found)").add_to(m)
     
@@ -487,25 +542,61 @@ def create_map(start_coords, end_coords, current_ip_location_coords, routes=None
     folium.LayerControl().add_to(m)
     return m
 
-def analyze_multiple_images(uploaded_images):
-    weather_classes, weather_labels, weather_confidences = [], [], []
-    for i, img_file in enumerate(uploaded_images):
-        weather_label, weather_class, weather_confidence = analyze_image(img_file)
-        weather_classes.append(weather_class)
-        weather_labels.append(weather_label)
-        weather_confidences.append(weather_confidence)
+# Class probabilities of every image already classified, shared by all sessions: reruns
+# and other users uploading the same file never reach the CNN again
+weather_image_cache = TTLCache("weather_images", maxsize=WEATHER_RESULT_CACHE_SIZE,
+                               maxbytes=WEATHER_RESULT_CACHE_MAX_BYTES,
+                               sizeof=lambda key, probs: len(key[0]) + len(key[1]) + probs.nbytes + 100)
+
+def image_cache_key(uploaded_image):
+    # Hash of the uploaded bytes, plus the model that produced the result
+    # getbuffer() hashes the upload in place, without copying it
+    data = uploaded_image.getbuffer() if hasattr(uploaded_image, "getbuffer") else uploaded_image.read()
+    if hasattr(uploaded_image, "seek"):
+        uploaded_image.seek(0)
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    return digest, f"{resolve_weather_backend()}-{WEATHER_MODEL_PRECISION}"
+
+def analyze_multiple_images(uploaded_images, max_batch_size=WEATHER_MAX_BATCH_SIZE):
+    if not uploaded_images:
+        return "Unknown", 0, 0
     
-    # Determine dominant weather class
-    if weather_classes:
+    keys = [image_cache_key(img_file) for img_file in uploaded_images]
+    cached = [weather_image_cache.get(key) for key in keys]
+    missing = [i for i, probs in enumerate(cached) if probs is None]
+    predictions = np.zeros((len(uploaded_images), len(weather_labels_mapping)), dtype=np.float32)
+    valid = np.ones(len(uploaded_images), dtype=bool)
+    for i, probs in enumerate(cached):
+        if probs is not None:
+            predictions[i] = probs
+    
+    # Only images never seen before are decoded and classified
+    batch_timings = []
+    if missing:
+        batch, missing_valid = load_image_batch([uploaded_images[i] for i in missing])
         try:
-            dominant_class = mode(weather_classes)
-            dominant_label = weather_labels_mapping.get(dominant_class, "Unknown")
-            avg_confidence = sum(weather_confidences) / len(weather_confidences)
-            return dominant_label, dominant_class, avg_confidence
-        except:
-            # If mode() fails (e.g., multiple modes), take first class
-            return weather_labels[0], weather_classes[0], weather_confidences[0]
-    return "Unknown", 0, 0
+            missing_predictions, batch_timings = classify_weather_batch(batch, max_batch_size)
+        except Exception as e:
+            st.error(f"Error analyzing image: {str(e)}")
+            return "Unknown", 0, 0
+        predictions[missing] = missing_predictions
+        valid[missing] = missing_valid
+        for i, probs, ok in zip(missing, missing_predictions, missing_valid):
+            if ok:
+                weather_image_cache.set(keys[i], probs.copy())
+    st.session_state.weather_batch_timings = batch_timings
+    
+    # Images that could not be decoded count as class 0 with no confidence
+    weather_classes = np.where(valid, np.argmax(predictions, axis=1), 0)
+    weather_confidences = np.where(valid, np.max(predictions, axis=1) * 100, 0.0)
+    
+    # Determine dominant weather class (on ties, keep the first class seen, like statistics.mode)
+    counts = np.bincount(weather_classes, minlength=len(weather_labels_mapping))
+    is_dominant = counts[weather_classes] == counts.max()
+    dominant_class = int(weather_classes[np.argmax(is_dominant)])
+    dominant_label = weather_labels_mapping.get(dominant_class, "Unknown")
+    avg_confidence = float(weather_confidences.mean())
+    return dominant_label, dominant_class, avg_confidence
 
 def get_safety_advice(severity):
     if severity == "Critical":
@@ -518,40 +609,72 @@ def get_safety_advice(severity):
         return "Unknown conditions. Drive carefully."
 
 def generate_audio_player(text):
-    try:
-        # Create temporary file for audio
-        temp_dir = tempfile.gettempdir()
-        audio_file = os.path.join(temp_dir, f"audio_{uuid.uuid4()}.mp3")
-        
-        # Generate audio with gTTS
-        tts = gTTS(text=text, lang='en', slow=False)
-        tts.save(audio_file)
-        
-        # Read audio file and encode in base64
-        with open(audio_file, "rb") as f:
-            audio_bytes = f.read()
-        audio_b64 = base64.b64encode(audio_bytes).decode()
-        
-        # Create HTML audio player
-        audio_player = f"""
-        <div class="audio-container">
-            <audio controls autoplay style="width: 100%;">
-                <source src="data:audio/mp3;base64,{audio_b64}" type="audio/mp3">
-                Your browser does not support the audio element.
-            </audio>
-            <div style="font-size: 0.8rem; color: var(--text-secondary);">Automatic voice message</div>
-        </div>
-        """
-        
-        # Delete temporary file
-        os.remove(audio_file)
-        
-        return audio_player
-    except Exception as e:
-        st.error(f"Error generating audio: {str(e)}")
-        return ""
+    # Reserve the player's place; the MP3 is synthesized in the background and filled in by
+    # render_voice_alerts() at the end of the run, so the rest of the page is not held up
+    placeholder = st.empty()
+    audio = cached_audio(text)
+    if audio is not None:
+        show_audio_player(placeholder, audio)
+        return
+    placeholder.caption("Preparing voice message...")
+    # cached_audio() has just missed both caches: the background job goes straight to synthesis
+    st.session_state.setdefault("pending_voice_alerts", []).append((placeholder, request_audio(text, lookup=False)))
+
+def show_audio_player(placeholder, audio):
+    # Served as bytes through Streamlit's media endpoint rather than inlined as base64
+    with placeholder.container():
+        st.audio(audio, format="audio/mp3")
+        st.caption("Automatic voice message")
+
+def render_voice_alerts():
+    pending = st.session_state.pop("pending_voice_alerts", [])
+    for placeholder, future in pending:
+        try:
+            show_audio_player(placeholder, future.result(timeout=VOICE_ALERT_TIMEOUT))
+        except Exception as e:
+            placeholder.error(f"Error generating audio: {str(e)}")
+
+def use_destination_suggestion():
+    # Copy the chosen autocomplete entry into the destination field
+    if st.session_state.destination_suggestion != "-":
+        st.session_state.destination_input = st.session_state.destination_suggestion
+    st.session_state.destination_suggestion = "-"
+
+def show_cache_stats():
+    # Hit/miss counters of the process-wide caches and load time of each component, shared by every session
+    with st.sidebar.expander("Cache statistics"):
+        for name, stats in cache_stats().items():
+            st.write(f"**{name}**: {stats['hits']} hits, {stats['misses']} misses "
+                     f"({stats['hit_rate'] * 100:.0f}%), {stats['size']} entries"
+                     + (f", {stats['bytes'] / 1024:.0f} KB" if stats['bytes'] else "")
+                     + (f", {stats['stale_hits']} stale, {stats['coalesced']} coalesced, fetch "
+                        f"p50 {stats['fetch_ms_p50']:.0f} ms / p95 {stats['fetch_ms_p95']:.0f} ms"
+                        if 'fetch_ms_p95' in stats else ""))
+        updates = map_update_stats()
+        if updates["updates"]:
+            st.write(f"**Dashboard position → map**: {updates['updates']} moves, "
+                     f"p50 {updates['ms_p50']:.1f} ms / p95 {updates['ms_p95']:.1f} ms")
+        for name, seconds in registry.load_times.items():
+            st.write(f"**{name}** loaded in {seconds * 1000:.0f} ms")
+        client = get_client()
+        if client.enabled:
+            st.write(f"**Model server** {client.address}: {client.stats['remote']} remote, "
+                     f"{client.stats['local']} local requests, {client.stats['failures']} failures")
+        state = warmup_state()
+        if state["finished"]:
+            for name, timings in state["timings"].items():
+                runs = ", ".join(f"batch {size}: {ms[0]:.0f} → {ms[-1]:.0f} ms" for size, ms in timings.items())
+                st.write(f"**{name}** warm-up: {runs or 'skipped'}")
+            for name, error in state["errors"].items():
+                st.write(f"**{name}** warm-up failed: {error}")
+        elif state["started"]:
+            st.write("Model warm-up in progress")
 
 def main():
+    apply_styles()
+    show_title()
+    app_mode, tts_enabled = show_sidebar()
+    
     # Initialize session variables
     if 'last_osrm_start_coords' not in st.session_state:
         st.session_state.last_osrm_start_coords = None
@@ -565,6 +688,10 @@ def main():
         st.session_state.last_severity = None
     if 'best_route_index' not in st.session_state:
         st.session_state.best_route_index = 0
+    # Voice alerts of an interrupted run belong to placeholders that are gone
+    st.session_state.pending_voice_alerts = []
+    
+    show_cache_stats()
     
     # Get current IP location
     current_ip_lat, current_ip_lon, current_ip_location_name = get_current_location_cached()
@@ -596,6 +723,11 @@ def main():
                 severity = predict_accident_severity(weather_class, (current_ip_lat, current_ip_lon))
                 st.session_state.last_severity = severity
                 
+                batch_timings = st.session_state.get('weather_batch_timings', [])
+                if batch_timings:
+                    st.caption(f"Weather model: {len(uploaded_images)} image(s) in {len(batch_timings)} batch(es), "
+                               f"{sum(ms for _, ms in batch_timings):.0f} ms")
+                
                 st.write(f"""<div><i class="fa-solid fa-cloud"></i> Detected weather conditions: **{weather_label}** (Confidence: {weather_confidence:.1f}%)</div> """, unsafe_allow_html=True)
                 st.write(f"""<div><i class="fa-solid fa-circle-exclamation" style="color: red;"></i> Predicted accident risk level: <span class='{risk_color_mapping.get(severity, '')}'>{severity}</span></div>  """, unsafe_allow_html=True)
                 st.write(f"""<div><i class="fa-solid fa-lightbulb" style="color: yellow;"></i>**{get_safety_advice(severity)}**</div> """, unsafe_allow_html=True)
@@ -603,8 +735,7 @@ def main():
                 # Generate audio message for voice alerts
                 if tts_enabled:
                     safety_speech = f"Road safety alert. Detected weather conditions: {weather_label}. Accident risk level: {severity}. {get_safety_advice(severity)}"
-                    safety_audio = generate_audio_player(safety_speech)
-                    st.markdown(safety_audio, unsafe_allow_html=True)
+                    generate_audio_player(safety_speech)
         else:
             st.info("Please upload images of current weather conditions for analysis.")
         st.markdown("</div>", unsafe_allow_html=True)
@@ -636,7 +767,15 @@ def main():
     # Create a container for the destination input that won't be overlapped by the map
     with st.container():
         st.markdown("<div class='info-box'>", unsafe_allow_html=True)
-        destination_input = st.text_input("Enter your destination in Tunisia", "Hammamet, Tunisia")
+        if 'destination_input' not in st.session_state:
+            st.session_state.destination_input = "Hammamet, Tunisia"
+        destination_input = st.text_input("Enter your destination in Tunisia", key="destination_input")
+        
+        # Autocomplete from the offline gazetteer
+        suggestions = [name for name in suggest_places(destination_input) if name.lower() != destination_input.lower()]
+        if suggestions and destination_input.strip():
+            st.selectbox("Suggestions", ["-"] + suggestions, key="destination_suggestion",
+                         on_change=use_destination_suggestion)
         st.markdown("</div>", unsafe_allow_html=True)
     
     # Create a separate container for the map with some top margin
@@ -648,11 +787,10 @@ def main():
             st.session_state.last_routes_data = None
             st.session_state.last_osrm_dest_coords = None
             with st.spinner("Finding routes..."):
-                geolocator = Nominatim(user_agent="tunisia_road_safety_app_gtts_v1")
                 try:
-                    dest_location_obj = geolocator.geocode(f"{destination_input}, Tunisia")
-                    if dest_location_obj:
-                        dest_lat, dest_lon = dest_location_obj.latitude, dest_location_obj.longitude
+                    dest_location = geocode(f"{destination_input}, Tunisia")
+                    if dest_location:
+                        dest_lat, dest_lon = dest_location[0], dest_location[1]
                         st.session_state.last_osrm_dest_coords = (dest_lat, dest_lon)
                         routes_data = get_routes(st.session_state.last_osrm_start_coords, st.session_state.last_osrm_dest_coords)
                         st.session_state.last_routes_data = routes_data
@@ -664,7 +802,7 @@ def main():
                         
                         if routes_data:
                             # Create map with white background
-                            m = create_map(
+                            show_route_map(
                                 st.session_state.last_osrm_start_coords, 
                                 st.session_state.last_osrm_dest_coords, 
                                 (current_ip_lat, current_ip_lon), 
@@ -672,7 +810,6 @@ def main():
                                 st.session_state.last_weather_info, 
                                 st.session_state.last_severity
                             )
-                            folium_static(m, width=1200, height=600)
                             
                             # Display route details with highlighting of best route
                             st.markdown("<h3 class=\"sub-header\">Route Details</h3>", unsafe_allow_html=True)
@@ -684,8 +821,8 @@ def main():
                                 st.markdown(f"<div class='{route_class}'>", unsafe_allow_html=True)
                                 route_title = f"{'[RECOMMENDED] RECOMMENDED ROUTE' if is_best_route else f'Option {i+1}'}"
                                 st.markdown(f"### {route_title}")
-                                st.write(f"<span class='icon-road'>[DISTANCE]</span> Distance: **{route['distance']:.1f} km**", unsafe_allow_html=True)
-                                st.write(f"<span class='icon-time'>[DURATION]</span> Estimated duration: **{route['duration']:.1f} minutes**", unsafe_allow_html=True)
+                                st.write(f"<span class='icon-road'>[DISTANCE]</span> Distance: **{route.distance:.1f} km**", unsafe_allow_html=True)
+                                st.write(f"<span class='icon-time'>[DURATION]</span> Estimated duration: **{route.duration:.1f} minutes**", unsafe_allow_html=True)
                                 
                                 if is_best_route and st.session_state.last_weather_info and st.session_state.last_severity:
                                     weather_label, confidence = st.session_state.last_weather_info
@@ -695,9 +832,8 @@ def main():
                                     
                                     # Generate audio message for recommended route
                                     if is_best_route:
-                                        route_speech = f"Recommended route found. Distance: {route['distance']:.1f} kilometers. Estimated duration: {route['duration']:.1f} minutes. Weather conditions: {weather_label}. {get_safety_advice(st.session_state.last_severity)}"
-                                        route_audio = generate_audio_player(route_speech)
-                                        st.markdown(route_audio, unsafe_allow_html=True)
+                                        route_speech = f"Recommended route found. Distance: {route.distance:.1f} kilometers. Estimated duration: {route.duration:.1f} minutes. Weather conditions: {weather_label}. {get_safety_advice(st.session_state.last_severity)}"
+                                        generate_audio_player(route_speech)
                                 
                                 st.markdown("</div>", unsafe_allow_html=True)
                                 st.markdown("<br>", unsafe_allow_html=True)
@@ -709,7 +845,7 @@ def main():
                             The recommended route is selected based on several factors:
                             - **Distance and duration** of the trip
                             - Current **weather conditions** (higher risk: fog, rain)
-                            - Predicted **accident risk level** for the area
+                            - Predicted **accident risk level** at regular intervals along each route
                             
                             Our algorithm calculates a risk score for each route and recommends the one that offers the best balance between safety and efficiency.
                             """)
@@ -723,7 +859,7 @@ def main():
         
         # Display map with previous data if available
         elif st.session_state.last_osrm_start_coords and st.session_state.last_osrm_dest_coords and st.session_state.last_routes_data:
-            m = create_map(
+            show_route_map(
                 st.session_state.last_osrm_start_coords, 
                 st.session_state.last_osrm_dest_coords, 
                 (current_ip_lat, current_ip_lon), 
@@ -731,14 +867,15 @@ def main():
                 st.session_state.last_weather_info, 
                 st.session_state.last_severity
             )
-            folium_static(m, width=1200, height=600)
         else:
             # Display map centered on current IP location
-            m = create_map(None, None, (current_ip_lat, current_ip_lon))
-            folium_static(m, width=1200, height=600)
+            show_route_map(None, None, (current_ip_lat, current_ip_lon))
         
         st.markdown("</div>", unsafe_allow_html=True)
     st.markdown("</div>", unsafe_allow_html=True)  # Close main container with animation
+    
+    # Voice alerts last, once everything else is on the page
+    render_voice_alerts()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
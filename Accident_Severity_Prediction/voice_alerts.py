@@ -0,0 +1,112 @@
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from caching import TTLCache
+from component_registry import registry
+from settings import (VOICE_CACHE_DIR, VOICE_CACHE_MAX_BYTES, VOICE_CACHE_SIZE, VOICE_DISK_MAX_BYTES,
+                      VOICE_SYNTHESIS_WORKERS)
+
+# Alert texts come from a handful of templates, so most of them are synthesized only once
+audio_cache = TTLCache("voice_alerts", maxsize=VOICE_CACHE_SIZE, maxbytes=VOICE_CACHE_MAX_BYTES,
+                       sizeof=lambda key, audio: len(audio) + len(key[0]))
+
+_executor = ThreadPoolExecutor(max_workers=VOICE_SYNTHESIS_WORKERS, thread_name_prefix="voice-alert")
+_pending = {}
+_pending_lock = threading.Lock()
+_disk_lock = threading.Lock()
+
+def _disk_path(text, lang):
+    digest = hashlib.blake2b(f"{lang}\n{text}".encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(VOICE_CACHE_DIR, f"{digest}.mp3")
+
+def _read_disk(text, lang):
+    path = _disk_path(text, lang)
+    try:
+        with open(path, "rb") as f:
+            audio = f.read()
+        os.utime(path)  # the modification time orders eviction
+        return audio
+    except OSError:
+        return None
+
+def _write_disk(text, lang, audio):
+    path = _disk_path(text, lang)
+    try:
+        os.makedirs(VOICE_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+        _evict_disk()
+    except OSError:
+        pass  # read-only cache directory: the memory cache still applies
+
+def _evict_disk():
+    # Least recently used files first, until the directory fits in VOICE_DISK_MAX_BYTES
+    with _disk_lock:
+        entries = []
+        with os.scandir(VOICE_CACHE_DIR) as it:
+            for entry in it:
+                if entry.name.endswith(".mp3"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= VOICE_DISK_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+def synthesize(text, lang="en"):
+    """MP3 bytes of text spoken in lang, from the memory cache, the disk cache or gTTS."""
+    audio = audio_cache.get((text, lang))
+    if audio is not None:
+        return audio
+    return _load_or_generate(text, lang)
+
+def _load_or_generate(text, lang):
+    # Disk cache, then gTTS; the memory cache is not looked up (nor counted) here
+    audio = _read_disk(text, lang)
+    if audio is None:
+        buffer = io.BytesIO()
+        registry.get("gtts").gTTS(text=text, lang=lang, slow=False).write_to_fp(buffer)
+        audio = buffer.getvalue()
+        _write_disk(text, lang, audio)
+    audio_cache.set((text, lang), audio)
+    return audio
+
+def cached_audio(text, lang="en"):
+    # Bytes if already synthesized, without blocking; None otherwise
+    audio = audio_cache.get((text, lang))
+    if audio is None:
+        audio = _read_disk(text, lang)
+        if audio is not None:
+            audio_cache.set((text, lang), audio)
+    return audio
+
+def request_audio(text, lang="en", lookup=True):
+    """Future of the MP3 bytes, synthesized in the background; concurrent requests for one text share it.
+
+    lookup=False skips the memory cache, for callers that just missed it in cached_audio(),
+    so that one request counts one miss.
+    """
+    key = (text, lang)
+    with _pending_lock:
+        future = _pending.get(key)
+        if future is not None:
+            return future
+        future = _executor.submit(synthesize if lookup else _load_or_generate, text, lang)
+        _pending[key] = future
+    # Outside the lock: the callback runs right away if synthesis already finished
+    future.add_done_callback(lambda _: _forget(key))
+    return future
+
+def _forget(key):
+    with _pending_lock:
+        _pending.pop(key, None)
@@ -0,0 +1,107 @@
+"""Model warm-up and readiness flag.
+
+The first inference of a freshly loaded model pays graph tracing (Keras) or kernel
+initialization (onnxruntime). start_warmup() loads both models through the registry
+and runs dummy batches of the served sizes in a background thread, then writes
+READINESS_PATH, which healthcheck.py polls so that traffic only reaches warmed replicas.
+A replica whose models failed to load stays unready; the errors are kept in the file.
+"""
+import json
+import os
+import threading
+import time
+import numpy as np
+
+from component_registry import registry
+from model_client import LOCAL_HANDLERS, classify_weather, get_client, predict_severity
+from model_runtime import WEATHER_INPUT_SHAPE, build_severity_features
+from settings import (MODEL_WARMUP, READINESS_PATH, WARMUP_SEVERITY_BATCH_SIZES,
+                      WARMUP_WEATHER_BATCH_SIZES)
+
+# Each batch size is run twice: the first pass is the cold one, the second should be at steady state
+WARMUP_RUNS = 2
+
+_state = {"ready": False, "started": None, "finished": None, "timings": {}, "errors": {}}
+_thread = None
+_thread_lock = threading.Lock()
+
+def _weather_inputs(batch_size):
+    return np.zeros((batch_size, *WEATHER_INPUT_SHAPE), dtype=np.float32)
+
+def _severity_inputs(batch_size):
+    # Coordinates spread over Tunisia and every weather class, like a scored route
+    coords = np.column_stack((np.linspace(33.0, 37.0, batch_size), np.linspace(8.0, 11.0, batch_size)))
+    return build_severity_features(np.arange(batch_size) % 5, coords)
+
+def run_warmup(local=False):
+    """Warm both models at the configured batch sizes; returns {component: {batch: [ms, ...]}}.
+
+    Requests go through model_client, so with a model server configured they warm (and
+    check) the server; local=True runs the in-process models, as the server itself does.
+    """
+    handlers = LOCAL_HANDLERS if local else {"weather": classify_weather, "severity": predict_severity}
+    steps = (("weather_model", handlers["weather"], _weather_inputs, WARMUP_WEATHER_BATCH_SIZES),
+             ("severity_model", handlers["severity"], _severity_inputs, WARMUP_SEVERITY_BATCH_SIZES))
+    for component, predict, make_inputs, batch_sizes in steps:
+        timings = {}
+        try:
+            if local or not get_client().remote_available():
+                # Loading time is recorded by the registry; only inference is timed here
+                registry.get(component)
+            for batch_size in batch_sizes:
+                inputs = make_inputs(batch_size)
+                runs = []
+                for _ in range(WARMUP_RUNS):
+                    started = time.perf_counter()
+                    predict(inputs)
+                    runs.append(round((time.perf_counter() - started) * 1000, 2))
+                timings[batch_size] = runs
+        except Exception as e:
+            # A model that cannot be loaded is reported, not retried, and keeps the replica unready
+            _state["errors"][component] = f"{type(e).__name__}: {e}"
+        _state["timings"][component] = timings
+    return _state["timings"]
+
+def write_readiness(path=READINESS_PATH):
+    state = dict(_state, pid=os.getpid(), load_times=registry.load_times)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+def clear_readiness(path=READINESS_PATH):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _warmup_thread():
+    try:
+        if MODEL_WARMUP:
+            run_warmup()
+    except Exception as e:
+        _state["errors"]["warmup"] = f"{type(e).__name__}: {e}"
+    finally:
+        _state["ready"] = not _state["errors"]
+        _state["finished"] = time.time()
+        try:
+            write_readiness()
+        except OSError:
+            pass
+
+def start_warmup():
+    """Start the warm-up once per process; later calls return the running thread."""
+    global _thread
+    with _thread_lock:
+        if _thread is None:
+            clear_readiness()
+            _state["started"] = time.time()
+            _thread = threading.Thread(target=_warmup_thread, name="model-warmup", daemon=True)
+            _thread.start()
+        return _thread
+
+def is_ready():
+    return _state["ready"]
+
+def warmup_state():
+    return _state
@@ -0,0 +1,212 @@
+"""Weather shared by every dashboard session, refreshed in the background.
+
+Locations are grouped into geohash cells (WEATHER_GEOHASH_PRECISION). A single scheduler thread per
+process refreshes every cell a session has read in the last WEATHER_CELL_IDLE_TIMEOUT
+seconds, every WEATHER_REFRESH_INTERVAL seconds, into a versioned store. Page runs only
+read the store, so a refresh is paid once per cell, not once per viewer. When a cell's
+version moves, the sessions showing it are rerun from the server, so idle viewers see
+new weather without polling and cost nothing while it does not change.
+
+    python Accident_Severity_Prediction/weather_refresh.py bench [--viewers 50]
+"""
+import argparse
+import threading
+import time
+
+from geo_utils import geohash, geohash_center
+from settings import WEATHER_CELL_IDLE_TIMEOUT, WEATHER_GEOHASH_PRECISION, WEATHER_REFRESH_INTERVAL
+
+def rerun_session(session_id):
+    """Ask Streamlit to rerun a session's script, from any thread; False when the session is gone."""
+    from streamlit.runtime import Runtime
+
+    if not Runtime.exists():
+        return False
+    runtime = Runtime.instance()
+    info = runtime._session_mgr.get_active_session_info(session_id)
+    if info is None:
+        return False
+    # Sessions are driven from the server's event loop; None reruns with the current widget values
+    runtime._get_async_objs().eventloop.call_soon_threadsafe(info.session.request_rerun, None)
+    return True
+
+class WeatherRefresher:
+    """Versioned per-cell weather store, kept fresh by a daemon thread started on first use."""
+
+    def __init__(self, fetch, interval=WEATHER_REFRESH_INTERVAL, precision=WEATHER_GEOHASH_PRECISION,
+                 idle_timeout=WEATHER_CELL_IDLE_TIMEOUT, notify=rerun_session):
+        # fetch(lat, lon, refresh) -> weather dict, or None when unavailable; refresh is True on
+        # scheduled refreshes, so that a cache in front of the provider does not answer them
+        self.fetch = fetch
+        self.interval = interval
+        self.precision = precision
+        self.idle_timeout = idle_timeout
+        # notify(session_id) -> False when the session is gone; called when its cell's version moves
+        self.notify = notify
+        self._store = {}  # cell -> (version, weather)
+        self._last_read = {}  # cell -> monotonic time of the last read by a session
+        self._watchers = {}  # session id -> cell it displays, until it is notified once
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {"reads": 0, "refreshes": 0, "errors": 0, "notified": 0, "cpu_seconds": 0.0}
+
+    def cell(self, lat, lon):
+        return geohash(lat, lon, self.precision)
+
+    def get(self, lat, lon, session_id=None):
+        """(version, weather) of the cell containing (lat, lon).
+
+        The first read of a cell fetches it in the calling thread; later reads never block
+        on the network. Versions start at 1 and grow each time the cell's weather changes.
+        With a session_id, that session is notified once the version moves (each read re-arms it).
+        """
+        cell = self.cell(lat, lon)
+        with self._lock:
+            self._last_read[cell] = time.monotonic()
+            if session_id is not None:
+                self._watchers[session_id] = cell
+            self._stats["reads"] += 1
+            entry = self._store.get(cell)
+        self._ensure_thread()
+        if entry is None:
+            entry = self._refresh(cell, refresh=False)
+        return entry
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, cells=len(self._store), watchers=len(self._watchers))
+
+    def stop(self):
+        self._stop.set()
+
+    def _refresh(self, cell, refresh=True):
+        started = time.thread_time()
+        try:
+            weather = self.fetch(*geohash_center(cell), refresh)
+        except Exception:
+            weather = None
+        with self._lock:
+            self._stats["cpu_seconds"] += time.thread_time() - started
+            version, previous = self._store.get(cell, (0, None))
+            if weather is None:
+                # Keep serving the last good value; a cell that never loaded is retried on the next tick
+                self._stats["errors"] += 1
+                if previous is None:
+                    self._store.pop(cell, None)
+                return version, previous
+            self._stats["refreshes"] += 1
+            if weather != previous:
+                version += 1
+            self._store[cell] = (version, weather)
+            return version, weather
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="weather-refresh", daemon=True)
+                self._thread.start()
+
+    def _notify_watchers(self, cells):
+        # Sessions showing these cells are notified once; their next read watches again
+        with self._lock:
+            sessions = [session for session, cell in self._watchers.items() if cell in cells]
+            for session in sessions:
+                del self._watchers[session]
+        for session in sessions:
+            try:
+                if self.notify(session):
+                    with self._lock:
+                        self._stats["notified"] += 1
+            except Exception:
+                pass
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            with self._lock:
+                # Cells nobody looked at recently are dropped instead of refreshed; sessions still
+                # showing one are rerun, which reads it again if they are alive
+                dropped = set()
+                for cell, last_read in list(self._last_read.items()):
+                    if now - last_read > self.idle_timeout:
+                        del self._last_read[cell]
+                        self._store.pop(cell, None)
+                        dropped.add(cell)
+                cells = [(cell, self._store.get(cell, (0, None))[0]) for cell in self._last_read]
+            changed = {cell for cell, version in cells if self._refresh(cell)[0] != version}
+            if changed or dropped:
+                self._notify_watchers(changed | dropped)
+
+def _page_cpu_ms(runs):
+    # CPU time of one dashboard page run, under a throwaway script-run context as in startup_bench.py
+    import logging
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import ScriptRunContext, add_script_run_ctx
+    from streamlit.runtime.state import SafeSessionState, SessionState
+    from streamlit.runtime.uploaded_file_manager import UploadedFileManager
+
+    logging.disable(logging.WARNING)
+    ctx = ScriptRunContext(session_id="weather_refresh_bench", _enqueue=lambda msg: None, query_string="",
+                           session_state=SafeSessionState(SessionState()), uploaded_file_mgr=UploadedFileManager(),
+                           page_script_hash="", user_info={"email": None})
+    add_script_run_ctx(threading.current_thread(), ctx)
+    from dashboard import dashboard
+
+    dashboard()  # imports and first-use loading are not part of the steady state
+    started = time.process_time()
+    for _ in range(runs):
+        ctx.reset()  # a new script run: widget ids may be registered again
+        dashboard()
+    return (time.process_time() - started) * 1000 / runs
+
+def bench(viewers=50, cells=5, seconds=10.0, interval=1.0, runs=5):
+    from dashboard import get_weather_data
+
+    page_ms = _page_cpu_ms(runs)
+    # Before: every viewer re-ran the whole page, twice (run + experimental_rerun), per 5 s refresh
+    before = page_ms * 2 * 60 / 5
+
+    # After: the viewers read their cell once, then stay idle while the scheduler refreshes the cells;
+    # a notified viewer reruns the page, which reads its cell again
+    positions = {f"viewer-{i}": (36.8 + 0.1 * (i % cells), 10.18) for i in range(viewers)}  # one cell each
+
+    def rerun(session_id):
+        refresher.get(*positions[session_id], session_id)
+        return True
+
+    refresher = WeatherRefresher(get_weather_data, interval=interval, idle_timeout=seconds * 2, notify=rerun)
+    for session_id, (lat, lon) in positions.items():
+        refresher.get(lat, lon, session_id)
+    initial = refresher.stats()
+    time.sleep(seconds)
+    refresher.stop()
+    stats = refresher.stats()
+    # Scheduler CPU per minute at the configured interval, shared by all viewers
+    refreshes = max(1, stats["refreshes"] - initial["refreshes"])
+    per_refresh_ms = (stats["cpu_seconds"] - initial["cpu_seconds"]) * 1000 / refreshes
+    # Plus one page run per viewer each time its cell's weather changed (at most once per refresh)
+    reruns_per_refresh = (stats["notified"] - initial["notified"]) / refreshes
+    after = (per_refresh_ms + reruns_per_refresh * page_ms) * cells * 60 / WEATHER_REFRESH_INTERVAL / viewers
+
+    print(f"dashboard page run: {page_ms:.1f} ms CPU; one cell refresh: {per_refresh_ms:.3f} ms CPU")
+    print(f"{viewers} idle viewers over {cells} cells, refresh every {WEATHER_REFRESH_INTERVAL:.0f} s")
+    print(f"{'':<28} {'CPU ms/min per viewer':>22}")
+    print(f"{'5 s page rerun (before)':<28} {before:>22.1f}")
+    print(f"{'shared scheduler (after)':<28} {after:>22.3f}   "
+          f"({reruns_per_refresh * cells:.0f} reruns per refresh of {cells} cells: the stub weather always changes)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench_parser = sub.add_parser("bench", help="CPU per idle dashboard viewer, page reruns vs shared scheduler")
+    bench_parser.add_argument("--viewers", type=int, default=50)
+    bench_parser.add_argument("--cells", type=int, default=5)
+    bench_parser.add_argument("--seconds", type=float, default=10.0, help="how long the scheduler runs")
+    args = parser.parse_args()
+    bench(args.viewers, args.cells, args.seconds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# The app's modules are flat files imported by name, as in `streamlit run`
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Accident_Severity_Prediction")
+sys.path.insert(0, PACKAGE_DIR)
+
+# Keep the persistent caches of the test run out of the app's cache directory
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="road_safety_tests_"))
@@ -0,0 +1,92 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from accident_store import (ROLLUP_FIELDS, AccidentStore, is_adverse_weather, month_index, month_label,
+                            synthetic_records)
+
+@pytest.fixture
+def records():
+    return synthetic_records(5_000, seed=1, start=date(2023, 1, 1), years=1)
+
+@pytest.fixture
+def store(tmp_path, records):
+    store = AccidentStore(str(tmp_path / "accidents"))
+    # Two appends, so the rollups are also merged with earlier ones
+    assert store.append(records.iloc[:3_000]) == (3_000, 0)
+    assert store.append(records.iloc[3_000:]) == (2_000, 0)
+    return store
+
+def expected_totals(records, key):
+    dates = pd.to_datetime(records["Date"])
+    frame = pd.DataFrame({
+        "key": key(dates),
+        "accidents": 1,
+        "casualties": records["Number_of_Casualties"],
+        "vehicles": records["Number_of_Vehicles"],
+        "adverse_weather": records["Weather_Conditions"].map(is_adverse_weather).astype(int),
+    })
+    return frame.groupby("key")[list(ROLLUP_FIELDS)].sum()
+
+def test_columns_hold_the_records(store, records):
+    assert store.rows == len(records)
+    np.testing.assert_allclose(store.column("Latitude"), records["Latitude"], rtol=1e-6)
+    dates = pd.to_datetime(records["Date"])
+    np.testing.assert_array_equal(store.column("Date"), [d.toordinal() for d in dates])
+    np.testing.assert_array_equal(store.column("Day_of_Week"), dates.dt.weekday)
+    labels = store.labels("Weather_Conditions")
+    assert [labels[i] for i in store.column("Weather_Conditions")[:50]] == records["Weather_Conditions"][:50].tolist()
+
+def test_daily_rollup(store, records):
+    ordinals, totals = store.daily(days=400)
+    expected = expected_totals(records, lambda dates: [d.toordinal() for d in dates])
+    assert ordinals[-1] == expected.index.max()
+    by_day = dict(zip(ordinals, totals))
+    for ordinal, row in expected.iterrows():
+        np.testing.assert_array_equal(by_day[ordinal], row.to_numpy())
+    assert totals.sum(axis=0)[0] == len(records)
+
+def test_monthly_rollup(store, records):
+    months, totals = store.monthly(months=12)
+    expected = expected_totals(records, lambda dates: dates.dt.year * 12 + dates.dt.month - 1)
+    np.testing.assert_array_equal(months, expected.index.to_numpy())
+    np.testing.assert_array_equal(totals, expected.to_numpy())
+    assert month_label(months[0]) == "Jan 2023"
+    # Months before the first accident are zero
+    _, padded = store.monthly(months=15)
+    assert not padded[:3].any()
+
+def test_condition_counts(store, records):
+    labels, counts = store.condition_counts("Road_Surface_Conditions")
+    expected = records["Road_Surface_Conditions"].value_counts()
+    assert dict(zip(labels, counts)) == expected.to_dict()
+
+def test_reopened_store_sees_appends(store, records):
+    reader = AccidentStore(store.path)
+    assert reader.rows == len(records)
+    store.append(records.iloc[:10])
+    assert reader.rows == len(records) + 10
+    assert reader.daily(days=400)[1].sum(axis=0)[0] == len(records) + 10
+
+def test_invalid_rows_are_skipped(tmp_path):
+    store = AccidentStore(str(tmp_path / "accidents"))
+    frame = pd.DataFrame({
+        "Date": ["2024-03-01", "01/03/2024", "not a date", "2024-03-02"],
+        "Latitude": ["36.8", "36.9", "36.7", ""],
+        "Longitude": ["10.1", "10.2", "10.3", "10.4"],
+        "Number_of_Casualties": ["1", "2", "1", "1"],
+        "Number_of_Vehicles": ["2", "", "1", "1"],
+        "Road_Surface_Conditions": ["Dry", "Wet", "Dry", "Dry"],
+        "Weather_Conditions": ["Fine", "Rain", "Fine", "Fine"],
+    })
+    assert store.append(frame) == (2, 2)
+    # Day-first dates: both rows are the 1st of March
+    assert set(store.column("Date")) == {date(2024, 3, 1).toordinal()}
+    assert store.column("Number_of_Vehicles").tolist() == [2, 0]
+    _, totals = store.daily(days=1)
+    assert totals.tolist() == [[2, 3, 2, 1]]
+
+def test_month_index():
+    assert month_index([date(2024, 3, 15).toordinal()]).tolist() == [2024 * 12 + 2]
@@ -0,0 +1,123 @@
+import threading
+import time
+import types
+
+import pytest
+
+import caching
+from caching import RefreshingCache
+
+class Clock:
+    # Stands in for the time module inside caching, so entries age without sleeping
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return time.perf_counter()
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(caching, "time", types.SimpleNamespace(monotonic=clock.monotonic,
+                                                               perf_counter=clock.perf_counter))
+    return clock
+
+class Source:
+    # fetch() that counts its calls and can be held open to test coalescing
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.started = threading.Event()
+
+    def __call__(self, value):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return f"{value}#{self.calls}"
+
+def wait_for_refresh(cache, key):
+    deadline = time.monotonic() + 5
+    while key in cache._inflight and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+def test_fresh_entries_are_hits(clock):
+    source = Source()
+    cache = RefreshingCache("test-fresh", source, ttl=60)
+    assert cache.get("k", "a") == "a#1"
+    clock.now += 30
+    assert cache.get("k", "a") == "a#1"
+    assert source.calls == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["fetches"]) == (1, 1, 1)
+
+def test_stale_entry_is_served_while_refreshing(clock):
+    source = Source()
+    cache = RefreshingCache("test-stale", source, ttl=60, stale_ttl=300)
+    cache.get("k", "a")
+    clock.now += 120
+    # The stale value comes back at once, and one background fetch replaces it
+    assert cache.get("k", "a") == "a#1"
+    wait_for_refresh(cache, "k")
+    assert source.calls == 2
+    assert cache.get("k", "a") == "a#2"
+    assert cache.stats()["stale_hits"] == 1
+
+def test_expired_entry_is_fetched_in_caller(clock):
+    source = Source()
+    cache = RefreshingCache("test-expired", source, ttl=60, stale_ttl=60)
+    cache.get("k", "a")
+    clock.now += 121
+    assert cache.get("k", "a") == "a#2"
+    assert cache.stats()["misses"] == 2
+
+def test_concurrent_misses_share_one_fetch(clock):
+    source = Source()
+    source.release.clear()
+    cache = RefreshingCache("test-coalesce", source, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k", "a"))) for _ in range(8)]
+    threads[0].start()
+    assert source.started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.coalesced < 7 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    source.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["a#1"] * 8
+    assert source.calls == 1
+    assert cache.stats()["coalesced"] == 7
+
+def test_errors_and_none_are_not_cached(clock):
+    outcomes = [ValueError("upstream down"), None, "ok"]
+
+    def fetch():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    cache = RefreshingCache("test-errors", fetch, ttl=60)
+    with pytest.raises(ValueError):
+        cache.get("k")
+    assert cache.get("k") is None
+    assert cache.get("k") == "ok"
+    assert len(cache) == 1
+    assert cache.stats()["errors"] == 1
+
+def test_refresh_and_lru_eviction(clock):
+    source = Source()
+    cache = RefreshingCache("test-lru", source, ttl=60, maxsize=2)
+    cache.get("a", "a")
+    cache.get("b", "b")
+    cache.get("a", "a")  # a becomes the most recently used
+    cache.get("c", "c")
+    assert set(cache._entries) == {"a", "c"}
+    assert cache.get("a", "a", refresh=True) == "a#4"
+    assert caching.cache_stats()["test-lru"]["size"] == 2
@@ -0,0 +1,57 @@
+import pytest
+
+import geocoding
+from gazetteer import Gazetteer, normalize_place, trigrams
+
+PLACES = [
+    ("Tunis", 36.8065, 10.1815, "Tunis"),
+    ("Tunis Carthage Airport", 36.851, 10.227, "Tunis"),
+    ("Sousse", 35.8256, 10.6369, "Sousse"),
+    ("Sfax", 34.7406, 10.7603, "Sfax"),
+    ("Al Hammamat", 36.4, 10.6167, "Nabeul"),
+    ("Sidi Bou Saïd", 36.8687, 10.3417, "Tunis"),
+    ("Monastir", 35.7643, 10.8113, "Monastir"),
+]
+
+@pytest.fixture
+def gazetteer():
+    gazetteer = Gazetteer()
+    for place in PLACES:
+        gazetteer.add(*place)
+    return gazetteer
+
+def test_normalize_place():
+    assert normalize_place("Sidi Bou Saïd, Tunisie") == "sidi bou said"
+    assert normalize_place("  SOUSSE   Tunisia ") == "sousse"
+    assert normalize_place("Tunisia") == ""
+    assert "  s" in trigrams("sfax")
+
+def test_lookup(gazetteer):
+    assert gazetteer.lookup("sidi bou said, Tunisia") == PLACES[5]
+    assert gazetteer.lookup("Hammamat") == PLACES[4]  # without the article
+    assert gazetteer.lookup("Bizerte") is None
+
+def test_duplicates_and_empty_names_are_ignored(gazetteer):
+    gazetteer.add("TUNIS", 0.0, 0.0)
+    gazetteer.add("Tunisie", 0.0, 0.0)
+    assert len(gazetteer.places) == len(PLACES)
+    assert gazetteer.lookup("tunis")[1] == 36.8065
+
+def test_prefix_matches_in_order(gazetteer):
+    assert [p[0] for p in gazetteer.prefix("tun")] == ["Tunis", "Tunis Carthage Airport"]
+    assert [p[0] for p in gazetteer.prefix("ham")] == ["Al Hammamat"]
+    assert gazetteer.prefix("tun", limit=1) == [PLACES[0]]
+    assert gazetteer.prefix("") == []
+
+def test_search_falls_back_to_trigrams(gazetteer):
+    # Misspelled names have no prefix match but share most trigrams
+    assert gazetteer.search("Monastyr")[0] == PLACES[6]
+    assert gazetteer.search("Sousa")[0] == PLACES[2]
+    assert gazetteer.search("zzzz") == []
+
+def test_suggest_places(gazetteer, monkeypatch):
+    monkeypatch.setattr(geocoding, "get_gazetteer", lambda: gazetteer)
+    assert geocoding.suggest_places("S") == ["Sfax", "Sidi Bou Saïd", "Sousse"]
+    assert geocoding.suggest_places("s", limit=2) == ["Sfax", "Sidi Bou Saïd"]
+    # The prefix match comes first, then names that are merely similar
+    assert geocoding.suggest_places("Tunis Cart") == ["Tunis Carthage Airport", "Tunis"]
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from geo_utils import (cumulative_distances, douglas_peucker_significance, geohash, geohash_bounds, geohash_center,
+                       haversine_m, resample_polyline, simplify_polylines)
+
+TUNIS = (36.8065, 10.1815)
+SFAX = (34.7406, 10.7603)
+
+def test_haversine_known_distance():
+    # Tunis - Sfax is about 235 km as the crow flies
+    assert haversine_m(*TUNIS, *SFAX) == pytest.approx(235_000, rel=0.01)
+    # One degree of latitude is about 111.2 km
+    assert haversine_m(0.0, 0.0, 1.0, 0.0) == pytest.approx(111_195, rel=1e-4)
+    assert haversine_m(*TUNIS, *TUNIS) == 0.0
+
+def test_haversine_is_elementwise():
+    lats = np.array([0.0, 1.0, 2.0])
+    distances = haversine_m(lats, np.zeros(3), lats + 1, np.zeros(3))
+    assert distances.shape == (3,)
+    np.testing.assert_allclose(distances, distances[0], rtol=1e-9)
+
+def test_cumulative_distances():
+    coords = np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0]])
+    distances = cumulative_distances(coords)
+    assert distances[0] == 0.0
+    np.testing.assert_allclose(distances[1:], [111_195, 222_390], rtol=1e-4)
+
+def test_resample_polyline_preserves_length():
+    coords = np.array([TUNIS, (36.0, 10.3), SFAX])
+    samples, piece_length = resample_polyline(coords, spacing_m=500.0)
+    total = cumulative_distances(coords)[-1]
+    assert piece_length <= 500.0
+    assert len(samples) * piece_length == pytest.approx(total)
+    # Midpoints stay between the endpoints
+    assert samples[:, 0].max() < TUNIS[0] and samples[:, 0].min() > SFAX[0]
+
+def test_resample_degenerate_polyline():
+    samples, piece_length = resample_polyline([TUNIS, TUNIS])
+    assert piece_length == 0.0
+    np.testing.assert_array_equal(samples, [TUNIS])
+
+def test_douglas_peucker_keeps_endpoints_and_corners():
+    # An L shape sampled densely: only the corner matters
+    leg1 = np.column_stack((np.linspace(36.0, 36.1, 11), np.full(11, 10.0)))
+    leg2 = np.column_stack((np.full(10, 36.1), np.linspace(10.01, 10.1, 10)))
+    coords = np.vstack((leg1, leg2))
+    significance = douglas_peucker_significance(coords)
+    assert np.isinf(significance[[0, -1]]).all()
+    assert np.argmax(significance[1:-1]) + 1 == 10
+    simplified, = simplify_polylines([coords], tolerance_m=10.0)
+    np.testing.assert_array_equal(simplified, coords[[0, 10, -1]])
+
+def test_simplify_polylines_shares_point_budget():
+    rng = np.random.default_rng(0)
+    polylines = [np.column_stack((np.linspace(36, 37, 200), 10 + rng.normal(0, 0.01, 200))) for _ in range(3)]
+    simplified = simplify_polylines(polylines, tolerance_m=1.0, max_points=60)
+    assert sum(len(coords) for coords in simplified) <= 60
+    for coords, original in zip(simplified, polylines):
+        np.testing.assert_array_equal(coords[[0, -1]], original[[0, -1]])
+
+def test_geohash_reference_value():
+    # Reference example of the geohash documentation
+    assert geohash(57.64911, 10.40744, precision=11) == "u4pruydqqvj"
+
+def test_geohash_bounds_contain_point():
+    cell = geohash(*TUNIS, precision=6)
+    lat_min, lon_min, lat_max, lon_max = geohash_bounds(cell)
+    assert lat_min <= TUNIS[0] < lat_max and lon_min <= TUNIS[1] < lon_max
+    assert geohash(*geohash_center(cell), precision=6) == cell
+    # Prefixes are the enclosing cells
+    assert geohash(*TUNIS, precision=4) == cell[:4]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from heat_grid import aggregate, cell_size, heat_data, viewport_bbox
+
+CELL = (0.05, 0.05)
+# Bounds on multiples of the cell, so the grid of aggregate() and histogram2d's bins coincide
+BBOX = (36.5, 9.8, 37.0, 10.5)
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(0)
+    lats = rng.normal(36.8, 0.15, 20_000).astype(np.float32)
+    lons = rng.normal(10.18, 0.2, 20_000).astype(np.float32)
+    return lats, lons
+
+def histogram(lats, lons, weights=None):
+    lat_edges = np.arange(round((BBOX[2] - BBOX[0]) / CELL[0]) + 2) * CELL[0] + BBOX[0]
+    lon_edges = np.arange(round((BBOX[3] - BBOX[1]) / CELL[1]) + 2) * CELL[1] + BBOX[1]
+    counts, _, _ = np.histogram2d(lats.astype(np.float64), lons.astype(np.float64), bins=(lat_edges, lon_edges),
+                                  weights=weights)
+    return counts
+
+def test_counts_match_histogram2d(points):
+    lats, lons = points
+    cells = aggregate(lats, lons, BBOX, CELL)
+    counts = histogram(lats, lons)
+    assert len(cells) == np.count_nonzero(counts)
+    assert cells[:, 2].sum() == counts.sum()
+    np.testing.assert_array_equal(np.sort(cells[:, 2]), np.sort(counts[counts > 0]))
+
+def test_centroids_are_cell_means(points):
+    lats, lons = points
+    cells = aggregate(lats, lons, BBOX, CELL)
+    counts = histogram(lats, lons)
+    lat_sums = histogram(lats, lons, weights=lats.astype(np.float64))
+    occupied = counts > 0
+    np.testing.assert_allclose(np.sort(cells[:, 0]), np.sort(lat_sums[occupied] / counts[occupied]), rtol=1e-6)
+    # Every centroid lies in its own cell
+    i = np.floor(cells[:, 0] / CELL[0])
+    j = np.floor(cells[:, 1] / CELL[1])
+    assert len(set(zip(i, j))) == len(cells)
+
+def test_mask_and_outside_points(points):
+    lats, lons = points
+    mask = np.zeros(len(lats), dtype=bool)
+    mask[::4] = True
+    masked = aggregate(lats, lons, BBOX, CELL, mask)
+    assert masked[:, 2].sum() == histogram(lats[mask], lons[mask]).sum()
+    far = aggregate(np.array([30.0], dtype=np.float32), np.array([8.0], dtype=np.float32), BBOX, CELL)
+    assert far.shape == (0, 3) and far.dtype == np.float32
+
+def test_cell_size_and_viewport():
+    dlat, dlon = cell_size(10, 36.8, pixels=32)
+    assert dlon > dlat  # meridians converge away from the equator
+    assert cell_size(11, 36.8, pixels=32)[0] == pytest.approx(dlat / 2)
+    lat_min, lon_min, lat_max, lon_max = viewport_bbox(36.8, 10.18, 10, 800, 600)
+    assert lat_min < 36.8 < lat_max and lon_min < 10.18 < lon_max
+    assert (lon_max - lon_min) > (lat_max - lat_min)
+
+def test_heat_data_scales_weights():
+    cells = np.array([[36.8, 10.1, 4], [36.9, 10.2, 2]], dtype=np.float32)
+    data = heat_data(cells)
+    assert [row[2] for row in data] == [1.0, 0.5]
+    assert heat_data(np.empty((0, 3), dtype=np.float32)) == []
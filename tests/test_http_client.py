@@ -0,0 +1,80 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import http_client
+
+ROUTE = {"code": "Ok", "routes": [{"geometry": "_p~iF~ps|U_ulLnnqC_mqNvxq`@", "distance": 1000.0,
+                                  "duration": 60.0, "legs": []}], "waypoints": []}
+
+class StubOSRM(BaseHTTPRequestHandler):
+    # Answers every request with the server's current (status, payload); payload None sends a non-JSON body
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        status, payload = self.server.reply
+        body = json.dumps(payload).encode() if payload is not None else b"upstream failure"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json" if payload is not None else "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def osrm(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOSRM)
+    server.paths, server.reply = [], (200, ROUTE)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(http_client, "OSRM_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    # No retries and no persistent store: every miss reaches the stub exactly once
+    monkeypatch.setattr(http_client, "_session", requests.Session())
+    monkeypatch.setattr(http_client, "get_store", lambda: None)
+    http_client.osrm_cache.clear()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_cache_hit_on_rounded_coordinates(osrm):
+    first = http_client.osrm_route((36.80651, 10.18151), (35.8256, 10.636))
+    second = http_client.osrm_route((36.80649, 10.18149), (35.82561, 10.63601))
+    assert first == second == ROUTE
+    assert len(osrm.paths) == 1
+    # Coordinates sent to OSRM are the rounded ones, lon,lat
+    assert osrm.paths[0].startswith("/route/v1/driving/10.1815,36.8065;10.636,35.8256?")
+
+def test_stale_entry_is_fetched_again(osrm, monkeypatch):
+    monkeypatch.setattr(http_client.osrm_cache, "ttl", 0.05)
+    http_client.osrm_route((36.8, 10.18), (35.82, 10.63))
+    time.sleep(0.1)
+    http_client.osrm_route((36.8, 10.18), (35.82, 10.63))
+    assert len(osrm.paths) == 2
+
+def test_osrm_error_body_is_returned_and_not_cached(osrm):
+    osrm.reply = (400, {"code": "NoRoute", "message": "Impossible route between points"})
+    for _ in range(2):
+        data = http_client.osrm_route((36.8, 10.18), (37.5, 12.5))
+        assert data == {"code": "NoRoute", "message": "Impossible route between points"}
+    assert len(osrm.paths) == 2
+
+def test_server_error_raises(osrm):
+    osrm.reply = (503, None)
+    with pytest.raises(requests.HTTPError):
+        http_client.osrm_route((36.8, 10.18), (35.82, 10.63))
+
+def test_persistent_store_serves_after_memory_cache_is_cleared(osrm, monkeypatch, tmp_path):
+    from persistent_cache import PersistentStore
+
+    store = PersistentStore(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(http_client, "get_store", lambda: store)
+    first = http_client.osrm_route((36.8, 10.18), (35.82, 10.63))
+    http_client.osrm_cache.clear()
+    second = http_client.osrm_route((36.8, 10.18), (35.82, 10.63))
+    assert len(osrm.paths) == 1
+    assert second["code"] == "Ok"
+    assert second["routes"][0]["geometry"] == first["routes"][0]["geometry"]
@@ -0,0 +1,29 @@
+import os
+
+import onnxruntime
+import pytest
+
+import model_runtime
+from model_runtime import SEVERITY_ONNX_PATH, create_onnx_session, optimized_path
+
+def test_optimized_path_is_keyed_on_runtime_and_cpu(tmp_path, monkeypatch):
+    path = optimized_path("models/severity.onnx", "all", directory=str(tmp_path))
+    assert os.path.dirname(path) == str(tmp_path)
+    assert os.path.basename(path).startswith("severity.opt-all.")
+    assert optimized_path("models/severity.onnx", "extended", directory=str(tmp_path)) != path
+    assert optimized_path("other/severity.onnx", "all", directory=str(tmp_path)) != path
+    monkeypatch.setattr(model_runtime, "cpu_fingerprint", lambda: "another cpu")
+    assert optimized_path("models/severity.onnx", "all", directory=str(tmp_path)) != path
+    monkeypatch.undo()
+    monkeypatch.setattr(onnxruntime, "__version__", "0.0.0")
+    assert optimized_path("models/severity.onnx", "all", directory=str(tmp_path)) != path
+
+def test_saved_graph_is_reused():
+    if not os.path.exists(SEVERITY_ONNX_PATH):
+        pytest.skip(f"{SEVERITY_ONNX_PATH} is missing")
+    create_onnx_session(SEVERITY_ONNX_PATH, save_optimized=True, graph_optimization="extended")
+    saved = optimized_path(SEVERITY_ONNX_PATH, "extended")
+    # Under the test run's CACHE_DIR (see conftest.py), not next to the model
+    assert os.path.exists(saved) and os.path.dirname(saved) == model_runtime.ORT_OPTIMIZED_DIR
+    session = create_onnx_session(SEVERITY_ONNX_PATH, save_optimized=True, graph_optimization="extended")
+    assert session.get_inputs()[0].name
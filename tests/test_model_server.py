@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from model_server import MicroBatcher
+
+def row_sums(batch):
+    # Stands in for a model: (n, 3) float32 rows only
+    if batch.ndim != 2 or batch.shape[1] != 3:
+        raise ValueError(f"expected (n, 3) rows, got {batch.shape}")
+    return batch.sum(axis=1)
+
+class Recorder:
+    # Records the number of rows of every call
+    def __init__(self, fn):
+        self.fn = fn
+        self.calls = []
+
+    def __call__(self, batch):
+        self.calls.append(len(batch))
+        return self.fn(batch)
+
+def test_requests_in_one_window_share_a_batch():
+    model = Recorder(row_sums)
+    # A long window: the requests below are all queued before it expires
+    batcher = MicroBatcher("test", model, max_rows=100, window=0.5)
+    futures = [batcher.submit(np.full((n, 3), n, dtype=np.float32)) for n in (1, 2, 3)]
+    for future, n in zip(futures, (1, 2, 3)):
+        np.testing.assert_array_equal(future.result(5), np.full(n, 3 * n))
+    assert model.calls == [6]
+    assert batcher.stats["split_batches"] == 0
+
+def test_malformed_request_only_fails_itself():
+    model = Recorder(row_sums)
+    batcher = MicroBatcher("test", model, max_rows=100, window=0.5)
+    good = np.ones((2, 3), dtype=np.float32)
+    futures = [batcher.submit(inputs) for inputs in (good, np.ones((2, 4), dtype=np.float32), good * 2)]
+    np.testing.assert_array_equal(futures[0].result(5), [3, 3])
+    with pytest.raises(ValueError):
+        futures[1].result(5)
+    np.testing.assert_array_equal(futures[2].result(5), [6, 6])
+    # The mixed shapes cannot even be concatenated: each request then runs on its own
+    assert model.calls == [2, 2, 2]
+    assert batcher.stats["split_batches"] == 1
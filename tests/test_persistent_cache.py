@@ -0,0 +1,68 @@
+import types
+
+import numpy as np
+import pytest
+
+import persistent_cache
+from persistent_cache import PersistentStore, normalize_query
+from route_codec import decode_polyline, pack_coords, synthetic_osrm_route, unpack_coords
+
+@pytest.fixture
+def clock(monkeypatch):
+    # last_used drives eviction, so every write gets its own timestamp
+    ticks = iter(range(1, 1_000_000))
+    monkeypatch.setattr(persistent_cache, "time", types.SimpleNamespace(time=lambda: float(next(ticks))))
+
+@pytest.fixture
+def store(tmp_path, clock):
+    return PersistentStore(str(tmp_path / "cache.sqlite3"), max_bytes=10_000_000)
+
+def payload(*seeds):
+    routes = [synthetic_osrm_route(km=5, seed=seed) for seed in seeds]
+    for route in routes:
+        route["legs"][0]["steps"][0]["geometry"] = "??"
+    return {"code": "Ok", "routes": routes, "waypoints": [{"name": "Tunis", "location": [10.18, 36.8]}]}
+
+def test_pack_coords_round_trip():
+    coords = decode_polyline(synthetic_osrm_route(km=20)["geometry"], scaled=True)
+    blob = pack_coords(coords)
+    assert len(blob) < coords.nbytes
+    unpacked = unpack_coords(blob)
+    assert unpacked.dtype == np.int32
+    np.testing.assert_array_equal(unpacked, coords)
+    assert unpack_coords(pack_coords(np.empty((0, 2), dtype=np.int32))).shape == (0, 2)
+
+def test_route_round_trip(store):
+    original = payload(0, 1)
+    store.put_route("tunis-sfax", original)
+    restored = store.get_route("tunis-sfax")
+    assert [r["geometry"] for r in restored["routes"]] == [r["geometry"] for r in original["routes"]]
+    assert restored["waypoints"] == original["waypoints"]
+    assert restored["routes"][1]["distance"] == original["routes"][1]["distance"]
+    # Step geometries are dropped, the rest of the steps is kept
+    step = restored["routes"][0]["legs"][0]["steps"][0]
+    assert "geometry" not in step and step["name"] == original["routes"][0]["legs"][0]["steps"][0]["name"]
+    assert store.get_route("missing") is None
+
+def test_routes_survive_reopening(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    PersistentStore(path).put_route("k", payload(2))
+    assert PersistentStore(path).get_route("k")["routes"][0]["geometry"] == payload(2)["routes"][0]["geometry"]
+
+def test_geocode_queries_are_normalized(store):
+    store.put_geocode("  Sidi   Bou Said ", 36.87, 10.35, "Sidi Bou Saïd, Tunisie")
+    assert normalize_query("SIDI bou  said") == "sidi bou said"
+    assert store.get_geocode("sidi BOU said") == (36.87, 10.35, "Sidi Bou Saïd, Tunisie")
+    assert store.get_geocode("Sousse") is None
+    assert store.iter_geocodes() == [("sidi bou said", 36.87, 10.35)]
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    store = PersistentStore(str(tmp_path / "cache.sqlite3"), max_bytes=300)
+    for name in ("tunis", "sousse", "sfax"):
+        store.put_geocode(name, 36.0, 10.0, "x" * 60)
+    store.get_geocode("tunis")  # now more recent than sousse
+    store.put_geocode("bizerte", 37.0, 9.8, "x" * 60)
+    assert store.total_bytes() <= 300
+    assert store.get_geocode("sousse") is None
+    assert store.get_geocode("tunis") is not None
+    assert store.get_geocode("bizerte") is not None
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from route_codec import COORD_SCALE, MANEUVER_TYPES, Route, decode_polyline, encode_polyline, synthetic_osrm_route
+
+# Reference example of the polyline algorithm documentation
+ENCODED = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+POINTS = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+
+def test_decode_reference_polyline():
+    np.testing.assert_allclose(decode_polyline(ENCODED), POINTS)
+
+def test_decode_scaled_is_int32():
+    coords = decode_polyline(ENCODED, scaled=True)
+    assert coords.dtype == np.int32
+    np.testing.assert_array_equal(coords, np.rint(np.array(POINTS) * COORD_SCALE))
+
+def test_encode_reference_polyline():
+    assert encode_polyline(POINTS) == ENCODED
+    assert encode_polyline(decode_polyline(ENCODED, scaled=True), scaled=True) == ENCODED
+
+def test_round_trip_long_route():
+    encoded = synthetic_osrm_route(km=50)["geometry"]
+    coords = decode_polyline(encoded, scaled=True)
+    assert encode_polyline(coords, scaled=True) == encoded
+
+def test_matches_polyline_package():
+    polyline = pytest.importorskip("polyline")
+    encoded = synthetic_osrm_route(km=20, seed=3)["geometry"]
+    np.testing.assert_allclose(decode_polyline(encoded), polyline.decode(encoded), atol=1e-9)
+
+def test_empty_and_malformed():
+    assert decode_polyline("").shape == (0, 2)
+    assert decode_polyline("", scaled=True).dtype == np.int32
+    with pytest.raises(ValueError):
+        decode_polyline(ENCODED[:-1])  # last chunk still has its continuation flag
+    with pytest.raises(ValueError):
+        decode_polyline("_p~iF")  # a latitude without its longitude
+
+def test_route_from_osrm():
+    route_item = synthetic_osrm_route(km=10)
+    route = Route.from_osrm(route_item, color="red")
+    assert route.coords.dtype == np.int32
+    assert route.distance == pytest.approx(route_item["distance"] / 1000)
+    assert route.duration == pytest.approx(route_item["duration"] / 60)
+    assert route.color == "red"
+    steps = route_item["legs"][0]["steps"]
+    assert len(route.steps) == len(steps)
+    assert MANEUVER_TYPES[route.steps["type"][0]] == "turn"
+    assert route.names[route.steps["name"][0]] == steps[0]["name"]
+    lon, lat = steps[0]["maneuver"]["location"]
+    assert route.steps["lat"][0] == round(lat * COORD_SCALE)
+    assert route.steps["lon"][0] == round(lon * COORD_SCALE)
+
+def test_route_from_latlon():
+    route = Route.from_latlon(POINTS, distance=12.5, duration=20.0)
+    np.testing.assert_allclose(route.latlon(), POINTS)
+    assert route.start() == pytest.approx(POINTS[0])
+    assert len(route.steps) == 0
+    assert route.nbytes() > route.coords.nbytes
@@ -0,0 +1,45 @@
+import types
+
+import pytest
+
+import voice_alerts
+from voice_alerts import audio_cache, cached_audio, request_audio, synthesize
+
+class FakeTTS:
+    # gTTS stand-in: "speaks" the text as its own bytes, counting the syntheses
+    calls = 0
+
+    def __init__(self, text, lang, slow):
+        self.audio = f"{lang}:{text}".encode()
+
+    def write_to_fp(self, fp):
+        FakeTTS.calls += 1
+        fp.write(self.audio)
+
+@pytest.fixture(autouse=True)
+def fake_gtts(monkeypatch, tmp_path):
+    FakeTTS.calls = 0
+    registry = types.SimpleNamespace(get=lambda name: types.SimpleNamespace(gTTS=FakeTTS))
+    monkeypatch.setattr(voice_alerts, "registry", registry)
+    monkeypatch.setattr(voice_alerts, "VOICE_CACHE_DIR", str(tmp_path))
+    audio_cache.clear()
+
+def counters():
+    stats = audio_cache.stats()
+    return stats["hits"], stats["misses"]
+
+def test_one_request_counts_one_miss():
+    hits, misses = counters()
+    assert cached_audio("Drive slowly") is None
+    assert request_audio("Drive slowly", lookup=False).result(5) == b"en:Drive slowly"
+    assert counters() == (hits, misses + 1)
+    assert cached_audio("Drive slowly") == b"en:Drive slowly"
+    assert counters() == (hits + 1, misses + 1)
+    assert FakeTTS.calls == 1
+
+def test_disk_cache_survives_memory_eviction():
+    assert synthesize("Stay alert", "fr") == b"fr:Stay alert"
+    audio_cache.clear()
+    assert cached_audio("Stay alert", "fr") == b"fr:Stay alert"
+    assert synthesize("Stay alert", "fr") == b"fr:Stay alert"
+    assert FakeTTS.calls == 1